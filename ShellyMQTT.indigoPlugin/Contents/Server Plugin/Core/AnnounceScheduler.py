@@ -0,0 +1,151 @@
+# coding=utf-8
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class AnnounceScheduler:
+    """
+    Paces the announce commands that are sent to devices when they start.
+
+    Every device asks its unit to announce itself when it starts, so starting hundreds of devices
+    at once would flood the broker with commands and the plugin with the replies. Announces are
+    released by a token bucket instead: up to `burst` announces are released at once and tokens
+    are then added at `rate` per second. Each token interval is randomly stretched or shrunk by up
+    to `jitter` of its length so that the replies don't arrive in lockstep.
+
+    Devices are scheduled from the Indigo thread and released by the concurrent thread.
+    """
+
+    def __init__(self, rate=0, burst=1, jitter=0.0):
+        self.rate = rate  # Announces released per second, 0 to release every announce right away
+        self.burst = burst  # The largest number of announces that can be released at once
+        self.jitter = jitter  # The fraction of a token interval by which it is randomly changed
+        self.pending = OrderedDict()  # {<key>: <value>} in the order the keys were scheduled
+        self.tokens = burst
+        self.nextTokenAt = 0  # When the next token is added, only used while the bucket is not full
+        self.lock = threading.Lock()
+
+        # Counters
+        self.scheduled = 0  # Announces that were scheduled
+        self.released = 0  # Announces that were released
+        self.skipped = 0  # Announces that were no longer needed before they were due
+
+    def isEnabled(self):
+        """
+        Helper method to determine if announces are paced.
+
+        :return: True if the rate is more than 0 announces per second.
+        """
+
+        return self.rate > 0
+
+    def put(self, key, value):
+        """
+        Schedules an announce. A key that is already scheduled keeps its place.
+
+        :param key: The key of the device, i.e. its Indigo device id.
+        :param value: The value that is released when the announce is due.
+        :return: True if no other announces were scheduled.
+        """
+
+        with self.lock:
+            wasEmpty = not self.pending
+            if key not in self.pending:
+                self.scheduled += 1
+            self.pending[key] = value
+            return wasEmpty
+
+    def discard(self, key):
+        """
+        Removes a scheduled announce that is no longer needed.
+
+        :param key: The key of the device.
+        :return: True if the announce was scheduled.
+        """
+
+        with self.lock:
+            if self.pending.pop(key, None) is None:
+                return False
+            self.skipped += 1
+            return True
+
+    def getInterval(self):
+        """
+        Getter for the time until the next token is added.
+
+        :return: The number of seconds.
+        """
+
+        return random.uniform(1 - self.jitter, 1 + self.jitter) / self.rate
+
+    def refill(self, now):
+        """
+        Adds the tokens that have become available.
+
+        :param now: The current time.
+        :return: None
+        """
+
+        while self.tokens < self.burst and self.nextTokenAt <= now:
+            self.tokens += 1
+            self.nextTokenAt += self.getInterval()
+
+    def flush(self, now=None, force=False):
+        """
+        Removes and returns the announces that can be released.
+
+        :param now: The current time, defaults to time.time().
+        :param force: True to release every scheduled announce.
+        :return: A list of (key, value) tuples in the order the keys were scheduled.
+        """
+
+        now = time.time() if now is None else now
+        announces = []
+        with self.lock:
+            if force or not self.isEnabled():
+                announces = list(self.pending.items())
+                self.pending.clear()
+            else:
+                self.refill(now)
+                while self.pending and self.tokens > 0:
+                    if self.tokens == self.burst:
+                        # The bucket was full, so tokens start being added again from now
+                        self.nextTokenAt = now + self.getInterval()
+                    self.tokens -= 1
+                    announces.append(self.pending.popitem(last=False))
+            self.released += len(announces)
+        return announces
+
+    def getTimeout(self, now=None):
+        """
+        Getter for the time until the next scheduled announce can be released.
+
+        :param now: The current time, defaults to time.time().
+        :return: The number of seconds to wait, or None if no announces are scheduled.
+        """
+
+        with self.lock:
+            if not self.pending:
+                return None
+            if self.tokens > 0 or not self.isEnabled():
+                return 0
+
+            now = time.time() if now is None else now
+            return max(0, self.nextTokenAt - now)
+
+    def getStatistics(self):
+        """
+        Getter for the scheduler counters.
+
+        :return: A dictionary of counter names and values.
+        """
+
+        with self.lock:
+            return {
+                'scheduled': self.scheduled,
+                'released': self.released,
+                'skipped': self.skipped,
+                'pending': len(self.pending)
+            }
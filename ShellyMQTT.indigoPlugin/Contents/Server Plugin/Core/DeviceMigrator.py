@@ -0,0 +1,78 @@
+# coding=utf-8
+import logging
+
+
+class DeviceMigrator:
+    """
+    Brings devices up to the current schema version of the plugin.
+
+    The schema version of a device is stored in its "devVersCount" plugin prop. Migrations are
+    applied in order, where the migration at index N upgrades a device from version N to N + 1, so
+    the current version is the number of migrations. A device only runs the migrations it has not
+    run yet and its props are only written when it was migrated, so up to date devices start
+    without any calls to the server.
+
+    To change devices in a plugin update, such as adding states to Devices.xml, append a migration.
+    Existing migrations must not be removed or reordered.
+    """
+
+    versionProp = "devVersCount"
+
+    def __init__(self, migrations):
+        self.logger = logging.getLogger("Plugin.ShellyMQTT")
+        self.migrations = migrations  # A list of functions that take a device and return the migrated device
+
+    def getCurrentVersion(self):
+        """
+        Getter for the schema version that devices are migrated to.
+
+        :return: The number of migrations.
+        """
+
+        return len(self.migrations)
+
+    def getVersion(self, device):
+        """
+        Getter for the schema version of a device.
+
+        :param device: The Indigo device.
+        :return: The version, 0 if the device has no valid version.
+        """
+
+        try:
+            return int(device.pluginProps.get(self.versionProp, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def needsMigration(self, device):
+        """
+        Helper method to determine if a device has migrations to run.
+
+        :param device: The Indigo device.
+        :return: True if the device is older than the current version.
+        """
+
+        return self.getVersion(device) < self.getCurrentVersion()
+
+    def migrate(self, device):
+        """
+        Runs the migrations that a device has not run yet and records its new version.
+
+        :param device: The Indigo device.
+        :return: The migrated device, or the same device if it was already up to date.
+        """
+
+        version = self.getVersion(device)
+        currentVersion = self.getCurrentVersion()
+        if version > currentVersion:
+            self.logger.error(u"%s: Unknown device version: %s", device.name, version)
+            return device
+
+        for migration in self.migrations[version:]:
+            device = migration(device)
+        if version < currentVersion:
+            props = device.pluginProps
+            props[self.versionProp] = currentVersion
+            device.replacePluginPropsOnServer(props)
+            self.logger.debug(u"%s: Updated from version %s to %s", device.name, version, currentVersion)
+        return device
@@ -0,0 +1,96 @@
+# coding=utf-8
+import importlib
+
+
+class DeviceRegistry:
+    """
+    Holds the model table of the plugin, which describes each device type:
+    {
+        <deviceTypeId>: {
+            "module": The module of the python class for the device,
+            "relations": The device types whose devices can be used as a template for the device,
+            "addons": The categories of addons that the device can host, i.e. "ds1820"
+        }
+    }
+
+    The module of a class is imported the first time its device type is used, since most installs
+    only use a few of the device types. Each class is named after its module, i.e.
+    "Devices.Plugs.Shelly_Plug" holds the class Shelly_Plug.
+
+    The lookups made by the menus are indexed when the registry is built, so they don't need to
+    search the table.
+    """
+
+    def __init__(self, models):
+        self.models = models  # {<deviceTypeId>: <model>}
+        self.classes = {}  # {<deviceTypeId>: <class>} of the device types that have been used
+
+        # {<deviceTypeId>: [<deviceTypeId>, ...]} of the devices that can be used as a template
+        self.relatedDeviceTypeIds = {}
+        # {<addon category>: [<deviceTypeId>, ...]} of the devices that can host the addon
+        self.addonHostDeviceTypeIds = {}
+        for deviceTypeId, model in sorted(models.items()):
+            self.relatedDeviceTypeIds[deviceTypeId] = list(model.get('relations', []))
+            for category in model.get('addons', []):
+                self.addonHostDeviceTypeIds.setdefault(category, []).append(deviceTypeId)
+
+    def __contains__(self, deviceTypeId):
+        return deviceTypeId in self.models
+
+    def get(self, deviceTypeId, default=None):
+        """
+        Getter for the class of a device type. The module of the class is imported on first use.
+
+        :param deviceTypeId: The device type, i.e. "shelly-plug".
+        :param default: The value to return for an unknown device type.
+        :return: The class for the device type.
+        """
+
+        deviceClass = self.classes.get(deviceTypeId, None)
+        if deviceClass is None:
+            model = self.models.get(deviceTypeId, None)
+            if model is None:
+                return default
+            moduleName = model['module']
+            module = importlib.import_module(moduleName)
+            deviceClass = getattr(module, moduleName.split('.')[-1])
+            self.classes[deviceTypeId] = deviceClass
+        return deviceClass
+
+    def getDeviceTypeIds(self):
+        """
+        Getter for the device types in the registry.
+
+        :return: A list of device types.
+        """
+
+        return list(self.models.keys())
+
+    def getLoadedDeviceTypeIds(self):
+        """
+        Getter for the device types whose class has been imported.
+
+        :return: A list of device types.
+        """
+
+        return list(self.classes.keys())
+
+    def getRelatedDeviceTypeIds(self, deviceTypeId):
+        """
+        Getter for the device types whose devices can be used as a template for a device type.
+
+        :param deviceTypeId: The device type.
+        :return: A list of device types.
+        """
+
+        return self.relatedDeviceTypeIds.get(deviceTypeId, [])
+
+    def getAddonHostDeviceTypeIds(self, category):
+        """
+        Getter for the device types that can host a category of addon.
+
+        :param category: The addon category, i.e. "ds1820", "dht22" or "detached-switch".
+        :return: A sorted list of device types.
+        """
+
+        return self.addonHostDeviceTypeIds.get(category, [])
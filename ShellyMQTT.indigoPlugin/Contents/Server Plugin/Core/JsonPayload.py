@@ -0,0 +1,37 @@
+# coding=utf-8
+import json
+
+
+class JsonPayload:
+    """
+    A message payload that is decoded from JSON at most once.
+
+    A message on a topic such as "ext_temperatures" is handled by the host device and by each of
+    its addons. The same JsonPayload is passed to all of them, so the payload is only decoded by the
+    first handler that needs it. The decoded value is shared and must not be modified by handlers.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.value = None
+        self.error = None
+        self.decoded = False
+
+    def getValue(self):
+        """
+        Getter for the decoded payload. The payload is decoded on the first call.
+
+        :return: The decoded payload.
+        :raises ValueError: If the payload is not valid JSON.
+        """
+
+        if not self.decoded:
+            try:
+                self.value = json.loads(self.payload)
+            except ValueError as error:
+                self.error = error
+            self.decoded = True
+
+        if self.error is not None:
+            raise self.error
+        return self.value
@@ -0,0 +1,144 @@
+# coding=utf-8
+import logging
+import threading
+from collections import deque
+
+
+class LogPipeline(logging.Handler):
+    """
+    A log handler that hands records to a background thread, which writes them through the
+    handlers of a target logger.
+
+    Device activity and error logging happen while messages are handled, so writing the records
+    through the Indigo log handler would slow down message processing. Records are queued instead,
+    and the queue is bounded so a flood of errors can't use up memory. Records that don't fit are
+    dropped without blocking, and a summary of how many were dropped is logged once there is room.
+    """
+
+    def __init__(self, target, capacity=1000):
+        logging.Handler.__init__(self)
+        self.target = target  # The logger whose handlers write the records
+        self.capacity = capacity  # The largest number of records that can wait to be written
+        self.records = deque()
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.logger = None  # The logger the pipeline is installed on
+
+        # Counters
+        self.suppressed = 0  # Records dropped since the last summary
+        self.totalSuppressed = 0  # Records dropped since the pipeline was created
+
+    def install(self, logger):
+        """
+        Routes the records of a logger through the pipeline and starts the writer thread.
+
+        :param logger: The logger to handle, i.e. "Plugin.ShellyMQTT".
+        :return: None
+        """
+
+        self.logger = logger
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="ShellyMQTT-log")
+        self.thread.daemon = True
+        self.thread.start()
+
+        logger.addHandler(self)
+        # The records are written through the target logger by the writer thread instead
+        logger.propagate = False
+
+    def stop(self, timeout=5):
+        """
+        Writes the records that are waiting, stops the writer thread and routes the records of
+        the logger back to its parent.
+
+        :param timeout: The number of seconds to wait for the writer thread to finish.
+        :return: None
+        """
+
+        if self.logger is not None:
+            self.logger.removeHandler(self)
+            self.logger.propagate = True
+            self.logger = None
+
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def emit(self, record):
+        """
+        Queues a record to be written. The record is dropped if the queue is full.
+
+        :param record: The LogRecord.
+        :return: None
+        """
+
+        with self.condition:
+            if len(self.records) >= self.capacity:
+                self.suppressed += 1
+                self.totalSuppressed += 1
+                return
+            self.records.append(record)
+            self.condition.notify()
+
+    def run(self):
+        """
+        The loop of the writer thread. Records are written until the pipeline is stopped and
+        there are no more records waiting.
+
+        :return: None
+        """
+
+        while True:
+            with self.condition:
+                while self.running and not self.records and not self.suppressed:
+                    self.condition.wait()
+                if not self.records and not self.suppressed:
+                    break
+
+                records = list(self.records)
+                self.records.clear()
+                suppressed = self.suppressed
+                self.suppressed = 0
+
+            for record in records:
+                self.write(record)
+            if suppressed:
+                self.write(self.makeSummaryRecord(suppressed))
+
+    def write(self, record):
+        """
+        Writes a record through the handlers of the target logger.
+
+        :param record: The LogRecord.
+        :return: None
+        """
+
+        try:
+            self.target.handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def makeSummaryRecord(self, suppressed):
+        """
+        Builds the record that reports the records which were dropped.
+
+        :param suppressed: The number of records that were dropped.
+        :return: A LogRecord.
+        """
+
+        name = self.logger.name if self.logger is not None else self.target.name
+        return logging.LogRecord(name, logging.WARNING, __file__, 0, u"%d log messages suppressed because too many were logged at once", (suppressed,), None)
+
+    def qsize(self):
+        """
+        Getter for the number of records waiting to be written.
+
+        :return: The number of records.
+        """
+
+        with self.condition:
+            return len(self.records)
@@ -0,0 +1,132 @@
+# coding=utf-8
+import threading
+from collections import OrderedDict
+
+
+class MessageQueue:
+    """
+    A queue of message notifications coming from the MQTT Connector.
+
+    The concurrent thread blocks on the queue until a notification arrives, so messages are
+    dispatched as soon as they are queued and the thread does not wake up while idle.
+
+    Notifications are coalesced by (brokerID, message_type). A single fetch loop on the broker
+    drains every message of that type, so additional notifications for a key that is already
+    pending would only result in empty fetchQueuedMessage calls.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = OrderedDict()
+        self.stopped = False
+        self.woken = False  # True when the waiting thread should wake up without a message
+
+        # Counters
+        self.queued = 0  # Notifications that resulted in a fetch
+        self.coalesced = 0  # Notifications that were merged into a pending one
+
+    @staticmethod
+    def getKey(message):
+        """
+        Builds the key used to coalesce a notification.
+
+        :param message: The notification from the MQTT Connector.
+        :return: A tuple of the form (brokerID, message_type).
+        """
+
+        return int(message['brokerID']), message['message_type']
+
+    def put(self, message):
+        """
+        Adds a message to the queue and wakes up the thread waiting on it.
+        The message is dropped if a message with the same key is already pending.
+
+        :param message: The message to queue.
+        :return: None
+        """
+
+        key = self.getKey(message)
+        with self.condition:
+            if key in self.pending:
+                self.coalesced += 1
+            else:
+                self.pending[key] = message
+                self.queued += 1
+            self.condition.notify()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until there is at least one message in the queue or the queue has been stopped.
+
+        :param timeout: The maximum number of seconds to wait, None to wait until a message is queued.
+        :return: True if there may be messages to process, False if the queue was stopped.
+        """
+
+        with self.condition:
+            if timeout is None:
+                while not self.pending and not self.stopped and not self.woken:
+                    # No timeout is used since a timed wait polls the lock in python 2
+                    self.condition.wait()
+            elif not self.pending and not self.stopped and not self.woken:
+                self.condition.wait(timeout)
+            self.woken = False
+            return not self.stopped
+
+    def wake(self):
+        """
+        Wakes up the thread waiting on the queue without queueing a message, i.e. when there is
+        other work for it to do.
+
+        :return: None
+        """
+
+        with self.condition:
+            self.woken = True
+            self.condition.notify()
+
+    def drain(self):
+        """
+        Removes and returns every message currently in the queue.
+
+        :return: A list of messages in the order their keys were first queued.
+        """
+
+        with self.condition:
+            messages = list(self.pending.values())
+            self.pending.clear()
+            return messages
+
+    def stop(self):
+        """
+        Stops the queue and wakes up any thread that is waiting on it.
+
+        :return: None
+        """
+
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def empty(self):
+        """
+        Helper to determine if there are no messages in the queue.
+
+        :return: True if the queue is empty.
+        """
+
+        with self.condition:
+            return len(self.pending) == 0
+
+    def getStatistics(self):
+        """
+        Getter for the queue counters.
+
+        :return: A dictionary of counter names and values.
+        """
+
+        with self.condition:
+            return {
+                'queued': self.queued,
+                'coalesced': self.coalesced,
+                'pending': len(self.pending)
+            }
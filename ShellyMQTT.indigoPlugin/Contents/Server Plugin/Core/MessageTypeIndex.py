@@ -0,0 +1,99 @@
+# coding=utf-8
+
+
+class MessageTypeIndex:
+    """
+    A reference counted set of the MQTT Connector message types that the plugin listens to.
+
+    Devices and triggers hold references to the message types they need. A message type stays
+    in the index until every holder has released it, and membership is a single dict lookup.
+    Holders are identified by a tuple of the form (kind, id), e.g. ("device", 123).
+    """
+
+    def __init__(self):
+        # {
+        #     <messageType>: {
+        #         <holder>: <count>
+        #     }
+        # }
+        self.references = {}
+
+    def __contains__(self, messageType):
+        return messageType in self.references
+
+    def add(self, messageType, holder):
+        """
+        Adds a reference to a message type.
+
+        :param messageType: The message type.
+        :param holder: The (kind, id) of the device or trigger that needs the message type.
+        :return: None
+        """
+
+        holders = self.references.setdefault(messageType, {})
+        holders[holder] = holders.get(holder, 0) + 1
+
+    def remove(self, messageType, holder):
+        """
+        Removes a reference to a message type. The message type is dropped from the index
+        when it has no references left.
+
+        :param messageType: The message type.
+        :param holder: The (kind, id) of the device or trigger that no longer needs the message type.
+        :return: True if a reference was removed, False if the holder did not hold the message type.
+        """
+
+        holders = self.references.get(messageType, {})
+        if holder not in holders:
+            return False
+
+        holders[holder] -= 1
+        if holders[holder] == 0:
+            del holders[holder]
+        if not holders:
+            del self.references[messageType]
+        return True
+
+    def removeHolder(self, holder):
+        """
+        Removes all references held by a device or trigger.
+
+        :param holder: The (kind, id) of the device or trigger.
+        :return: None
+        """
+
+        for messageType in list(self.references.keys()):
+            holders = self.references[messageType]
+            if holder in holders:
+                del holders[holder]
+                if not holders:
+                    del self.references[messageType]
+
+    def getCount(self, messageType):
+        """
+        Getter for the number of references to a message type.
+
+        :param messageType: The message type.
+        :return: The reference count.
+        """
+
+        return sum(self.references.get(messageType, {}).values())
+
+    def getHolders(self, messageType):
+        """
+        Getter for the devices and triggers that hold a message type.
+
+        :param messageType: The message type.
+        :return: A sorted list of (kind, id) tuples.
+        """
+
+        return sorted(self.references.get(messageType, {}).keys())
+
+    def getMessageTypes(self):
+        """
+        Getter for all message types in the index.
+
+        :return: A sorted list of message types.
+        """
+
+        return sorted(self.references.keys())
@@ -0,0 +1,68 @@
+# coding=utf-8
+import json
+import logging
+import os
+
+
+class StateSnapshot:
+    """
+    Keeps the in-memory state that is learned from the devices in a file so that it is available
+    right away after a restart, instead of once the devices have reported again.
+
+    The snapshot is written as compact json. It is written to a temporary file that then replaces
+    the snapshot, so a crash while writing never leaves a partial snapshot behind. A snapshot that
+    is missing, unreadable or from another version is ignored.
+    """
+
+    version = 1  # Increase when the layout of the state changes so that old snapshots are ignored
+
+    def __init__(self, path):
+        self.logger = logging.getLogger("Plugin.ShellyMQTT")
+        self.path = path  # The file the snapshot is kept in
+        self.written = None  # The json that was last written, to skip writes when nothing changed
+
+    def load(self):
+        """
+        Reads the snapshot.
+
+        :return: The state that was saved, or an empty dictionary if there is no usable snapshot.
+        """
+
+        try:
+            with open(self.path) as snapshotFile:
+                snapshot = json.load(snapshotFile)
+        except IOError:
+            # No snapshot has been written yet
+            return {}
+        except ValueError:
+            self.logger.warning(u"Ignoring the state snapshot at \"%s\" because it could not be read", self.path)
+            return {}
+
+        if not isinstance(snapshot, dict) or snapshot.get('version', None) != self.version:
+            self.logger.warning(u"Ignoring the state snapshot at \"%s\" because it is from another version", self.path)
+            return {}
+        return snapshot.get('state', {})
+
+    def save(self, state):
+        """
+        Writes the snapshot. Nothing is written if the state is the same as the last time.
+
+        :param state: A dictionary that can be serialized to json.
+        :return: True if the snapshot was written.
+        """
+
+        data = json.dumps({'version': self.version, 'state': state}, separators=(',', ':'), sort_keys=True)
+        if data == self.written:
+            return False
+
+        temporaryPath = "{}.tmp".format(self.path)
+        try:
+            with open(temporaryPath, "w") as snapshotFile:
+                snapshotFile.write(data)
+            os.rename(temporaryPath, self.path)
+        except (IOError, OSError) as error:
+            self.logger.error(u"Unable to write the state snapshot to \"%s\": %s", self.path, error)
+            return False
+
+        self.written = data
+        return True
@@ -0,0 +1,125 @@
+# coding=utf-8
+import threading
+import time
+from collections import OrderedDict
+
+
+class TelemetryCoalescer:
+    """
+    Holds telemetry messages for a short window and keeps only the newest payload of each topic.
+
+    Readings such as power, voltage and lux only matter for their latest value, so when messages
+    back up there is no need to apply every intermediate value. Messages are keyed by
+    (brokerId, topic). The window of a key starts when its first message is held and is not
+    extended by newer messages, so a topic that reports continuously is still flushed on time.
+
+    The deadline of a message is fixed when it is held. When the window is changed, every held
+    message is made due so that none of them is released out of order with the new window.
+    Messages are held by the concurrent thread while the window is changed from the Indigo thread.
+    """
+
+    def __init__(self, window=0):
+        self.window = window  # Seconds to hold a message, 0 to disable coalescing
+        self.pending = OrderedDict()  # {<key>: (<deadline>, <value>)} in the order the keys were first held
+        self.lock = threading.Lock()
+
+        # Counters
+        self.held = 0  # Messages that started a window
+        self.coalesced = 0  # Messages that replaced a held message
+
+    def isEnabled(self):
+        """
+        Helper method to determine if messages should be held.
+
+        :return: True if the window is longer than 0 seconds.
+        """
+
+        return self.window > 0
+
+    def setWindow(self, window):
+        """
+        Changes the window. The messages held under the old window are made due right away.
+
+        :param window: Seconds to hold a message, 0 to disable coalescing.
+        :return: True if the window changed and held messages are due.
+        """
+
+        with self.lock:
+            if window == self.window:
+                return False
+            self.window = window
+            for key, (_, value) in self.pending.items():
+                self.pending[key] = (0, value)
+            return bool(self.pending)
+
+    def put(self, key, value, now=None):
+        """
+        Holds a message. A message that is already held for the key is replaced.
+
+        :param key: A tuple of the form (brokerId, topic).
+        :param value: The message to hold.
+        :param now: The current time, defaults to time.time().
+        :return: None
+        """
+
+        with self.lock:
+            if key in self.pending:
+                deadline, _ = self.pending[key]
+                self.pending[key] = (deadline, value)
+                self.coalesced += 1
+            else:
+                now = time.time() if now is None else now
+                self.pending[key] = (now + self.window, value)
+                self.held += 1
+
+    def flush(self, now=None, force=False):
+        """
+        Removes and returns the messages whose window has passed.
+
+        :param now: The current time, defaults to time.time().
+        :param force: True to return every held message.
+        :return: A list of (key, value) tuples in the order the keys were first held.
+        """
+
+        now = time.time() if now is None else now
+        messages = []
+        with self.lock:
+            # Windows have the same length and are made due when it changes, so the keys are also in
+            # the order of their deadlines
+            while self.pending:
+                key, (deadline, value) = next(self.pending.iteritems())
+                if not force and deadline > now:
+                    break
+                del self.pending[key]
+                messages.append((key, value))
+        return messages
+
+    def getTimeout(self, now=None):
+        """
+        Getter for the time until the next held message should be flushed.
+
+        :param now: The current time, defaults to time.time().
+        :return: The number of seconds to wait, or None if no messages are held.
+        """
+
+        with self.lock:
+            if not self.pending:
+                return None
+
+            now = time.time() if now is None else now
+            deadline, _ = next(self.pending.itervalues())
+            return max(0, deadline - now)
+
+    def getStatistics(self):
+        """
+        Getter for the coalescer counters.
+
+        :return: A dictionary of counter names and values.
+        """
+
+        with self.lock:
+            return {
+                'held': self.held,
+                'coalesced': self.coalesced,
+                'pending': len(self.pending)
+            }
@@ -0,0 +1,158 @@
+# coding=utf-8
+import threading
+from collections import deque
+
+
+class TieredQueue:
+    """
+    A FIFO queue with a critical tier and a bulk tier.
+
+    Items in the critical tier, such as relay states and input events, are always taken before
+    items in the bulk tier, such as power and energy readings. Items keep their order within a tier.
+
+    Items can be queued under a key, such as the device they are for. Items with the same key are
+    always taken in the order they were queued: when a critical item is queued, the bulk items
+    waiting under its key are moved to the critical tier ahead of it. Critical items therefore only
+    skip ahead of the bulk items of other keys.
+
+    Items that are offered are kept within the capacity of the queue. When the queue is full the
+    oldest bulk item is dropped to make room, so telemetry is shed before control and input messages.
+    """
+
+    def __init__(self, capacity=0):
+        self.condition = threading.Condition()
+        self.critical = deque()  # (<key>, <item>) tuples
+        self.bulk = deque()  # (<key>, <item>) tuples
+        self.bulkKeys = {}  # {<key>: <count>} of the bulk items waiting under each key
+        self.capacity = capacity  # The largest number of items kept by offer, 0 for no limit
+
+        # Counters
+        self.droppedBulk = 0  # Bulk items that were dropped because the queue was full
+        self.droppedCritical = 0  # Critical items that were dropped because the queue only held critical items
+
+    def append(self, item, critical, key):
+        """
+        Adds an item to its tier. Must be called while holding the condition.
+
+        :param item: The item to queue.
+        :param critical: True to queue the item in the critical tier.
+        :param key: The key the item is queued under, None for an item without a key.
+        :return: None
+        """
+
+        if critical:
+            if self.bulkKeys.pop(key, 0):
+                # The waiting bulk items of the key are taken first to keep the key in order
+                bulk = deque()
+                for entry in self.bulk:
+                    (self.critical if entry[0] == key else bulk).append(entry)
+                self.bulk = bulk
+            self.critical.append((key, item))
+        else:
+            if key is not None:
+                self.bulkKeys[key] = self.bulkKeys.get(key, 0) + 1
+            self.bulk.append((key, item))
+        self.condition.notify()
+
+    def popBulk(self):
+        """
+        Removes and returns the oldest bulk item. Must be called while holding the condition.
+
+        :return: The oldest bulk item.
+        """
+
+        key, item = self.bulk.popleft()
+        if key is not None:
+            count = self.bulkKeys.pop(key) - 1
+            if count:
+                self.bulkKeys[key] = count
+        return item
+
+    def put(self, item, critical=False, key=None):
+        """
+        Adds an item to the queue and wakes up a thread waiting on it.
+
+        :param item: The item to queue.
+        :param critical: True to queue the item in the critical tier.
+        :param key: The key that keeps the item in order with other items, i.e. the device it is for.
+        :return: The number of items in the queue, including the new item.
+        """
+
+        with self.condition:
+            self.append(item, critical, key)
+            return len(self.critical) + len(self.bulk)
+
+    def offer(self, item, critical=False, key=None):
+        """
+        Adds an item to the queue without going over its capacity. When the queue is full, the oldest
+        bulk item is dropped to make room. If there are no bulk items, the new item is dropped.
+
+        :param item: The item to queue.
+        :param critical: True to queue the item in the critical tier.
+        :param key: The key that keeps the item in order with other items, i.e. the device it is for.
+        :return: The number of items in the queue after the item was offered.
+        """
+
+        with self.condition:
+            if self.capacity and len(self.critical) + len(self.bulk) >= self.capacity:
+                if self.bulk:
+                    self.popBulk()
+                    self.droppedBulk += 1
+                elif critical:
+                    self.droppedCritical += 1
+                    return len(self.critical)
+                else:
+                    self.droppedBulk += 1
+                    return len(self.critical)
+
+            self.append(item, critical, key)
+            return len(self.critical) + len(self.bulk)
+
+    def get(self):
+        """
+        Removes and returns the next item, blocking until there is one.
+
+        :return: The oldest critical item, or the oldest bulk item if there are no critical items.
+        """
+
+        with self.condition:
+            while not self.critical and not self.bulk:
+                # No timeout is used since a timed wait polls the lock in python 2
+                self.condition.wait()
+            if self.critical:
+                return self.critical.popleft()[1]
+            return self.popBulk()
+
+    def drain(self):
+        """
+        Removes and returns every item currently in the queue.
+
+        :return: A list of the critical items followed by the bulk items.
+        """
+
+        with self.condition:
+            items = [item for _, item in self.critical] + [item for _, item in self.bulk]
+            self.critical.clear()
+            self.bulk.clear()
+            self.bulkKeys.clear()
+            return items
+
+    def qsize(self):
+        """
+        Getter for the number of items in the queue.
+
+        :return: The number of items in both tiers.
+        """
+
+        with self.condition:
+            return len(self.critical) + len(self.bulk)
+
+    def getDropped(self):
+        """
+        Getter for the number of items that were dropped because the queue was full.
+
+        :return: A tuple of the form (bulk, critical).
+        """
+
+        with self.condition:
+            return self.droppedBulk, self.droppedCritical
@@ -0,0 +1,84 @@
+# coding=utf-8
+
+
+class TriggerIndex:
+    """
+    An index of the plugin triggers by event type and device.
+
+    Triggers are keyed by (pluginTypeId, deviceId) so the triggers for an event are found with a
+    single dict lookup instead of examining every trigger. Triggers that are not tied to a device,
+    such as "low-battery-any", have a deviceId of None.
+    """
+
+    def __init__(self):
+        # {
+        #     (<pluginTypeId>, <deviceId>): {
+        #         <triggerId>: <trigger>
+        #     }
+        # }
+        self.triggers = {}
+        self.keys = {}  # {<triggerId>: (<pluginTypeId>, <deviceId>)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def getKey(trigger):
+        """
+        Builds the key used to index a trigger. The device of an "-any" trigger is ignored, since
+        it may still have a device-id prop from before its type was changed.
+
+        :param trigger: The trigger.
+        :return: A tuple of the form (pluginTypeId, deviceId).
+        """
+
+        if trigger.pluginTypeId.endswith("-any"):
+            return trigger.pluginTypeId, None
+
+        try:
+            deviceId = int(trigger.pluginProps.get('device-id', None))
+        except (TypeError, ValueError):
+            deviceId = None
+        return trigger.pluginTypeId, deviceId
+
+    def add(self, trigger):
+        """
+        Adds a trigger to the index, replacing an older version of the same trigger.
+
+        :param trigger: The trigger.
+        :return: None
+        """
+
+        self.remove(trigger.id)
+        key = self.getKey(trigger)
+        self.triggers.setdefault(key, {})[trigger.id] = trigger
+        self.keys[trigger.id] = key
+
+    def remove(self, triggerId):
+        """
+        Removes a trigger from the index.
+
+        :param triggerId: The id of the trigger.
+        :return: True if the trigger was removed, False if it was not in the index.
+        """
+
+        key = self.keys.pop(triggerId, None)
+        if key is None:
+            return False
+
+        triggers = self.triggers[key]
+        del triggers[triggerId]
+        if not triggers:
+            del self.triggers[key]
+        return True
+
+    def get(self, pluginTypeId, deviceId=None):
+        """
+        Getter for the triggers of an event.
+
+        :param pluginTypeId: The type of the trigger, i.e. "input-event-s".
+        :param deviceId: The id of the device the trigger watches, None for triggers that are not tied to a device.
+        :return: A list of triggers.
+        """
+
+        return list(self.triggers.get((pluginTypeId, deviceId), {}).values())
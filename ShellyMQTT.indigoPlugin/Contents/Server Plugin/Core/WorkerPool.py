@@ -0,0 +1,127 @@
+# coding=utf-8
+import logging
+import threading
+from TieredQueue import TieredQueue
+
+
+class WorkerPool:
+    """
+    A pool of threads that handle messages for devices.
+
+    Work is sharded by a key, the Indigo device id, so every message for a device is handled
+    in order by the same thread while messages for different devices are handled in parallel.
+    A slow round-trip to the Indigo server for one device only holds up the devices in its shard.
+    Critical work is handled before the bulk work of other keys waiting on the same shard, while the
+    work of a key is never reordered. Each shard holds at most capacity work items, dropping bulk
+    work first when the workers fall behind.
+    """
+
+    def __init__(self, workers, capacity=0):
+        self.logger = logging.getLogger("Plugin.ShellyMQTT")
+        self.capacity = capacity
+        self.shards = [TieredQueue(capacity) for _ in range(workers)]
+
+        # Counters per shard
+        self.processed = [0] * workers  # Work items that have been handled
+        self.maxDepth = [0] * workers  # The largest number of work items that were waiting
+
+        self.threads = []
+        for shard in range(workers):
+            thread = threading.Thread(target=self.run, args=(shard,), name="ShellyMQTT-worker-{}".format(shard))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def getShard(self, key):
+        """
+        Helper method to determine the shard that handles a key.
+
+        :param key: The key of the work, i.e. the device id.
+        :return: The index of the shard.
+        """
+
+        return hash(key) % len(self.shards)
+
+    def submit(self, key, critical, function, *args):
+        """
+        Queues work on the shard of the key. The oldest bulk work is dropped if the shard is full.
+
+        :param key: The key of the work, i.e. the device id.
+        :param critical: True if the work should be handled ahead of the bulk work of other keys.
+        :param function: The function to call.
+        :param args: The arguments to call the function with.
+        :return: None
+        """
+
+        shard = self.getShard(key)
+        depth = self.shards[shard].offer((function, args), critical, key)
+        self.maxDepth[shard] = max(self.maxDepth[shard], depth)
+
+    def run(self, shard):
+        """
+        The loop of a worker thread. Work is handled until the pool is stopped.
+
+        :param shard: The index of the shard that this thread handles.
+        :return: None
+        """
+
+        queue = self.shards[shard]
+        while True:
+            work = queue.get()
+            if work is None:
+                break
+
+            function, args = work
+            try:
+                function(*args)
+            except Exception:
+                self.logger.exception(u"Error while handling a message on worker {}".format(shard))
+            self.processed[shard] += 1
+
+    def stop(self, timeout=5):
+        """
+        Stops the worker threads once the work that is already queued has been handled.
+
+        :param timeout: The number of seconds to wait for each thread to finish.
+        :return: None
+        """
+
+        for queue in self.shards:
+            queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def getSize(self):
+        """
+        Getter for the number of worker threads.
+
+        :return: The number of workers.
+        """
+
+        return len(self.shards)
+
+    def getStatistics(self):
+        """
+        Getter for the counters of each shard.
+
+        :return: A list with a dictionary of counter names and values for each shard.
+        """
+
+        return [
+            {
+                'depth': self.shards[shard].qsize(),
+                'max-depth': self.maxDepth[shard],
+                'processed': self.processed[shard],
+                'dropped': sum(self.shards[shard].getDropped())
+            } for shard in range(len(self.shards))
+        ]
+
+    def getDropped(self):
+        """
+        Getter for the work that was dropped because a shard was full.
+
+        :return: A tuple of the form (bulk, critical) with the totals of all shards.
+        """
+
+        dropped = [queue.getDropped() for queue in self.shards]
+        return sum(bulk for bulk, _ in dropped), sum(critical for _, critical in dropped)
@@ -22,16 +22,14 @@ class Shelly_Addon(Shelly):
 
         pass
 
-    def handleMessage(self, topic, payload):
+    def getCriticalTopics(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Getter for the topics that carry control and input messages.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
-        :return: None
+        :return: A list of topics.
         """
 
-        Shelly.handleMessage(self, topic, payload)
+        return []
 
     def handleAction(self, action):
         """
@@ -44,77 +42,79 @@ class Shelly_Addon(Shelly):
         if action.deviceAction == indigo.kDeviceAction.RequestStatus:
             self.getHostDevice().sendStatusRequestCommand()
 
-    def getHostDevice(self):
+    def getHostId(self):
         """
-        Getter for the host device.
+        Getter for the Indigo device id of the host device.
 
-        :return: The Shelly object that the sensor is attached to.
+        :return: The id of the host device, or None if no host is selected.
         """
 
         dev = self.device.pluginProps.get('host-id', None)
         if dev:
-            return indigo.activePlugin.shellyDevices.get(int(dev), None)
+            return int(dev)
+        return None
 
-    def getBrokerId(self):
+    def getHostDevice(self):
         """
-        Getter for the broker id.
+        Getter for the host device.
 
-        :return: The broker id of the host device.
+        :return: The Shelly object that the sensor is attached to.
         """
 
-        if self.getHostDevice():
-            return self.getHostDevice().getBrokerId()
-        else:
-            return None
+        hostId = self.getHostId()
+        if hostId is not None:
+            return indigo.activePlugin.shellyDevices.get(hostId, None)
 
-    def getAddress(self):
+    def getConfig(self):
         """
-        Getter for the address.
+        Getter for the values derived from the plugin props of the device and its host.
+        Nothing is cached until the host device has started.
 
-        :return: The address of the host device.
+        :return: A dictionary with the address, channel, broker-id, message-type, announce-message-type and message-types.
         """
 
-        if self.getHostDevice():
-            return self.getHostDevice().getAddress()
-        else:
-            return None
+        if self.config is None and self.getHostDevice() is None:
+            return self.buildConfig()
+        return Shelly.getConfig(self)
 
-    def getIpAddress(self):
+    def buildConfig(self):
         """
-        Helper function to get the ip address of the device.
+        Computes the values derived from the plugin props of the device. The address, broker and
+        message type come from the host device.
 
-        :return: The device ip address
+        :return: A dictionary with the address, channel, broker-id, message-type, announce-message-type and message-types.
         """
 
-        if self.getHostDevice():
-            return self.getHostDevice().getIpAddress()
+        config = Shelly.buildConfig(self)
+        host = self.getHostDevice()
+        if host:
+            config.update({
+                'address': host.getAddress(),
+                'broker-id': host.getBrokerId(),
+                'message-type': host.getMessageType(),
+                'message-types': [host.getMessageType()]
+            })
         else:
-            return None
+            config.update({
+                'address': None,
+                'broker-id': None,
+                'message-type': None,
+                'message-types': []
+            })
+        return config
 
-    def getMessageType(self):
+    def getIpAddress(self):
         """
-        Getter for the message type.
+        Helper function to get the ip address of the device.
 
-        :return: The message type of the host device.
+        :return: The device ip address
         """
 
         if self.getHostDevice():
-            return self.getHostDevice().getMessageType()
+            return self.getHostDevice().getIpAddress()
         else:
             return None
 
-    def getMessageTypes(self):
-        """
-        Getter for the message types.
-
-        :return: A list of message type being listened to.
-        """
-
-        if self.getHostDevice():
-            return [self.getHostDevice().getMessageType()]
-        else:
-            return []
-
     def isAddon(self):
         """
         Helper method to determine if a device is an addon device. This defaults to false since most devices
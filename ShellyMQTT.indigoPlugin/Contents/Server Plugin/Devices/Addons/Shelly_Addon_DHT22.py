@@ -1,6 +1,5 @@
 # coding=utf-8
 import indigo
-import json
 from Shelly_Addon import Shelly_Addon
 
 
@@ -32,66 +31,134 @@ class Shelly_Addon_DHT22(Shelly_Addon):
                 "{}/ext_humidities".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+        Add-ons only handle their own topics, the rest belong to the host device.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        probe = self.getProbeNumber()
+        handlers = {
+            "{}/online".format(address): self.processOnline,
+            "{}/ext_temperature/{}".format(address, probe): self.processExtTemperature,
+            "{}/ext_humidity/{}".format(address, probe): self.processExtHumidity
+        }
+        if probe and len(probe) > 1:
+            handlers.update({
+                "{}/ext_temperatures".format(address): self.processExtTemperatures,
+                "{}/ext_humidities".format(address): self.processExtHumidities
+            })
+        return handlers
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly_Addon.getTelemetryTopics(self) + [
+            "{}/ext_temperature/{}".format(address, self.getProbeNumber()),
+            "{}/ext_humidity/{}".format(address, self.getProbeNumber())
+        ]
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: THe payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/ext_temperature/{}".format(self.getAddress(), self.getProbeNumber()):
-            # For some reason, the shelly reports the temperature with a preceding colon...
-            temperature = payload
-            try:
-                self.setTemperature(float(temperature))
-            except ValueError:
-                self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
-        elif topic == "{}/ext_humidity/{}".format(self.getAddress(), self.getProbeNumber()):
-            decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
-            offset = 0
-            try:
-                offset = float(self.device.pluginProps.get('humidity-offset', 0))
-            except ValueError:
-                self.logger.error(u"Unable to convert offset of \"{}\" into a float!".format(self.device.pluginProps.get('humidity-offset', 0)))
+        with self.stateUpdates():
+            Shelly_Addon.handleMessage(self, topic, payload, parsed)
 
-            try:
-                humidity = float(payload) + offset
-                self.device.updateStateOnServer(key="humidity", value=humidity, uiValue='{:.{}f}%'.format(humidity, decimals), decimalPlaces=decimals)
-            except ValueError:
-                self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
-        elif topic == "{}/ext_temperatures".format(self.getAddress()) and len(self.getProbeNumber()) > 1:
-            try:
-                data = json.loads(payload)
-                for sensor in data.values():
-                    if sensor['hwID'] == self.getProbeNumber():
-                        value = sensor['tC']
-                        self.handleMessage("{}/ext_temperature/{}".format(self.getAddress(), self.getProbeNumber()), value)
-                        break
-            except ValueError:
-                self.logger.warn("Unable to convert payload to json: {}".format(payload))
-        elif topic == "{}/ext_humidities".format(self.getAddress()) and len(self.getProbeNumber()) > 1:
-            try:
-                data = json.loads(payload)
-                for sensor in data.values():
-                    if sensor['hwID'] == self.getProbeNumber():
-                        value = sensor['hum']
-                        self.handleMessage("{}/ext_humidity/{}".format(self.getAddress(), self.getProbeNumber()), value)
-                        break
-            except ValueError:
-                self.logger.warn("Unable to convert payload to json: {}".format(payload))
-        elif topic == "{}/online".format(self.getAddress()):
-            Shelly_Addon.handleMessage(self, topic, payload)
-
-        # Set the display state after data changed
-        temp = self.device.states['temperature']
-        temp_decimals = int(self.device.pluginProps.get('temp-decimals', 1))
-        temp_units = self.device.pluginProps.get('temp-units', 'F')[-1]
-        humidity = self.device.states['humidity']
-        humidity_decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
-        self.device.updateStateOnServer(key="status", value='{:.{}f}°{} / {:.{}f}%'.format(temp, temp_decimals, temp_units, humidity, humidity_decimals))
-        self.updateStateImage()
+            # Set the display state after data changed
+            temp = self.getState('temperature')
+            temp_decimals = int(self.device.pluginProps.get('temp-decimals', 1))
+            temp_units = self.device.pluginProps.get('temp-units', 'F')[-1]
+            humidity = self.getState('humidity')
+            humidity_decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
+            self.updateStateOnServer(key="status", value='{:.{}f}°{} / {:.{}f}%'.format(temp, temp_decimals, temp_units, humidity, humidity_decimals))
+            self.updateStateImage()
+
+    def processExtTemperature(self, payload):
+        """
+        Handles the temperature reported for the probe.
+
+        :param payload: The temperature.
+        :return: None
+        """
+
+        # For some reason, the shelly reports the temperature with a preceding colon...
+        temperature = payload
+        try:
+            self.setTemperature(float(temperature))
+        except ValueError:
+            self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
+
+    def processExtHumidity(self, payload):
+        """
+        Handles the humidity reported for the probe.
+
+        :param payload: The humidity in percent.
+        :return: None
+        """
+
+        decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
+        offset = 0
+        try:
+            offset = float(self.device.pluginProps.get('humidity-offset', 0))
+        except ValueError:
+            self.logger.error(u"Unable to convert offset of \"{}\" into a float!".format(self.device.pluginProps.get('humidity-offset', 0)))
+
+        try:
+            humidity = float(payload) + offset
+            self.updateStateOnServer(key="humidity", value=humidity, uiValue='{:.{}f}%'.format(humidity, decimals), decimalPlaces=decimals)
+        except ValueError:
+            self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
+
+    def processExtTemperatures(self, payload):
+        """
+        Handles the temperatures of all probes and looks up the probe by its hardware id.
+
+        :param payload: A json-formatted string containing sensor information.
+        :return: None
+        """
+
+        try:
+            data = self.loadJson(payload)
+            for sensor in data.values():
+                if sensor['hwID'] == self.getProbeNumber():
+                    value = sensor['tC']
+                    self.processExtTemperature(value)
+                    break
+        except ValueError:
+            self.logger.warn("Unable to convert payload to json: {}".format(payload))
+
+    def processExtHumidities(self, payload):
+        """
+        Handles the humidities of all probes and looks up the probe by its hardware id.
+
+        :param payload: A json-formatted string containing sensor information.
+        :return: None
+        """
+
+        try:
+            data = self.loadJson(payload)
+            for sensor in data.values():
+                if sensor['hwID'] == self.getProbeNumber():
+                    value = sensor['hum']
+                    self.processExtHumidity(value)
+                    break
+        except ValueError:
+            self.logger.warn("Unable to convert payload to json: {}".format(payload))
 
     def handleAction(self, action):
         """
@@ -119,10 +186,10 @@ class Shelly_Addon_DHT22(Shelly_Addon):
         :return:
         """
 
-        if self.device.states.get('online', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensorOn)
+        if self.getState('online', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
+            self.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
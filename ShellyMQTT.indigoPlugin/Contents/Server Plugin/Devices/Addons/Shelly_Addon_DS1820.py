@@ -1,6 +1,5 @@
 # coding=utf-8
 import indigo
-import json
 from Shelly_Addon import Shelly_Addon
 
 
@@ -30,42 +29,89 @@ class Shelly_Addon_DS1820(Shelly_Addon):
                 "{}/ext_temperatures".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+        Add-ons only handle their own topics, the rest belong to the host device.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        probe = self.getProbeNumber()
+        handlers = {
+            "{}/online".format(address): self.processOnline,
+            "{}/ext_temperature/{}".format(address, probe): self.processExtTemperature
+        }
+        # If the user selected a channel number (0-2), then the string version will have 1 character
+        # and the probe is not looked up by its hardware id
+        if probe and len(probe) > 1:
+            handlers["{}/ext_temperatures".format(address)] = self.processExtTemperatures
+        return handlers
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly_Addon.getTelemetryTopics(self) + [
+            "{}/ext_temperature/{}".format(address, self.getProbeNumber())
+        ]
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: THe payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/ext_temperature/{}".format(self.getAddress(), self.getProbeNumber()):
-            try:
-                temperature = float(payload)
-                self.setTemperature(temperature)
-            except ValueError:
-                self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
-        elif topic == "{}/ext_temperatures".format(self.getAddress()) and len(self.getProbeNumber()) > 1:
-            # If the user selected a channel number (0-2), then the string version will have 1 character
-            # and we will not get to this block
-            try:
-                data = json.loads(payload)
-                for sensor in data.values():
-                    if sensor['hwID'] == self.getProbeNumber():
-                        value = sensor['tC']
-                        self.handleMessage("{}/ext_temperature/{}".format(self.getAddress(), self.getProbeNumber()), value)
-                        break
-            except ValueError:
-                self.logger.warn("Unable to convert payload to json: {}".format(payload))
-        elif topic == "{}/online".format(self.getAddress()):
-            Shelly_Addon.handleMessage(self, topic, payload)
+        with self.stateUpdates():
+            Shelly_Addon.handleMessage(self, topic, payload, parsed)
+
+            # Update the display state after data changed
+            temp = self.getState('temperature')
+            temp_decimals = int(self.device.pluginProps.get('temp-decimals', 1))
+            temp_units = self.device.pluginProps.get('temp-units', 'F')[-1]
+            self.updateStateOnServer(key="status", value='{:.{}f}°{}'.format(temp, temp_decimals, temp_units))
+            self.updateStateImage()
+
+    def processExtTemperature(self, payload):
+        """
+        Handles the temperature reported for the probe.
+
+        :param payload: The temperature.
+        :return: None
+        """
+
+        try:
+            temperature = float(payload)
+            self.setTemperature(temperature)
+        except ValueError:
+            self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
+
+    def processExtTemperatures(self, payload):
+        """
+        Handles the temperatures of all probes and looks up the probe by its hardware id.
+
+        :param payload: A json-formatted string containing sensor information.
+        :return: None
+        """
 
-        # Update the display state after data changed
-        temp = self.device.states['temperature']
-        temp_decimals = int(self.device.pluginProps.get('temp-decimals', 1))
-        temp_units = self.device.pluginProps.get('temp-units', 'F')[-1]
-        self.device.updateStateOnServer(key="status", value='{:.{}f}°{}'.format(temp, temp_decimals, temp_units))
-        self.updateStateImage()
+        try:
+            data = self.loadJson(payload)
+            for sensor in data.values():
+                if sensor['hwID'] == self.getProbeNumber():
+                    value = sensor['tC']
+                    self.processExtTemperature(value)
+                    break
+        except ValueError:
+            self.logger.warn("Unable to convert payload to json: {}".format(payload))
 
     def handleAction(self, action):
         """
@@ -93,10 +139,10 @@ class Shelly_Addon_DS1820(Shelly_Addon):
         :return:
         """
 
-        if self.device.states.get('online', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensorOn)
+        if self.getState('online', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
+            self.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -28,28 +28,61 @@ class Shelly_Addon_Detached_Switch(Shelly_Addon):
                 "{}/input/{}".format(address, self.getChannel()),
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+        Add-ons only handle their own topics, the rest belong to the host device.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        return {
+            "{}/online".format(address): self.processOnline,
+            "{}/input/{}".format(address, self.getChannel()): self.processInput
+        }
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        return [
+            "{}/input/{}".format(self.getAddress(), self.getChannel())
+        ]
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: THe payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/input/{}".format(self.getAddress(), self.getChannel()):
-            # For some reason, the shelly reports the temperature with a preceding colon...
-            invert = self.device.pluginProps.get("invert", False)
-            state = (payload == '0') if invert else (payload == '1')
-            if self.device.states['onOffState'] != state:
-                self.logCommandReceived("{}".format("on" if state else "off"))
-            self.device.updateStateOnServer(key="onOffState", value=state)
-        elif topic == "{}/online".format(self.getAddress()):
-            Shelly_Addon.handleMessage(self, topic, payload)
+        with self.stateUpdates():
+            Shelly_Addon.handleMessage(self, topic, payload, parsed)
+
+            # Update the display state after data changed
+            # self.updateStateOnServer(key="status", value='{}'.format("on" if self.getState("sw-input", False) else "off"))
+            self.updateStateImage()
+
+    def processInput(self, payload):
+        """
+        Handles the state of the switch input.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
 
-        # Update the display state after data changed
-        # self.device.updateStateOnServer(key="status", value='{}'.format("on" if self.device.states.get("sw-input", False) else "off"))
-        self.updateStateImage()
+        invert = self.device.pluginProps.get("invert", False)
+        state = (payload == '0') if invert else (payload == '1')
+        if self.getState('onOffState') != state:
+            self.logCommandReceived("{}".format("on" if state else "off"))
+        self.updateStateOnServer(key="onOffState", value=state)
 
     def handleAction(self, action):
         """
@@ -68,10 +101,10 @@ class Shelly_Addon_Detached_Switch(Shelly_Addon):
         :return: None
         """
 
-        if self.device.states.get('onOffState', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+        if self.getState('onOffState', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
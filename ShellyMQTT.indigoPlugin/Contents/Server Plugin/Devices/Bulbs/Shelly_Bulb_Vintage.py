@@ -31,41 +31,37 @@ class Shelly_Bulb_Vintage(Shelly_Dimmer_SL):
                 "{}/light/{}/energy".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def processLightStatus(self, payload):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Handles the status of the bulb.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :param payload: A json-formatted string containing the bulb status.
         :return: None
         """
 
-        if topic == "{}/light/{}/status".format(self.getAddress(), self.getChannel()):
-            # the payload will be json in the form:
-            # {
-            #     "ison": false,        /* whether the bulb is on */
-            #     "has_timer": false,   /* whether a timer is currently armed */
-            #     "timer_remaining": 0, /* if there is an active timer, shows seconds until timer elapses; 0 otherwise */
-            #     "brightness": 90      /* brightness, 0..100 */
-            # }
-            try:
-                payload = json.loads(payload)
-                if payload['ison']:
-                    # we will accept a brightness value and save it
-                    if self.device.states['brightnessLevel'] != payload['brightness']:
-                        # self.logger.info(u"\"{}\" brightness set to {}%".format(self.device.name, payload['brightness']))
-                        self.logCommandReceived(u"brightness to {}%".format(payload['brightness']))
-                    self.device.updateStateOnServer("brightnessLevel", payload['brightness'])
-                    self.turnOn()
-                else:
-                    # The light should be off regardless of a reported brightness value
-                    if not self.isOff():
-                        self.logCommandReceived("off")
-                    self.turnOff()
-            except ValueError:
-                self.logger.error(u"Problem parsing JSON: {}".format(payload))
-        else:
-            Shelly_Dimmer_SL.handleMessage(self, topic, payload)
+        # the payload will be json in the form:
+        # {
+        #     "ison": false,        /* whether the bulb is on */
+        #     "has_timer": false,   /* whether a timer is currently armed */
+        #     "timer_remaining": 0, /* if there is an active timer, shows seconds until timer elapses; 0 otherwise */
+        #     "brightness": 90      /* brightness, 0..100 */
+        # }
+        try:
+            payload = self.loadJson(payload)
+            if payload['ison']:
+                # we will accept a brightness value and save it
+                if self.getState('brightnessLevel') != payload['brightness']:
+                    # self.logger.info(u"\"{}\" brightness set to {}%".format(self.device.name, payload['brightness']))
+                    self.logCommandReceived(u"brightness to {}%".format(payload['brightness']))
+                self.updateStateOnServer("brightnessLevel", payload['brightness'])
+                self.turnOn()
+            else:
+                # The light should be off regardless of a reported brightness value
+                if not self.isOff():
+                    self.logCommandReceived("off")
+                self.turnOff()
+        except ValueError:
+            self.logger.error(u"Problem parsing JSON: {}".format(payload))
 
     def handleAction(self, action):
         """
@@ -84,7 +80,7 @@ class Shelly_Bulb_Vintage(Shelly_Dimmer_SL):
         :return: None
         """
 
-        brightness = self.device.states.get('brightnessLevel', 0)
+        brightness = self.getState('brightnessLevel', 0)
         turn = "on" if brightness >= 1 else "off"
 
         # Ensure brightness is within the 8-bit range
@@ -0,0 +1,211 @@
+# coding=utf-8
+import json
+import logging
+
+
+class PhysicalDevice:
+    """
+    A physical Shelly unit that is shared by the Indigo devices of its channels.
+
+    Models such as the 2.5, 4 Pro, i3, 3EM, EM and Uni are represented by an Indigo device for
+    each channel, while the unit reports its online status, temperatures and announcements once.
+    These shared topics are handled here once for the unit and the result is passed to each channel.
+    The unit also keeps the details of its latest announcement, such as the ip address and firmware.
+    """
+
+    # The topics, relative to the device address, that report on the unit instead of a channel
+    sharedTopics = ["online", "temperature", "overtemperature", "temperature_status", "ext_temperatures", "ext_humidities"]
+
+    def __init__(self, brokerId, address):
+        self.logger = logging.getLogger("Plugin.ShellyMQTT")
+        self.brokerId = brokerId
+        self.address = address
+        self.channels = {}  # {<deviceId>: <Shelly object>}
+        self.details = {}  # The latest announcement: {id, mac, ip, fw_ver, new_fw}
+        self.topics = set("{}/{}".format(address, topic) for topic in self.sharedTopics)
+
+    def __len__(self):
+        return len(self.channels)
+
+    @staticmethod
+    def getKey(shelly):
+        """
+        Builds the key of the physical unit that a device is a channel of.
+
+        :param shelly: The Shelly device.
+        :return: A tuple of the form (brokerId, address).
+        """
+
+        return shelly.getBrokerId(), shelly.getAddress()
+
+    def getDispatchKey(self):
+        """
+        Getter for the key that messages for the unit are handled under. The channels use the same
+        key so that the messages of a unit and its channels are handled in order.
+
+        :return: A tuple of the form (brokerId, address).
+        """
+
+        return self.brokerId, self.address
+
+    def attach(self, shelly):
+        """
+        Adds a channel device to the unit.
+
+        :param shelly: The Shelly device.
+        :return: None
+        """
+
+        self.channels[shelly.device.id] = shelly
+        shelly.physicalDevice = self
+
+    def detach(self, shelly):
+        """
+        Removes a channel device from the unit.
+
+        :param shelly: The Shelly device.
+        :return: The number of channels that are left.
+        """
+
+        if self.channels.pop(shelly.device.id, None) is not None:
+            shelly.physicalDevice = None
+        return len(self.channels)
+
+    def getChannels(self):
+        """
+        Getter for the channel devices of the unit.
+
+        :return: A list of Shelly devices, ordered by device id.
+        """
+
+        return [self.channels[deviceId] for deviceId in sorted(self.channels)]
+
+    def isSharedTopic(self, topic):
+        """
+        Helper method to determine if a message reports on the unit instead of a channel.
+
+        :param topic: The topic of the incoming message.
+        :return: True if the topic is shared by the channels.
+        """
+
+        return topic in self.topics
+
+    def handleMessage(self, topic, payload, channels=None, parsed=None):
+        """
+        Handles a shared message once for the unit and passes the result to its channels.
+
+        :param topic: The topic of the incoming message.
+        :param payload: The content of the message.
+        :param channels: The channel devices that need the message, defaults to all channels.
+        :param parsed: An optional JsonPayload of the message.
+        :return: None
+        """
+
+        channels = self.getChannels() if channels is None else channels
+        if topic.endswith("/ext_temperatures") or topic.endswith("/ext_humidities"):
+            try:
+                sensors = json.loads(payload) if parsed is None else parsed.getValue()
+            except ValueError:
+                self.logger.error(u"Problem parsing JSON: {}".format(payload))
+                return
+
+            for shelly in channels:
+                with shelly.stateUpdates():
+                    if topic.endswith("/ext_temperatures"):
+                        shelly.applyTemperatureSensors(sensors)
+                    else:
+                        shelly.applyHumiditySensors(sensors)
+        elif topic.endswith("/temperature_status"):
+            abnormal = False
+            for shelly in channels:
+                with shelly.stateUpdates():
+                    abnormal = shelly.applyTemperatureStatus(payload) or abnormal
+
+            if abnormal and channels:
+                # The unit has a single temperature, so the triggers are only fired once
+                channels[0].executeTriggers("abnormal-temperature-status-any")
+        elif topic.endswith("/online"):
+            online = payload == "true"
+            for shelly in channels:
+                with shelly.stateUpdates():
+                    shelly.applyOnline(online)
+        elif topic.endswith("/temperature"):
+            try:
+                temperature = float(payload)
+            except ValueError:
+                self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
+                return
+
+            # Each channel applies its own units and offset
+            for shelly in self.getHandlingChannels(topic, channels):
+                with shelly.stateUpdates():
+                    shelly.applyInternalTemperature(temperature)
+        elif topic.endswith("/overtemperature"):
+            overtemperature = payload == '1'
+            for shelly in self.getHandlingChannels(topic, channels):
+                with shelly.stateUpdates():
+                    shelly.applyOvertemperature(overtemperature)
+
+    @staticmethod
+    def getHandlingChannels(topic, channels):
+        """
+        Getter for the channels that handle a topic, since the channels of a unit such as the EM
+        can be different device types.
+
+        :param topic: The topic of the incoming message.
+        :param channels: The channel devices that need the message.
+        :return: A list of the channel devices that have a handler for the topic.
+        """
+
+        return [shelly for shelly in channels if shelly.getTopicHandler(topic) is not None]
+
+    def applyAnnouncement(self, announcement, channels=None):
+        """
+        Keeps the details of an announcement that has already been parsed and passes it to the channels.
+
+        :param announcement: The announcement as a dictionary.
+        :param channels: The channel devices that need the announcement, defaults to all channels.
+        :return: None
+        """
+
+        self.details = announcement
+
+        channels = self.getChannels() if channels is None else channels
+        for shelly in channels:
+            shelly.applyAnnouncement(announcement)
+
+    def getIpAddress(self):
+        """
+        Getter for the ip address of the unit.
+
+        :return: The ip address, or None if the unit has not announced itself.
+        """
+
+        return self.details.get('ip', None)
+
+    def getFirmware(self):
+        """
+        Getter for the firmware of the unit.
+
+        :return: The firmware version, or None if the unit has not announced itself.
+        """
+
+        return self.details.get('fw_ver', None)
+
+    def updateAvailable(self):
+        """
+        Helper method to determine if there is a firmware update for the unit.
+
+        :return: True if the unit announced a newer firmware.
+        """
+
+        return self.details.get('new_fw', False)
+
+    def hasAnnounced(self):
+        """
+        Helper method to determine if the details of the unit are known.
+
+        :return: True if an announcement has been applied.
+        """
+
+        return bool(self.details)
@@ -31,16 +31,17 @@ class Shelly_Plug(Shelly_1PM):
                 "{}/relay/{}/energy".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: THe payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        Shelly_1PM.handleMessage(self, topic, payload)
+        Shelly_1PM.handleMessage(self, topic, payload, parsed)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
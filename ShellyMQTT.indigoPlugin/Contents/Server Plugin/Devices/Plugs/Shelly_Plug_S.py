@@ -33,16 +33,17 @@ class Shelly_Plug_S(Shelly_Plug):
                 "{}/overtemperature".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: THe payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        Shelly_Plug.handleMessage(self, topic, payload)
+        Shelly_Plug.handleMessage(self, topic, payload, parsed)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -29,75 +29,93 @@ class Shelly_RGBW2_Color(Shelly_1PM):
                 "{}/color/{}/status".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        handlers = Shelly_1PM.getTopicHandlers(self)
+        handlers["{}/color/{}/status".format(self.getAddress(), self.getChannel())] = self.processColorStatus
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        return Shelly_1PM.getCriticalTopics(self) + [
+            "{}/color/{}/status".format(self.getAddress(), self.getChannel())
+        ]
+
+    def processColorStatus(self, payload):
+        """
+        Handles the status of the color channels.
+
+        :param payload: A json-formatted string containing the channel status.
         :return: None
         """
 
-        if topic == "{}/color/{}/status".format(self.getAddress(), self.getChannel()):
-            # the payload will be json in the form
-            # {
-            #     "ison",            /* whether the output is ON or OFF */
-            #     "has_timer",       /* whether a timer is currently armed for this channel */
-            #     "timer_remaining", /* if there is an active timer, shows seconds until timer elapses; 0 otherwise */
-            #     "mode",            /* currently configured mode */
-            #     "red",             /* red brightness, 0..255 */
-            #     "green",           /* green brightness, 0..255 */
-            #     "blue",            /* blue brightness, 0..255 */
-            #     "white",           /* white brightness, 0..255 */
-            #     "gain",            /* gain for all channels, 0..100 */
-            #     "effect",          /* applied effect */
-            #     "power",           /* consumed power, W */
-            #     "overpower"        /* whether an overpower condition has occurred */
-            # }
-            try:
-                payload = json.loads(payload)
-                if payload.get("mode", "") != "color":
-                    self.logger.error(u"\"{}\" expects the device to be in mode \"color\", but is in mode \"{}\"".format(self.device.name, payload.get("mode", "")))
-                    return
-
-                if payload.get("ison", False):
-                    # we will accept a brightness value and save it
-                    if self.isOff():
-                        # self.logger.info(u"\"{}\" on to {}%".format(self.device.name, payload['gain']))
-                        self.logCommandReceived("brightness to {}%".format(payload['gain']))
-                    elif self.device.states['brightnessLevel'] != payload['gain']:
-                        # Brightness will change
-                        # self.logger.info(u"\"{}\" set to {}%".format(self.device.name, payload['gain']))
-                        self.logCommandReceived("brightness to {}%".format(payload['gain']))
-
-                    self.applyBrightness(payload['gain'])
-                else:
-                    # The light should be off regardless of a reported brightness value
-                    if not self.isOff():
-                        self.logCommandReceived("off")
-                    self.turnOff()
-
-                # Record the color data
-                self.device.updateStateOnServer("redLevel", payload.get("red", 0))
-                self.device.updateStateOnServer("greenLevel", payload.get("green", 0))
-                self.device.updateStateOnServer("blueLevel", payload.get("blue", 0))
-                self.device.updateStateOnServer("whiteLevel", payload.get("white", 0))
-
-                # Record the overpower status
-                overloaded = payload.get("overpower", False)
-                if not self.device.states['overpower'] and overloaded:
-                    self.logger.error(u"\"{}\" was overloaded!".format(self.device.name))
-                self.device.updateStateOnServer('overpower', overloaded)
-
-                # Record the current power
-                power = payload.get("power", None)
-                if power is not None:
-                    self.device.updateStateOnServer('curEnergyLevel', power, uiValue='{} W'.format(power))
-
-            except ValueError:
-                self.logger.error(u"Problem parsing JSON: {}".format(payload))
-        else:
-            Shelly_1PM.handleMessage(self, topic, payload)
+        # the payload will be json in the form
+        # {
+        #     "ison",            /* whether the output is ON or OFF */
+        #     "has_timer",       /* whether a timer is currently armed for this channel */
+        #     "timer_remaining", /* if there is an active timer, shows seconds until timer elapses; 0 otherwise */
+        #     "mode",            /* currently configured mode */
+        #     "red",             /* red brightness, 0..255 */
+        #     "green",           /* green brightness, 0..255 */
+        #     "blue",            /* blue brightness, 0..255 */
+        #     "white",           /* white brightness, 0..255 */
+        #     "gain",            /* gain for all channels, 0..100 */
+        #     "effect",          /* applied effect */
+        #     "power",           /* consumed power, W */
+        #     "overpower"        /* whether an overpower condition has occurred */
+        # }
+        try:
+            payload = self.loadJson(payload)
+            if payload.get("mode", "") != "color":
+                self.logger.error(u"\"{}\" expects the device to be in mode \"color\", but is in mode \"{}\"".format(self.device.name, payload.get("mode", "")))
+                return
+
+            if payload.get("ison", False):
+                # we will accept a brightness value and save it
+                if self.isOff():
+                    # self.logger.info(u"\"{}\" on to {}%".format(self.device.name, payload['gain']))
+                    self.logCommandReceived("brightness to {}%".format(payload['gain']))
+                elif self.getState('brightnessLevel') != payload['gain']:
+                    # Brightness will change
+                    # self.logger.info(u"\"{}\" set to {}%".format(self.device.name, payload['gain']))
+                    self.logCommandReceived("brightness to {}%".format(payload['gain']))
+
+                self.applyBrightness(payload['gain'])
+            else:
+                # The light should be off regardless of a reported brightness value
+                if not self.isOff():
+                    self.logCommandReceived("off")
+                self.turnOff()
+
+            # Record the color data
+            self.updateStateOnServer("redLevel", payload.get("red", 0))
+            self.updateStateOnServer("greenLevel", payload.get("green", 0))
+            self.updateStateOnServer("blueLevel", payload.get("blue", 0))
+            self.updateStateOnServer("whiteLevel", payload.get("white", 0))
+
+            # Record the overpower status
+            overloaded = payload.get("overpower", False)
+            if not self.getState('overpower') and overloaded:
+                self.logger.error(u"\"{}\" was overloaded!".format(self.device.name))
+            self.updateStateOnServer('overpower', overloaded)
+
+            # Record the current power
+            power = payload.get("power", None)
+            if power is not None:
+                self.updateStateOnServer('curEnergyLevel', power, uiValue='{} W'.format(power))
+
+        except ValueError:
+            self.logger.error(u"Problem parsing JSON: {}".format(payload))
 
     def handleAction(self, action):
         """
@@ -126,16 +144,17 @@ class Shelly_RGBW2_Color(Shelly_1PM):
             self.logCommandSent("off")
 
         if action.deviceAction == indigo.kDeviceAction.SetColorLevels:
+            # Indigo may have changed the levels shown in its UI, so they are always written
             if 'whiteLevel' in action.actionValue:
-                self.device.updateStateOnServer("whiteLevel", int(action.actionValue['whiteLevel']))
+                self.updateStateOnServer("whiteLevel", int(action.actionValue['whiteLevel']), force=True)
             if 'redLevel' in action.actionValue:
-                self.device.updateStateOnServer("redLevel", int(action.actionValue['redLevel']))
+                self.updateStateOnServer("redLevel", int(action.actionValue['redLevel']), force=True)
             if 'greenLevel' in action.actionValue:
-                self.device.updateStateOnServer("greenLevel", int(action.actionValue['greenLevel']))
+                self.updateStateOnServer("greenLevel", int(action.actionValue['greenLevel']), force=True)
             if 'blueLevel' in action.actionValue:
-                self.device.updateStateOnServer("blueLevel", int(action.actionValue['blueLevel']))
+                self.updateStateOnServer("blueLevel", int(action.actionValue['blueLevel']), force=True)
             self.set()
-            self.logCommandSent(u"color values RGBW to {}, {}, {}, {}".format(self.device.states['redLevel'], self.device.states['greenLevel'], self.device.states['blueLevel'], self.device.states['whiteLevel']))
+            self.logCommandSent(u"color values RGBW to {}, {}, {}, {}".format(self.getState('redLevel'), self.getState('greenLevel'), self.getState('blueLevel'), self.getState('whiteLevel')))
         elif action.deviceAction == indigo.kDeviceAction.TurnOn:
             on()
         elif action.deviceAction == indigo.kDeviceAction.TurnOff:
@@ -172,7 +191,7 @@ class Shelly_RGBW2_Color(Shelly_1PM):
         """
 
         if brightness > 0:
-            # if self.device.states['brightnessLevel'] != brightness:
+            # if self.getState('brightnessLevel') != brightness:
             #     if self.isOn():
             #         self.logger.info(u"\"{}\" set to {}%".format(self.device.name, brightness))
             #     else:
@@ -181,7 +200,7 @@ class Shelly_RGBW2_Color(Shelly_1PM):
         else:
             self.turnOff()
 
-        self.device.updateStateOnServer("brightnessLevel", brightness)
+        self.updateStateOnServer("brightnessLevel", brightness)
 
     def set(self):
         """
@@ -190,11 +209,11 @@ class Shelly_RGBW2_Color(Shelly_1PM):
         :return: None
         """
 
-        red = self.device.states.get('redLevel', 0)
-        green = self.device.states.get('greenLevel', 0)
-        blue = self.device.states.get('blueLevel', 0)
-        white = self.device.states.get('whiteLevel', 0)
-        brightness = self.device.states.get('brightnessLevel', 0)
+        red = self.getState('redLevel', 0)
+        green = self.getState('greenLevel', 0)
+        blue = self.getState('blueLevel', 0)
+        white = self.getState('whiteLevel', 0)
+        brightness = self.getState('brightnessLevel', 0)
         turn = "on" if brightness >= 1 else "off"
 
         # Ensure all values are in the 8-bit range
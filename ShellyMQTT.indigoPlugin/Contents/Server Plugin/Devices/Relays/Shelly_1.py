@@ -32,30 +32,72 @@ class Shelly_1(Shelly):
                 "{}/ext_humidities".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: The payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/relay/{}".format(address, self.getChannel()): self.processRelay,
+            "{}/input/{}".format(address, self.getChannel()): self.processInput,
+            "{}/longpush/{}".format(address, self.getChannel()): self.processLongPush
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly.getCriticalTopics(self) + [
+            "{}/relay/{}".format(address, self.getChannel()),
+            "{}/input/{}".format(address, self.getChannel()),
+            "{}/longpush/{}".format(address, self.getChannel())
+        ]
+
+    def processRelay(self, payload):
+        """
+        Handles the relay state reported by the device.
+
+        :param payload: Either "on" or "off".
         :return: None
         """
 
-        if topic == "{}/relay/{}".format(self.getAddress(), self.getChannel()):
-            if payload == "on":
-                if not self.isOn():
-                    self.logCommandReceived("on")
-                self.turnOn()
-            elif payload == "off":
-                if not self.isOff():
-                    self.logCommandReceived("off")
-                self.turnOff()
-        elif topic == "{}/input/{}".format(self.getAddress(), self.getChannel()):
-            self.device.updateStateOnServer(key="sw-input", value=(payload == '1'))
-        elif topic == "{}/longpush/{}".format(self.getAddress(), self.getChannel()):
-            self.device.updateStateOnServer(key="longpush", value=(payload == '1'))
-        else:
-            Shelly.handleMessage(self, topic, payload)
+        if payload == "on":
+            if not self.isOn():
+                self.logCommandReceived("on")
+            self.turnOn()
+        elif payload == "off":
+            if not self.isOff():
+                self.logCommandReceived("off")
+            self.turnOff()
+
+    def processInput(self, payload):
+        """
+        Handles the state of the switch input.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
+
+        self.updateStateOnServer(key="sw-input", value=(payload == '1'))
+
+    def processLongPush(self, payload):
+        """
+        Handles the long push state of the switch input.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
+
+        self.updateStateOnServer(key="longpush", value=(payload == '1'))
 
     def handleAction(self, action):
         """
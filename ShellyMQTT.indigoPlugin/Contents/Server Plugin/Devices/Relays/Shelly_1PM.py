@@ -39,50 +39,148 @@ class Shelly_1PM(Shelly_1):
                 "{}/temperature_status".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: The payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly_1.getTopicHandlers(self)
+        handlers.update({
+            "{}/relay/{}/power".format(address, self.getChannel()): self.processPower,
+            "{}/relay/{}/overpower_value".format(address, self.getChannel()): self.processOverpowerValue,
+            "{}/relay/{}/energy".format(address, self.getChannel()): self.processEnergy,
+            "{}/temperature".format(address): self.processInternalTemperature,
+            "{}/overtemperature".format(address): self.processOvertemperature
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        return Shelly_1.getCriticalTopics(self) + [
+            "{}/relay/{}/overpower_value".format(self.getAddress(), self.getChannel())
+        ]
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly_1.getTelemetryTopics(self) + [
+            "{}/relay/{}/power".format(address, self.getChannel()),
+            "{}/relay/{}/energy".format(address, self.getChannel()),
+            "{}/temperature".format(address)
+        ]
+
+    def processRelay(self, payload):
+        """
+        Handles the relay state reported by the device.
+
+        :param payload: Either "on", "off", or "overpower".
         :return: None
         """
 
-        if topic == "{}/relay/{}/power".format(self.getAddress(), self.getChannel()):
-            self.device.updateStateOnServer('curEnergyLevel', payload, uiValue='{} W'.format(payload))
-        elif topic == "{}/relay/{}/overpower_value".format(self.getAddress(), self.getChannel()):
-            self.device.updateStateOnServer('overpower-value', payload, uiValue='{} W'.format(payload))
-            # Fire all triggers watching for an overpower event
-            for trigger in indigo.activePlugin.triggers.values():
-                if trigger.pluginTypeId == "overpower-any":
-                    indigo.trigger.execute(trigger)
-                elif trigger.pluginTypeId == "overpower-device" and int(trigger.pluginProps['device-id']) == self.device.id:
-                    indigo.trigger.execute(trigger)
-        elif topic == "{}/relay/{}/energy".format(self.getAddress(), self.getChannel()):
-            try:
-                self.updateEnergy(int(payload))
-            except ValueError:
-                self.logger.error(u"Unable to convert value of \"{}\" into an int!".format(payload))
-        elif topic == "{}/temperature".format(self.getAddress()):
-            try:
-                self.setTemperature(float(payload), state='internal-temperature', unitsProps='int-temp-units')
-            except ValueError:
-                self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
-        elif topic == "{}/overtemperature".format(self.getAddress()):
-            self.device.updateStateOnServer('overtemperature', (payload == '1'))
-        elif topic == "{}/relay/{}".format(self.getAddress(), self.getChannel()):
-            # The 1PM will report overpower as well as on and off
-            # Pass the on/off messages to the Shelly 1 implementation.
-            overpower = (payload == 'overpower')
-            # Set overpower in any case since on/off should clear the overpower state
-            self.device.updateStateOnServer('overpower', (payload == 'overpower'))
-            if overpower:
-                indigo.device.turnOff(self.device.id)
-                self.logCommandReceived("off (overpower)")
-            else:
-                Shelly_1.handleMessage(self, topic, payload)
+        # The 1PM will report overpower as well as on and off
+        # Pass the on/off messages to the Shelly 1 implementation.
+        overpower = (payload == 'overpower')
+        # Set overpower in any case since on/off should clear the overpower state
+        self.updateStateOnServer('overpower', (payload == 'overpower'))
+        if overpower:
+            indigo.device.turnOff(self.device.id)
+            self.logCommandReceived("off (overpower)")
         else:
-            Shelly_1.handleMessage(self, topic, payload)
+            Shelly_1.processRelay(self, payload)
+
+    def processPower(self, payload):
+        """
+        Handles the current power usage reported by the device.
+
+        :param payload: The power in watts.
+        :return: None
+        """
+
+        self.updateStateOnServer('curEnergyLevel', payload, uiValue='{} W'.format(payload))
+
+    def processOverpowerValue(self, payload):
+        """
+        Handles the power value that caused an overpower event and fires the overpower triggers.
+
+        :param payload: The power in watts.
+        :return: None
+        """
+
+        self.updateStateOnServer('overpower-value', payload, uiValue='{} W'.format(payload))
+        # Fire all triggers watching for an overpower event
+        self.executeTriggers("overpower-any")
+        self.executeTriggers("overpower-device", self.device.id)
+
+    def processEnergy(self, payload):
+        """
+        Handles the energy counter reported by the device.
+
+        :param payload: The energy in watt-minutes.
+        :return: None
+        """
+
+        try:
+            self.updateEnergy(int(payload))
+        except ValueError:
+            self.logger.error(u"Unable to convert value of \"{}\" into an int!".format(payload))
+
+    def processInternalTemperature(self, payload):
+        """
+        Handles the internal temperature of the device.
+
+        :param payload: The temperature.
+        :return: None
+        """
+
+        try:
+            temperature = float(payload)
+        except ValueError:
+            self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
+            return
+        self.applyInternalTemperature(temperature)
+
+    def applyInternalTemperature(self, temperature):
+        """
+        Updates the internal temperature of the device from a message that has already been parsed.
+
+        :param temperature: The temperature.
+        :return: None
+        """
+
+        self.setTemperature(temperature, state='internal-temperature', unitsProps='int-temp-units')
+
+    def processOvertemperature(self, payload):
+        """
+        Handles the overtemperature flag of the device.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
+
+        self.applyOvertemperature(payload == '1')
+
+    def applyOvertemperature(self, overtemperature):
+        """
+        Updates the overtemperature flag of the device from a message that has already been parsed.
+
+        :param overtemperature: True if the device is too hot.
+        :return: None
+        """
+
+        self.updateStateOnServer('overtemperature', overtemperature)
 
     def handleAction(self, action):
         """
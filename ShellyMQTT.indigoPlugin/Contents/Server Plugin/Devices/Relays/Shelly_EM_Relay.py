@@ -27,25 +27,21 @@ class Shelly_EM_Relay(Shelly_1):
                 "{}/relay/{}".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def processRelay(self, payload):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Handles the relay state reported by the device.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :param payload: Either "on", "off", or "overpower".
         :return: None
         """
 
-        if topic == "{}/relay/{}".format(self.getAddress(), self.getChannel()):
-            # The relay will report overpower as well as on and off
-            # Pass the on/off messages to the Shelly 1 implementation.
-            overpower = (payload == 'overpower')
-            # Set overpower in any case since on/off should clear the overpower state
-            self.device.updateStateOnServer('overpower', (payload == 'overpower'))
-            if not overpower:
-                Shelly_1.handleMessage(self, topic, payload)
-        else:
-            Shelly_1.handleMessage(self, topic, payload)
+        # The relay will report overpower as well as on and off
+        # Pass the on/off messages to the Shelly 1 implementation.
+        overpower = (payload == 'overpower')
+        # Set overpower in any case since on/off should clear the overpower state
+        self.updateStateOnServer('overpower', (payload == 'overpower'))
+        if not overpower:
+            Shelly_1.processRelay(self, payload)
 
     def handleAction(self, action):
         """
@@ -1,5 +1,4 @@
 import indigo
-import json
 from Shelly_1 import Shelly_1
 
 
@@ -31,34 +30,49 @@ class Shelly_Uni_Relay(Shelly_1):
                 "{}/ext_humidities".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        handlers = Shelly_1.getTopicHandlers(self)
+        handlers["{}/info".format(self.getAddress())] = self.processInfo
+        return handlers
+
+    def processRelay(self, payload):
+        """
+        Handles the relay state reported by the device.
+
+        :param payload: Either "on", "off", or "overpower".
         :return: None
         """
 
-        if topic == "{}/relay/{}".format(self.getAddress(), self.getChannel()):
-            # The relay will report overpower as well as on and off
-            # Pass the on/off messages to the Shelly 1 implementation.
-            overpower = (payload == 'overpower')
-            # Set overpower in any case since on/off should clear the overpower state
-            self.device.updateStateOnServer('overpower', (payload == 'overpower'))
-            if not overpower:
-                Shelly_1.handleMessage(self, topic, payload)
-        elif topic == "{}/info".format(self.getAddress()):
-            try:
-                payload = json.loads(payload)
-                adcs = payload.get('adcs', [])
-                if len(adcs) > 0 and type(adcs[0]) is dict:
-                    voltage = adcs[0].get('voltage', None)
-                    self.device.updateStateOnServer(key="voltage", value=voltage)
-            except ValueError:
-                self.logger.error(u"Problem parsing JSON: {}".format(payload))
-        else:
-            Shelly_1.handleMessage(self, topic, payload)
+        # The relay will report overpower as well as on and off
+        # Pass the on/off messages to the Shelly 1 implementation.
+        overpower = (payload == 'overpower')
+        # Set overpower in any case since on/off should clear the overpower state
+        self.updateStateOnServer('overpower', (payload == 'overpower'))
+        if not overpower:
+            Shelly_1.processRelay(self, payload)
+
+    def processInfo(self, payload):
+        """
+        Handles the info message of the device, which contains the voltage of the ADC.
+
+        :param payload: A json-formatted string containing the device info.
+        :return: None
+        """
+
+        try:
+            payload = self.loadJson(payload)
+            adcs = payload.get('adcs', [])
+            if len(adcs) > 0 and type(adcs[0]) is dict:
+                voltage = adcs[0].get('voltage', None)
+                self.updateStateOnServer(key="voltage", value=voltage)
+        except ValueError:
+            self.logger.error(u"Problem parsing JSON: {}".format(payload))
 
     def handleAction(self, action):
         """
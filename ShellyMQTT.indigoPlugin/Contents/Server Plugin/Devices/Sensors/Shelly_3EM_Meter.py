@@ -38,29 +38,61 @@ class Shelly_3EM_Meter(Shelly_EM_Meter):
                 "{}/emeter/{}/total_returned".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly_EM_Meter.getTopicHandlers(self)
+        handlers.update({
+            "{}/emeter/{}/current".format(address, self.getChannel()): self.processCurrent,
+            "{}/emeter/{}/pf".format(address, self.getChannel()): self.processPowerFactor
+        })
+        return handlers
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly_EM_Meter.getTelemetryTopics(self) + [
+            "{}/emeter/{}/current".format(address, self.getChannel()),
+            "{}/emeter/{}/pf".format(address, self.getChannel())
+        ]
+
+    def processCurrent(self, payload):
+        """
+        Handles the RMS current.
+
+        :param payload: The current in amps.
         :return: None
         """
 
-        if topic == "{}/emeter/{}/current".format(self.getAddress(), self.getChannel()):
-            try:
-                current = float(payload)
-                self.device.updateStateOnServer('current', current, uiValue="{:.1f} A".format(current), decimalPlaces=1)
-            except ValueError:
-                self.logger.error(u"Unable to convert current of \"{}\" to a float!".format(payload))
-        if topic == "{}/emeter/{}/pf".format(self.getAddress(), self.getChannel()):
-            try:
-                pf = float(payload)
-                self.device.updateStateOnServer('power-factor', pf, uiValue="{:.1f}".format(pf), decimalPlaces=1)
-            except ValueError:
-                self.logger.error(u"Unable to convert power-factor of \"{}\" to a float!".format(payload))
-        else:
-            Shelly_EM_Meter.handleMessage(self, topic, payload)
+        try:
+            current = float(payload)
+            self.updateStateOnServer('current', current, uiValue="{:.1f} A".format(current), decimalPlaces=1)
+        except ValueError:
+            self.logger.error(u"Unable to convert current of \"{}\" to a float!".format(payload))
+
+    def processPowerFactor(self, payload):
+        """
+        Handles the power factor.
+
+        :param payload: The power factor.
+        :return: None
+        """
+
+        try:
+            pf = float(payload)
+            self.updateStateOnServer('power-factor', pf, uiValue="{:.1f}".format(pf), decimalPlaces=1)
+        except ValueError:
+            self.logger.error(u"Unable to convert power-factor of \"{}\" to a float!".format(payload))
 
     def handleAction(self, action):
         """
@@ -29,23 +29,46 @@ class Shelly_Button1(Shelly):
                 "{}/input_event/{}".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/sensor/battery".format(address): self.processBattery
+        })
+        return handlers
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: The payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/sensor/battery".format(self.getAddress()):
-            Shelly.updateBatteryLevel(self, payload)
-            self.device.updateStateOnServer(key="sensorValue", value=payload, uiValue='{}%'.format(payload))
-        else:
-            Shelly.handleMessage(self, topic, payload)
+        with self.stateUpdates():
+            Shelly.handleMessage(self, topic, payload, parsed)
+
+            # Update the display state after data changed
+            self.updateStateImage()
+
+    def processBattery(self, payload):
+        """
+        Handles the battery level.
+
+        :param payload: The battery level in percent.
+        :return: None
+        """
 
-        # Update the display state after data changed
-        self.updateStateImage()
+        Shelly.updateBatteryLevel(self, payload)
+        self.updateStateOnServer(key="sensorValue", value=payload, uiValue='{}%'.format(payload))
 
     def handleAction(self, action):
         """
@@ -66,12 +89,12 @@ class Shelly_Button1(Shelly):
         """
 
         """
-        if self.device.states.get('onOffState', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+        if self.getState('onOffState', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
         """
-        self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+        self.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
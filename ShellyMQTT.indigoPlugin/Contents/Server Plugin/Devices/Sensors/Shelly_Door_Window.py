@@ -33,38 +33,119 @@ class Shelly_Door_Window(Shelly):
                 "{}/sensor/battery".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/sensor/state".format(address): self.processState,
+            "{}/sensor/lux".format(address): self.processLux,
+            "{}/sensor/tilt".format(address): self.processTilt,
+            "{}/sensor/vibration".format(address): self.processVibration,
+            "{}/sensor/battery".format(address): self.processBattery,
+            "{}/sensor/temperature".format(address): self.processTemperature
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly.getCriticalTopics(self) + [
+            "{}/sensor/state".format(address),
+            "{}/sensor/vibration".format(address)
+        ]
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly.getTelemetryTopics(self) + [
+            "{}/sensor/lux".format(address),
+            "{}/sensor/temperature".format(address)
+        ]
+
+    def processState(self, payload):
+        """
+        Handles the open/close state of the sensor.
+
+        :param payload: Either "open" or "close".
         :return: None
         """
 
-        if topic == "{}/sensor/state".format(self.getAddress()):
-            newState = (payload == "close")
-            if self.device.states.get('onOffState', False) != newState:
-                # self.logger.info("\"{}\" {}".format(self.device.name, payload))
-                self.logCommandReceived(payload)
-            self.device.updateStateOnServer(key='onOffState', value=newState, uiValue=payload)
-            self.updateStateImage()
-        elif topic == "{}/sensor/lux".format(self.getAddress()):
-            self.device.updateStateOnServer(key="lux", value=payload)
-        elif topic == "{}/sensor/tilt".format(self.getAddress()):
-            self.device.updateStateOnServer(key="tilt", value=payload, uiValue="{}°".format(payload))
-        elif topic == "{}/sensor/vibration".format(self.getAddress()):
-            self.device.updateStateOnServer(key="vibration", value=(payload == "1"))
-        elif topic == "{}/sensor/battery".format(self.getAddress()):
-            Shelly.updateBatteryLevel(self, payload)
-        elif topic == "{}/sensor/temperature".format(self.getAddress()):
-            temperature = payload
-            try:
-                self.setTemperature(float(temperature))
-            except ValueError:
-                self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
-        else:
-            Shelly.handleMessage(self, topic, payload)
+        newState = (payload == "close")
+        if self.getState('onOffState', False) != newState:
+            # self.logger.info("\"{}\" {}".format(self.device.name, payload))
+            self.logCommandReceived(payload)
+        self.updateStateOnServer(key='onOffState', value=newState, uiValue=payload)
+        self.updateStateImage()
+
+    def processLux(self, payload):
+        """
+        Handles the light level.
+
+        :param payload: The light level in lux.
+        :return: None
+        """
+
+        self.updateStateOnServer(key="lux", value=payload)
+
+    def processTilt(self, payload):
+        """
+        Handles the tilt angle.
+
+        :param payload: The angle in degrees.
+        :return: None
+        """
+
+        self.updateStateOnServer(key="tilt", value=payload, uiValue="{}°".format(payload))
+
+    def processVibration(self, payload):
+        """
+        Handles the vibration flag.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
+
+        self.updateStateOnServer(key="vibration", value=(payload == "1"))
+
+    def processBattery(self, payload):
+        """
+        Handles the battery level.
+
+        :param payload: The battery level in percent.
+        :return: None
+        """
+
+        Shelly.updateBatteryLevel(self, payload)
+
+    def processTemperature(self, payload):
+        """
+        Handles the temperature.
+
+        :param payload: The temperature.
+        :return: None
+        """
+
+        temperature = payload
+        try:
+            self.setTemperature(float(temperature))
+        except ValueError:
+            self.logger.error(u"Unable to convert value of \"{}\" into a float!".format(payload))
 
     def handleAction(self, action):
         """
@@ -83,16 +164,16 @@ class Shelly_Door_Window(Shelly):
         :return: None
         """
 
-        if self.device.states.get('onOffState', False):
+        if self.getState('onOffState', False):
             if self.device.pluginProps['useCase'] == "door":
-                self.device.updateStateImageOnServer(indigo.kStateImageSel.DoorSensorClosed)
+                self.updateStateImageOnServer(indigo.kStateImageSel.DoorSensorClosed)
             elif self.device.pluginProps['useCase'] == "window":
-                self.device.updateStateImageOnServer(indigo.kStateImageSel.WindowSensorClosed)
+                self.updateStateImageOnServer(indigo.kStateImageSel.WindowSensorClosed)
         else:
             if self.device.pluginProps['useCase'] == "door":
-                self.device.updateStateImageOnServer(indigo.kStateImageSel.DoorSensorOpened)
+                self.updateStateImageOnServer(indigo.kStateImageSel.DoorSensorOpened)
             elif self.device.pluginProps['useCase'] == "window":
-                self.device.updateStateImageOnServer(indigo.kStateImageSel.WindowSensorOpened)
+                self.updateStateImageOnServer(indigo.kStateImageSel.WindowSensorOpened)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
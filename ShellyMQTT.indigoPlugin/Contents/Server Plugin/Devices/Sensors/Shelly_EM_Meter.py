@@ -36,60 +36,142 @@ class Shelly_EM_Meter(Shelly):
                 "{}/emeter/{}/total_returned".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/emeter/{}/energy".format(address, self.getChannel()): self.processEnergyConsumed,
+            "{}/emeter/{}/returned_energy".format(address, self.getChannel()): self.processEnergyReturned,
+            "{}/emeter/{}/power".format(address, self.getChannel()): self.processPower,
+            "{}/emeter/{}/reactive_power".format(address, self.getChannel()): self.processReactivePower,
+            "{}/emeter/{}/voltage".format(address, self.getChannel()): self.processVoltage,
+            "{}/emeter/{}/total".format(address, self.getChannel()): self.processTotalEnergy,
+            "{}/emeter/{}/total_returned".format(address, self.getChannel()): self.processTotalReturnedEnergy
+        })
+        return handlers
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly.getTelemetryTopics(self) + [
+            "{}/emeter/{}/energy".format(address, self.getChannel()),
+            "{}/emeter/{}/returned_energy".format(address, self.getChannel()),
+            "{}/emeter/{}/power".format(address, self.getChannel()),
+            "{}/emeter/{}/reactive_power".format(address, self.getChannel()),
+            "{}/emeter/{}/voltage".format(address, self.getChannel()),
+            "{}/emeter/{}/total".format(address, self.getChannel()),
+            "{}/emeter/{}/total_returned".format(address, self.getChannel())
+        ]
+
+    def processEnergyConsumed(self, payload):
+        """
+        Handles the energy consumed counter.
+
+        :param payload: The energy in watt-minutes.
         :return: None
         """
 
-        if topic == "{}/emeter/{}/energy".format(self.getAddress(), self.getChannel()):
-            try:
-                energy = int(payload)
-                self.updateEnergy(energy, offsetProp='resetEnergyConsumedOffset', energyState='energy-consumed')
-            except ValueError:
-                self.logger.error(u"Unable to convert energy-consumed of \"{}\" to an int!".format(payload))
-        elif topic == "{}/emeter/{}/returned_energy".format(self.getAddress(), self.getChannel()):
-            try:
-                energy = int(payload)
-                self.updateEnergy(energy, offsetProp='resetEnergyReturnedOffset', energyState='energy-returned')
-            except ValueError:
-                self.logger.error(u"Unable to convert energy-returned of \"{}\" to an int!".format(payload))
-        elif topic == "{}/emeter/{}/power".format(self.getAddress(), self.getChannel()):
-            try:
-                power = float(payload)
-                self.device.updateStateOnServer('power', power, uiValue="{:.2f} W".format(power), decimalPlaces=2)
-                self.device.updateStateOnServer('curEnergyLevel', power, uiValue='{:.2f} W'.format(power), decimalPlaces=2)
-            except ValueError:
-                self.logger.error(u"Unable to convert power of \"{}\" to a float!".format(payload))
-        elif topic == "{}/emeter/{}/reactive_power".format(self.getAddress(), self.getChannel()):
-            try:
-                reactivePower = float(payload)
-                self.device.updateStateOnServer('power-reactive', reactivePower, uiValue="{:.2f} W".format(reactivePower), decimalPlaces=2)
-            except ValueError:
-                self.logger.error(u"Unable to convert reactive-power of \"{}\" to a float!".format(payload))
-        elif topic == "{}/emeter/{}/voltage".format(self.getAddress(), self.getChannel()):
-            try:
-                voltage = float(payload)
-                self.device.updateStateOnServer('voltage', voltage, uiValue="{:.1f} V".format(voltage), decimalPlaces=1)
-            except ValueError:
-                self.logger.error(u"Unable to convert voltage of \"{}\" to a float!".format(payload))
-        elif topic == "{}/emeter/{}/total".format(self.getAddress(), self.getChannel()):
-            try:
-                energy = float(payload)
-                self.device.updateStateOnServer('total-energy', energy, uiValue="{:.1f} Wh".format(energy), decimalPlaces=1)
-            except ValueError:
-                self.logger.error(u"Unable to convert energy of \"{}\" to a float!".format(payload))
-        elif topic == "{}/emeter/{}/total_returned".format(self.getAddress(), self.getChannel()):
-            try:
-                returned_energy = float(payload)
-                self.device.updateStateOnServer('total-returned-energy', returned_energy, uiValue="{:.1f} Wh".format(returned_energy), decimalPlaces=1)
-            except ValueError:
-                self.logger.error(u"Unable to convert returned_energy of \"{}\" to a float!".format(payload))
-        else:
-            Shelly.handleMessage(self, topic, payload)
+        try:
+            energy = int(payload)
+            self.updateEnergy(energy, offsetProp='resetEnergyConsumedOffset', energyState='energy-consumed')
+        except ValueError:
+            self.logger.error(u"Unable to convert energy-consumed of \"{}\" to an int!".format(payload))
+
+    def processEnergyReturned(self, payload):
+        """
+        Handles the energy returned counter.
+
+        :param payload: The energy in watt-minutes.
+        :return: None
+        """
+
+        try:
+            energy = int(payload)
+            self.updateEnergy(energy, offsetProp='resetEnergyReturnedOffset', energyState='energy-returned')
+        except ValueError:
+            self.logger.error(u"Unable to convert energy-returned of \"{}\" to an int!".format(payload))
+
+    def processPower(self, payload):
+        """
+        Handles the instantaneous power.
+
+        :param payload: The power in watts.
+        :return: None
+        """
+
+        try:
+            power = float(payload)
+            self.updateStateOnServer('power', power, uiValue="{:.2f} W".format(power), decimalPlaces=2)
+            self.updateStateOnServer('curEnergyLevel', power, uiValue='{:.2f} W'.format(power), decimalPlaces=2)
+        except ValueError:
+            self.logger.error(u"Unable to convert power of \"{}\" to a float!".format(payload))
+
+    def processReactivePower(self, payload):
+        """
+        Handles the instantaneous reactive power.
+
+        :param payload: The reactive power in watts.
+        :return: None
+        """
+
+        try:
+            reactivePower = float(payload)
+            self.updateStateOnServer('power-reactive', reactivePower, uiValue="{:.2f} W".format(reactivePower), decimalPlaces=2)
+        except ValueError:
+            self.logger.error(u"Unable to convert reactive-power of \"{}\" to a float!".format(payload))
+
+    def processVoltage(self, payload):
+        """
+        Handles the RMS voltage.
+
+        :param payload: The voltage in volts.
+        :return: None
+        """
+
+        try:
+            voltage = float(payload)
+            self.updateStateOnServer('voltage', voltage, uiValue="{:.1f} V".format(voltage), decimalPlaces=1)
+        except ValueError:
+            self.logger.error(u"Unable to convert voltage of \"{}\" to a float!".format(payload))
+
+    def processTotalEnergy(self, payload):
+        """
+        Handles the total energy consumed.
+
+        :param payload: The energy in watt-hours.
+        :return: None
+        """
+
+        try:
+            energy = float(payload)
+            self.updateStateOnServer('total-energy', energy, uiValue="{:.1f} Wh".format(energy), decimalPlaces=1)
+        except ValueError:
+            self.logger.error(u"Unable to convert energy of \"{}\" to a float!".format(payload))
+
+    def processTotalReturnedEnergy(self, payload):
+        """
+        Handles the total energy returned.
+
+        :param payload: The energy in watt-hours.
+        :return: None
+        """
+
+        try:
+            returned_energy = float(payload)
+            self.updateStateOnServer('total-returned-energy', returned_energy, uiValue="{:.1f} Wh".format(returned_energy), decimalPlaces=1)
+        except ValueError:
+            self.logger.error(u"Unable to convert returned_energy of \"{}\" to a float!".format(payload))
 
     def handleAction(self, action):
         """
@@ -104,7 +186,7 @@ class Shelly_EM_Meter(Shelly):
             self.resetEnergy()
 
             # "Reset" the ui value
-            self.device.updateStateOnServer('accumEnergyTotal', 0.0)
+            self.updateStateOnServer('accumEnergyTotal', 0.0)
         elif action.deviceAction == indigo.kUniversalAction.EnergyUpdate:
             # This will be handled by making a status request
             self.sendStatusRequestCommand()
@@ -129,19 +211,19 @@ class Shelly_EM_Meter(Shelly):
         # Calculate the value to display.
         displayMethod = self.device.pluginProps.get('energy-display', None)
         if displayMethod == "net":
-            consumed = self.device.states.get('energy-consumed', 0)
-            returned = self.device.states.get('energy-returned', 0)
+            consumed = self.getState('energy-consumed', 0)
+            returned = self.getState('energy-returned', 0)
             net = consumed - returned
 
-            self.device.updateStateOnServer('accumEnergyTotal', net, uiValue=self.buildEnergyUIValue(net))
+            self.updateStateOnServer('accumEnergyTotal', net, uiValue=self.buildEnergyUIValue(net))
         elif displayMethod == "consumed":
-            consumed = self.device.states.get('energy-consumed', 0)
+            consumed = self.getState('energy-consumed', 0)
 
-            self.device.updateStateOnServer('accumEnergyTotal', consumed, uiValue=self.buildEnergyUIValue(consumed))
+            self.updateStateOnServer('accumEnergyTotal', consumed, uiValue=self.buildEnergyUIValue(consumed))
         elif displayMethod == "returned":
-            returned = -1 * self.device.states.get('energy-returned', 0)
+            returned = -1 * self.getState('energy-returned', 0)
 
-            self.device.updateStateOnServer('accumEnergyTotal', returned, uiValue=self.buildEnergyUIValue(returned))
+            self.updateStateOnServer('accumEnergyTotal', returned, uiValue=self.buildEnergyUIValue(returned))
 
     def resetEnergy(self):
         """
@@ -153,17 +235,17 @@ class Shelly_EM_Meter(Shelly):
 
         newProps = self.device.pluginProps
 
-        currEnergyWattMins = self.device.states.get('energy-consumed', 0) * 60 * 1000
+        currEnergyWattMins = self.getState('energy-consumed', 0) * 60 * 1000
         previousResetEnergyOffset = int(self.device.pluginProps.get('resetEnergyConsumedOffset', 0))
         offset = currEnergyWattMins + previousResetEnergyOffset
         newProps['resetEnergyConsumedOffset'] = offset
-        self.device.updateStateOnServer('energy-consumed', 0.0)
+        self.updateStateOnServer('energy-consumed', 0.0)
 
-        currEnergyWattMins = self.device.states.get('energy-returned', 0) * 60 * 1000
+        currEnergyWattMins = self.getState('energy-returned', 0) * 60 * 1000
         previousResetEnergyOffset = int(self.device.pluginProps.get('resetEnergyReturnedOffset', 0))
         offset = currEnergyWattMins + previousResetEnergyOffset
         newProps['resetEnergyReturnedOffset'] = offset
-        self.device.updateStateOnServer('energy-returned', 0.0)
+        self.updateStateOnServer('energy-returned', 0.0)
 
         self.device.replacePluginPropsOnServer(newProps)
 
@@ -193,10 +275,10 @@ class Shelly_EM_Meter(Shelly):
         :return: None
         """
 
-        if self.device.states['online']:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.EnergyMeterOn)
+        if self.getState('online'):
+            self.updateStateImageOnServer(indigo.kStateImageSel.EnergyMeterOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.EnergyMeterOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.EnergyMeterOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -30,30 +30,80 @@ class Shelly_Flood(Shelly):
                 "{}/sensor/battery".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: The payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/sensor/temperature".format(address): self.processTemperature,
+            "{}/sensor/flood".format(address): self.processFlood,
+            "{}/sensor/battery".format(address): self.processBattery
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        return Shelly.getCriticalTopics(self) + [
+            "{}/sensor/flood".format(self.getAddress())
+        ]
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        return Shelly.getTelemetryTopics(self) + [
+            "{}/sensor/temperature".format(self.getAddress())
+        ]
+
+    def processTemperature(self, payload):
+        """
+        Handles the temperature.
+
+        :param payload: The temperature.
         :return: None
         """
 
-        if topic == "{}/sensor/temperature".format(self.getAddress()):
-            self.setTemperature(float(payload))
-        elif topic == "{}/sensor/flood".format(self.getAddress()):
-            if self.device.states['onOffState'] != (payload == 'true'):
-                self.logCommandReceived("{}".format("wet" if (payload == 'true') else "dry"))
-            if payload == 'true':
-                self.device.updateStateOnServer(key='onOffState', value=True, uiValue='wet')
-            elif payload == 'false':
-                self.device.updateStateOnServer(key='onOffState', value=False, uiValue='dry')
+        self.setTemperature(float(payload))
 
-            self.updateStateImage()
-        elif topic == "{}/sensor/battery".format(self.getAddress()):
-            Shelly.updateBatteryLevel(self, payload)
-        else:
-            Shelly.handleMessage(self, topic, payload)
+    def processFlood(self, payload):
+        """
+        Handles the flood state.
+
+        :param payload: Either "true" or "false".
+        :return: None
+        """
+
+        if self.getState('onOffState') != (payload == 'true'):
+            self.logCommandReceived("{}".format("wet" if (payload == 'true') else "dry"))
+        if payload == 'true':
+            self.updateStateOnServer(key='onOffState', value=True, uiValue='wet')
+        elif payload == 'false':
+            self.updateStateOnServer(key='onOffState', value=False, uiValue='dry')
+
+        self.updateStateImage()
+
+    def processBattery(self, payload):
+        """
+        Handles the battery level.
+
+        :param payload: The battery level in percent.
+        :return: None
+        """
+
+        Shelly.updateBatteryLevel(self, payload)
 
     def handleAction(self, action):
         """
@@ -72,10 +122,10 @@ class Shelly_Flood(Shelly):
         :return: None
         """
 
-        if self.device.states['onOffState']:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorTripped)
+        if self.getState('onOffState'):
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorTripped)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -31,34 +31,108 @@ class Shelly_Gas(Shelly):
                 "{}/sensor/concentration".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/sensor/operation".format(address): self.processOperation,
+            "{}/sensor/gas".format(address): self.processGas,
+            "{}/sensor/self_test".format(address): self.processSelfTest,
+            "{}/sensor/concentration".format(address): self.processConcentration
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly.getCriticalTopics(self) + [
+            "{}/sensor/operation".format(address),
+            "{}/sensor/gas".format(address)
+        ]
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        return Shelly.getTelemetryTopics(self) + [
+            "{}/sensor/concentration".format(self.getAddress())
+        ]
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: The payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/sensor/operation".format(self.getAddress()):
-            self.device.updateStateOnServer(key="sensor-status", value=payload)
-        elif topic == "{}/sensor/gas".format(self.getAddress()):
-            self.device.updateStateOnServer(key="gas-detected", value=payload)
+        with self.stateUpdates():
+            Shelly.handleMessage(self, topic, payload, parsed)
+
+            # Update the display state after data changed
             self.updateStateImage()
-        elif topic == "{}/sensor/self_test".format(self.getAddress()):
-            self.device.updateStateOnServer(key="self-test", value=payload)
-        elif topic == "{}/sensor/concentration".format(self.getAddress()):
-            try:
-                concentration = int(payload)
-                self.device.updateStateOnServer(key="sensorValue", value=concentration, uiValue='{} ppm'.format(concentration))
-            except ValueError:
-                self.logger.error(u"Unable to convert concentration of \"{}\" to an int!".format(payload))
-        else:
-            Shelly.handleMessage(self, topic, payload)
 
-        # Update the display state after data changed
+    def processOperation(self, payload):
+        """
+        Handles the operation status of the sensor.
+
+        :param payload: The operation status.
+        :return: None
+        """
+
+        self.updateStateOnServer(key="sensor-status", value=payload)
+
+    def processGas(self, payload):
+        """
+        Handles the gas detection status.
+
+        :param payload: The gas detection status.
+        :return: None
+        """
+
+        self.updateStateOnServer(key="gas-detected", value=payload)
         self.updateStateImage()
 
+    def processSelfTest(self, payload):
+        """
+        Handles the self test status.
+
+        :param payload: The self test status.
+        :return: None
+        """
+
+        self.updateStateOnServer(key="self-test", value=payload)
+
+    def processConcentration(self, payload):
+        """
+        Handles the gas concentration.
+
+        :param payload: The concentration in ppm.
+        :return: None
+        """
+
+        try:
+            concentration = int(payload)
+            self.updateStateOnServer(key="sensorValue", value=concentration, uiValue='{} ppm'.format(concentration))
+        except ValueError:
+            self.logger.error(u"Unable to convert concentration of \"{}\" to an int!".format(payload))
+
     def handleAction(self, action):
         """
         The method that gets called when an Indigo action takes place.
@@ -88,10 +162,10 @@ class Shelly_Gas(Shelly):
         :return: None
         """
 
-        if self.device.states.get('gas-detected', '') in ['mild', 'heavy']:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorTripped)
+        if self.getState('gas-detected', '') in ['mild', 'heavy']:
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorTripped)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -30,39 +30,93 @@ class Shelly_HT(Shelly):
                 "{}/sensor/battery".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/sensor/temperature".format(address): self.processTemperature,
+            "{}/sensor/humidity".format(address): self.processHumidity,
+            "{}/sensor/battery".format(address): self.processBattery
+        })
+        return handlers
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return Shelly.getTelemetryTopics(self) + [
+            "{}/sensor/temperature".format(address),
+            "{}/sensor/humidity".format(address)
+        ]
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: The payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/sensor/temperature".format(self.getAddress()):
-            self.setTemperature(float(payload))
-        elif topic == "{}/sensor/humidity".format(self.getAddress()):
-            decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
-            offset = 0
-            try:
-                offset = float(self.device.pluginProps.get('humidity-offset', 0))
-            except ValueError:
-                self.logger.error(u"Unable to convert offset of \"{}\" into a float!".format(self.device.pluginProps.get('humidity-offset', 0)))
+        with self.stateUpdates():
+            Shelly.handleMessage(self, topic, payload, parsed)
 
-            humidity = float(payload) + offset
-            self.device.updateStateOnServer(key="humidity", value=humidity, uiValue='{:.{}f}%'.format(humidity, decimals), decimalPlaces=decimals)
-        elif topic == "{}/sensor/battery".format(self.getAddress()):
-            Shelly.updateBatteryLevel(self, payload)
-        else:
-            Shelly.handleMessage(self, topic, payload)
+            temp = self.getState('temperature')
+            temp_decimals = int(self.device.pluginProps.get('temp-decimals', 1))
+            temp_units = self.device.pluginProps.get('temp-units', 'F')[-1]
+            humidity = self.getState('humidity')
+            humidity_decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
+            self.updateStateOnServer(key="status", value='{:.{}f}°{} / {:.{}f}%'.format(temp, temp_decimals, temp_units, humidity, humidity_decimals))
+            self.updateStateImage()
+
+    def processTemperature(self, payload):
+        """
+        Handles the temperature.
+
+        :param payload: The temperature.
+        :return: None
+        """
+
+        self.setTemperature(float(payload))
+
+    def processHumidity(self, payload):
+        """
+        Handles the relative humidity.
+
+        :param payload: The humidity in percent.
+        :return: None
+        """
+
+        decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
+        offset = 0
+        try:
+            offset = float(self.device.pluginProps.get('humidity-offset', 0))
+        except ValueError:
+            self.logger.error(u"Unable to convert offset of \"{}\" into a float!".format(self.device.pluginProps.get('humidity-offset', 0)))
+
+        humidity = float(payload) + offset
+        self.updateStateOnServer(key="humidity", value=humidity, uiValue='{:.{}f}%'.format(humidity, decimals), decimalPlaces=decimals)
+
+    def processBattery(self, payload):
+        """
+        Handles the battery level.
+
+        :param payload: The battery level in percent.
+        :return: None
+        """
 
-        temp = self.device.states['temperature']
-        temp_decimals = int(self.device.pluginProps.get('temp-decimals', 1))
-        temp_units = self.device.pluginProps.get('temp-units', 'F')[-1]
-        humidity = self.device.states['humidity']
-        humidity_decimals = int(self.device.pluginProps.get('humidity-decimals', 1))
-        self.device.updateStateOnServer(key="status", value='{:.{}f}°{} / {:.{}f}%'.format(temp, temp_decimals, temp_units, humidity, humidity_decimals))
-        self.updateStateImage()
+        Shelly.updateBatteryLevel(self, payload)
 
     def handleAction(self, action):
         """
@@ -81,10 +135,10 @@ class Shelly_HT(Shelly):
         :return:
         """
 
-        if self.device.states.get('online', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensorOn)
+        if self.getState('online', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
+            self.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -1,6 +1,5 @@
 # coding=utf-8
 import indigo
-import json
 from ..Shelly import Shelly
 
 
@@ -29,52 +28,70 @@ class Shelly_Motion(Shelly):
                 "{}/status".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/status".format(address): self.processStatus
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        return Shelly.getCriticalTopics(self) + [
+            "{}/status".format(self.getAddress())
+        ]
+
+    def processStatus(self, payload):
+        """
+        Handles the status of the sensor.
+
+        :param payload: A json-formatted string containing the sensor status.
         :return: None
         """
 
-        if topic == "{}/status".format(self.getAddress()):
-            """
-            The payload will json in the form:
-            
-            {
-                "motion": true,
-                "timestamp": 1614208769,
-                "active": false,
-                "vibration": false,
-                "lux": 416,
-                "bat": 94
-            }
-            """
-            try:
-                payload = json.loads(payload)
-                if "motion" in payload:
-                    motion = payload['motion'] is True
-                    if self.device.states.get('onOffState', False) != motion and motion:
-                        self.logCommandReceived("motion detected")
-                    self.device.updateStateOnServer(key='onOffState', value=motion)
-                    self.updateStateImage()
-                if "active" in payload:
-                    active = payload['active'] is True
-                    self.device.updateStateOnServer(key="active", value=active)
-                if "vibration" in payload:
-                    vibration = payload['vibration'] is True
-                    if self.device.states.get('vibration', False) != vibration and vibration:
-                        self.logCommandReceived("tampering detected!")
-                    self.device.updateStateOnServer(key="vibration", value=vibration)
-                if "lux" in payload:
-                    self.device.updateStateOnServer(key="lux", value=payload['lux'])
-                if "bat" in payload:
-                    Shelly.updateBatteryLevel(self, payload['bat'])
-            except ValueError:
-                self.logger.error(u"Problem parsing JSON: {}".format(payload))
-        else:
-            Shelly.handleMessage(self, topic, payload)
+        # The payload will json in the form:
+        # {
+        #     "motion": true,
+        #     "timestamp": 1614208769,
+        #     "active": false,
+        #     "vibration": false,
+        #     "lux": 416,
+        #     "bat": 94
+        # }
+        try:
+            payload = self.loadJson(payload)
+            if "motion" in payload:
+                motion = payload['motion'] is True
+                if self.getState('onOffState', False) != motion and motion:
+                    self.logCommandReceived("motion detected")
+                self.updateStateOnServer(key='onOffState', value=motion)
+                self.updateStateImage()
+            if "active" in payload:
+                active = payload['active'] is True
+                self.updateStateOnServer(key="active", value=active)
+            if "vibration" in payload:
+                vibration = payload['vibration'] is True
+                if self.getState('vibration', False) != vibration and vibration:
+                    self.logCommandReceived("tampering detected!")
+                self.updateStateOnServer(key="vibration", value=vibration)
+            if "lux" in payload:
+                self.updateStateOnServer(key="lux", value=payload['lux'])
+            if "bat" in payload:
+                Shelly.updateBatteryLevel(self, payload['bat'])
+        except ValueError:
+            self.logger.error(u"Problem parsing JSON: {}".format(payload))
 
     def handleAction(self, action):
         """
@@ -93,10 +110,10 @@ class Shelly_Motion(Shelly):
         :return: None
         """
 
-        if self.device.states.get('onOffState', False):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.MotionSensorTripped)
+        if self.getState('onOffState', False):
+            self.updateStateImageOnServer(indigo.kStateImageSel.MotionSensorTripped)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.MotionSensor)
+            self.updateStateImageOnServer(indigo.kStateImageSel.MotionSensor)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -1,6 +1,5 @@
 # coding=utf-8
 import indigo
-import json
 from Shelly_i3 import Shelly_i3
 
 
@@ -33,29 +32,33 @@ class Shelly_Uni_Input(Shelly_i3):
                 "{}/ext_humidities".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: The payload of the message.
-        :return: None
+        :return: A dictionary of topic -> handler.
         """
 
-        if topic == "{}/info".format(self.getAddress()):
-            try:
-                payload = json.loads(payload)
-                adcs = payload.get('adcs', [])
-                if len(adcs) > 0 and type(adcs[0]) is dict:
-                    voltage = adcs[0].get('voltage', None)
-                    self.device.updateStateOnServer(key="voltage", value=voltage)
-            except ValueError:
-                self.logger.error(u"Problem parsing JSON: {}".format(payload))
-        else:
-            Shelly_i3.handleMessage(self, topic, payload)
+        handlers = Shelly_i3.getTopicHandlers(self)
+        handlers["{}/info".format(self.getAddress())] = self.processInfo
+        return handlers
+
+    def processInfo(self, payload):
+        """
+        Handles the info message of the device, which contains the voltage of the ADC.
+
+        :param payload: A json-formatted string containing the device info.
+        :return: None
+        """
 
-        # Update the display state after data changed
-        self.updateStateImage()
+        try:
+            payload = self.loadJson(payload)
+            adcs = payload.get('adcs', [])
+            if len(adcs) > 0 and type(adcs[0]) is dict:
+                voltage = adcs[0].get('voltage', None)
+                self.updateStateOnServer(key="voltage", value=voltage)
+        except ValueError:
+            self.logger.error(u"Problem parsing JSON: {}".format(payload))
 
     def handleAction(self, action):
         """
@@ -75,10 +78,10 @@ class Shelly_Uni_Input(Shelly_i3):
         :return: None
         """
 
-        if self.device.states.get('onOffState', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+        if self.getState('onOffState', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -30,26 +30,60 @@ class Shelly_i3(Shelly):
                 "{}/temperature_status".format(address)
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them.
+
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly.getTopicHandlers(self)
+        handlers.update({
+            "{}/input/{}".format(address, self.getChannel()): self.processInput
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        return Shelly.getCriticalTopics(self) + [
+            "{}/input/{}".format(self.getAddress(), self.getChannel())
+        ]
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         This method is called when a message comes in and matches one of this devices subscriptions.
 
         :param topic: The topic of the message.
         :param payload: The payload of the message.
+        :param parsed: An optional JsonPayload of the message.
         :return: None
         """
 
-        if topic == "{}/input/{}".format(self.getAddress(), self.getChannel()):
-            invert = self.device.pluginProps.get("invert", False)
-            state = (payload == '0') if invert else (payload == '1')
-            if self.device.states['onOffState'] != state:
-                self.logCommandReceived("on" if state else "off")
-            self.device.updateStateOnServer(key="onOffState", value=state)
-        else:
-            Shelly.handleMessage(self, topic, payload)
+        with self.stateUpdates():
+            Shelly.handleMessage(self, topic, payload, parsed)
+
+            # Update the display state after data changed
+            self.updateStateImage()
+
+    def processInput(self, payload):
+        """
+        Handles the state of the input.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
 
-        # Update the display state after data changed
-        self.updateStateImage()
+        invert = self.device.pluginProps.get("invert", False)
+        state = (payload == '0') if invert else (payload == '1')
+        if self.getState('onOffState') != state:
+            self.logCommandReceived("on" if state else "off")
+        self.updateStateOnServer(key="onOffState", value=state)
 
     def handleAction(self, action):
         """
@@ -69,10 +103,10 @@ class Shelly_i3(Shelly):
         :return: None
         """
 
-        if self.device.states.get('onOffState', True):
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+        if self.getState('onOffState', True):
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
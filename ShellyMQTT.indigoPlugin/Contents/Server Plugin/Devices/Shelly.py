@@ -1,6 +1,9 @@
 # coding=utf-8
 import indigo
 import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from ShellyLogger import ShellyLogger
 
 
@@ -15,6 +18,18 @@ class Shelly:
         self.triggers = []
         self.temperature_sensors = []
         self.humidity_sensors = []
+        self.config = None  # Values derived from the plugin props, built on first use
+        self.topicHandlers = None
+        self.criticalTopics = None
+        self.telemetryTopics = None
+        self.stateCache = {}  # {<key>: (<type>, <value>, <uiValue>, <decimalPlaces>)} of the last write of each state
+        self.stateWritesSaved = 0  # Writes that were skipped since the state did not change
+        self.stateLock = threading.Lock()  # Keeps the state cache in step with the writes to the server
+        self.stateBatch = threading.local()  # The state writes batched by each thread, see getStateBatch
+        self.lastInputEventId = None  # The last processed input event, kept in memory until it is saved
+        self.savedInputEventId = None  # The last input event that was saved to the plugin props
+        self.physicalDevice = None  # The PhysicalDevice this device is a channel of
+        self.jsonPayload = None  # The JsonPayload of the message being handled, shared with the other devices handling it
 
     def refresh_device(self):
         """
@@ -26,7 +41,10 @@ class Shelly:
         if self.device:
             indigo.devices[self.device.id].refreshFromServer()
             self.device = indigo.devices[self.device.id]
-            self.logger.debug(u"Refreshed device info for \"{}\"".format(self.device.name))
+            self.resetConfig()
+            # The states on the server may no longer match the ones that were last written
+            self.resetStateCache()
+            self.logger.debug(u"Refreshed device info for \"%s\"", self.device.name)
 
     def getSubscriptions(self):
         """
@@ -57,34 +75,332 @@ class Shelly:
                 }
                 mqtt.executeAction("add_subscription", deviceId=self.getBrokerId(), props=props)
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
+        """
+        Builds the mapping of topics to the methods that handle them. Subclasses extend the
+        mapping of their parent class with the topics specific to their device.
+
+        :return: A dictionary of topic -> handler, where each handler is called with the payload.
+        """
+
+        address = self.getAddress()
+        return {
+            "shellies/announce": self.parseAnnouncement,
+            "{}/online".format(address): self.processOnline,
+            "{}/input_event/{}".format(address, self.getChannel()): self.processInputEvent,
+            "{}/ext_temperatures".format(address): self.processTemperatureSensors,
+            "{}/ext_humidities".format(address): self.processHumiditySensors,
+            "{}/temperature_status".format(address): self.processTemperatureStatus
+        }
+
+    def getTopicHandler(self, topic):
+        """
+        Looks up the handler for a topic. The topic mapping is only built on the first message
+        and again after the device config has been refreshed.
+
+        :param topic: The topic of the incoming message.
+        :return: The method that handles the topic, or None if the device does not handle it.
+        """
+
+        if self.topicHandlers is None:
+            self.topicHandlers = self.getTopicHandlers()
+        return self.topicHandlers.get(topic, None)
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages. These are handled ahead of
+        telemetry, such as power and energy readings, that is waiting to be processed.
+
+        :return: A list of topics.
+        """
+
+        return [
+            "{}/input_event/{}".format(self.getAddress(), self.getChannel())
+        ]
+
+    def isCriticalTopic(self, topic):
+        """
+        Helper method to determine if a message should be handled ahead of telemetry.
+
+        :param topic: The topic of the incoming message.
+        :return: True if the topic is one of the critical topics of the device.
+        """
+
+        if self.criticalTopics is None:
+            self.criticalTopics = set(self.getCriticalTopics())
+        return topic in self.criticalTopics
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, such as power, energy and temperature values.
+        Only the newest reading of these topics matters, so they can be coalesced. Topics that report
+        a change, such as online, temperature_status or a battery level that fires triggers, are
+        never listed.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        return [
+            "{}/ext_temperatures".format(address),
+            "{}/ext_humidities".format(address)
+        ]
+
+    def isTelemetryTopic(self, topic):
+        """
+        Helper method to determine if only the newest message of a topic needs to be handled.
+
+        :param topic: The topic of the incoming message.
+        :return: True if the topic is one of the telemetry topics of the device.
+        """
+
+        if self.telemetryTopics is None:
+            self.telemetryTopics = set(self.getTelemetryTopics())
+        return topic in self.telemetryTopics
+
+    def getConfig(self):
+        """
+        Getter for the values derived from the plugin props of the device. The values are only
+        computed once, until the config is reset.
+
+        :return: A dictionary with the address, channel, broker-id, message-type, announce-message-type and message-types.
+        """
+
+        if self.config is None:
+            self.config = self.buildConfig()
+        return self.config
+
+    def buildConfig(self):
+        """
+        Computes the values derived from the plugin props of the device.
+
+        :return: A dictionary with the address, channel, broker-id, message-type, announce-message-type and message-types.
+        """
+
+        props = self.device.pluginProps
+
+        address = props.get('address', None)
+        if not address or address == '':
+            address = None
+        else:
+            address.strip()
+            if address.endswith('/'):
+                address = address[:-1]
+
+        brokerId = props.get('broker-id', None)
+        if brokerId is None or brokerId == '':
+            brokerId = None
+        else:
+            brokerId = int(brokerId)
+
+        messageType = props.get('message-type', "")
+        if not props.get('announce-message-type-same-as-message-type', True):
+            announceMessageType = props.get('announce-message-type', "")
+        else:
+            announceMessageType = None
+
+        messageTypes = []
+        if messageType != "":
+            messageTypes.append(messageType)
+        if announceMessageType:
+            messageTypes.append(announceMessageType)
+
+        return {
+            'address': address,
+            'channel': props.get('channel', 0),
+            'broker-id': brokerId,
+            'message-type': messageType,
+            'announce-message-type': announceMessageType,
+            'message-types': messageTypes
+        }
+
+    def resetConfig(self):
+        """
+        Discards the derived config, topic mapping, critical and telemetry topics and logging methods so that
+        they are rebuilt from the current device config.
+
+        :return: None
+        """
+
+        self.config = None
+        self.topicHandlers = None
+        self.criticalTopics = None
+        self.telemetryTopics = None
+        self.logger.reset()
+
+    def updateStateOnServer(self, key, value, uiValue=None, decimalPlaces=None, force=False):
+        """
+        Writes a device state to the Indigo server. The write is skipped if the state was last written
+        with the same value, uiValue and decimal places and the device still has that value.
+
+        :param key: The state to write.
+        :param value: The value of the state.
+        :param uiValue: The value to display, if any.
+        :param decimalPlaces: The number of decimal places to display, if any.
+        :param force: True to write the state even if it has not changed.
+        :return: True if the state was written or batched.
+        """
+
+        written = (type(value), value, uiValue, decimalPlaces)
+        if not force and self.stateCache.get(key) == written and self.getState(key) == value:
+            self.stateWritesSaved += 1
+            return False
+
+        state = {'key': key, 'value': value}
+        if uiValue is not None:
+            state['uiValue'] = uiValue
+        if decimalPlaces is not None:
+            state['decimalPlaces'] = decimalPlaces
+
+        batch = self.getStateBatch()
+        if batch.depth > 0:
+            # A later write of the same state in the batch replaces the earlier one
+            batch.states.pop(key, None)
+            batch.states[key] = (state, written)
+        else:
+            self.writeStates([(state, written)])
+        return True
+
+    def getStateBatch(self):
+        """
+        Getter for the state writes batched by the current thread. Indigo runs actions on its own
+        thread while messages are handled, so each thread batches its own writes and an action is
+        never held back by the batch of a message.
+
+        :return: An object with the depth of the nested stateUpdates blocks, the batched states
+                 as {<key>: (<state dict>, <cache entry>)} and the batched state image.
+        """
+
+        batch = self.stateBatch
+        if not hasattr(batch, 'depth'):
+            batch.depth = 0
+            batch.states = OrderedDict()
+            batch.image = None
+        return batch
+
+    def writeStates(self, states):
+        """
+        Writes states to the server and records them in the state cache once they are written.
+
+        :param states: A list of (<state dict>, <cache entry>) tuples.
+        :return: None
+        """
+
+        with self.stateLock:
+            self.device.updateStatesOnServer([state for state, _ in states])
+            for state, written in states:
+                self.stateCache[state['key']] = written
+
+    def updateStateImageOnServer(self, image):
+        """
+        Sets the state image of the device. The image is batched with the states when state
+        updates are being batched.
+
+        :param image: The state image selector.
+        :return: None
+        """
+
+        batch = self.getStateBatch()
+        if batch.depth > 0:
+            batch.image = image
+        else:
+            self.device.updateStateImageOnServer(image)
+
+    def getState(self, key, default=None):
+        """
+        Getter for a device state, including a state that is batched but not yet written.
+
+        :param key: The state to get.
+        :param default: The value to return if the device does not have the state.
+        :return: The value of the state.
+        """
+
+        batch = self.getStateBatch()
+        if key in batch.states:
+            return batch.states[key][0]['value']
+        return self.device.states.get(key, default)
+
+    @contextmanager
+    def stateUpdates(self):
+        """
+        Batches the state writes that the current thread makes inside the block. The states and the
+        state image are written to the server when the outermost block ends, using a single
+        updateStatesOnServer call.
+
+        :return: A context manager.
+        """
+
+        batch = self.getStateBatch()
+        batch.depth += 1
+        try:
+            yield
+        finally:
+            batch.depth -= 1
+            if batch.depth == 0:
+                self.flushStateUpdates()
+
+    def flushStateUpdates(self):
+        """
+        Writes the batched states and state image to the server.
+
+        :return: None
+        """
+
+        batch = self.getStateBatch()
+        if batch.states:
+            states = list(batch.states.values())
+            batch.states = OrderedDict()
+            self.writeStates(states)
+
+        if batch.image is not None:
+            image = batch.image
+            batch.image = None
+            self.device.updateStateImageOnServer(image)
+
+    def resetStateCache(self):
+        """
+        Forgets the last written states so that the next write of each state goes to the server.
+
+        :return: None
+        """
+
+        self.stateCache = {}
+
+    def handleMessage(self, topic, payload, parsed=None):
         """
         The default handler for incoming messages.
-        These are messages that are handled by ANY Shelly device.
+        The message is routed to the method that handles its topic, if there is one.
 
         :param topic: The topic of the incoming message.
         :param payload: The content of the massage.
+        :param parsed: An optional JsonPayload of the message, so that it is only decoded once for all devices.
         :return:  None
         """
 
-        if topic == "shellies/announce":
-            self.parseAnnouncement(payload)
-        elif topic == "{}/online".format(self.getAddress()):
-            wasOnline = self.device.states.get('online', False)
-            self.device.updateStateOnServer(key='online', value=(payload == "true"))
-            self.updateStateImage()
-            if not wasOnline:
-                self.setLastInputEventId(0)
-        elif topic == "{}/input_event/{}".format(self.getAddress(), self.getChannel()):
-            self.processInputEvent(payload)
-        elif topic == "{}/ext_temperatures".format(self.getAddress()):
-            self.processTemperatureSensors(payload)
-        elif topic == "{}/ext_humidities".format(self.getAddress()):
-            self.processHumiditySensors(payload)
-        elif topic == "{}/temperature_status".format(self.getAddress()):
-            self.processTemperatureStatus(payload)
+        handler = self.getTopicHandler(topic)
+        if handler:
+            self.jsonPayload = parsed
+            try:
+                with self.stateUpdates():
+                    handler(payload)
+            finally:
+                self.jsonPayload = None
         return None
 
+    def loadJson(self, payload):
+        """
+        Decodes a JSON payload. The decoded value of the message being handled is reused when it
+        has already been decoded for another device.
+
+        :param payload: The json-formatted string.
+        :return: The decoded payload, which must not be modified.
+        :raises ValueError: If the payload is not valid JSON.
+        """
+
+        if self.jsonPayload is not None and self.jsonPayload.payload == payload:
+            return self.jsonPayload.getValue()
+        return json.loads(payload)
+
     def handleAction(self, action):
         """
         The default handler for an action.
@@ -132,14 +448,7 @@ class Shelly:
         :return: The cleaned base address.
         """
 
-        address = self.device.pluginProps.get('address', None)
-        if not address or address == '':
-            return None
-
-        address.strip()
-        if address.endswith('/'):
-            address = address[:-1]
-        return address
+        return self.getConfig()['address']
 
     def getIpAddress(self):
         """
@@ -148,7 +457,9 @@ class Shelly:
         :return: The device ip address
         """
 
-        return self.device.states.get('ip-address', None)
+        if self.physicalDevice is not None and self.physicalDevice.hasAnnounced():
+            return self.physicalDevice.getIpAddress()
+        return self.getState('ip-address', None)
 
     def updateAvailable(self):
         """
@@ -157,7 +468,9 @@ class Shelly:
         :return: True or false to indicate if there is a firmware update.
         """
 
-        return self.device.states.get('has-firmware-update', False)
+        if self.physicalDevice is not None and self.physicalDevice.hasAnnounced():
+            return self.physicalDevice.updateAvailable()
+        return self.getState('has-firmware-update', False)
 
     def getFirmware(self):
         """
@@ -166,7 +479,21 @@ class Shelly:
         :return: The current firmware of the device.
         """
 
-        return self.device.states.get('firmware-version', None)
+        if self.physicalDevice is not None and self.physicalDevice.hasAnnounced():
+            return self.physicalDevice.getFirmware()
+        return self.getState('firmware-version', None)
+
+    def getDispatchKey(self):
+        """
+        Getter for the key that messages for this device are handled under. Channels of the same
+        physical unit share a key so that shared messages are handled in order with their own.
+
+        :return: The key of the physical unit, or the Indigo device id.
+        """
+
+        if self.physicalDevice is not None:
+            return self.physicalDevice.getDispatchKey()
+        return self.device.id
 
     def getMQTT(self):
         """
@@ -189,11 +516,7 @@ class Shelly:
         :return: The Indigo deviceId of the broker for this device.
         """
 
-        brokerId = self.device.pluginProps.get('broker-id', None)
-        if brokerId is None or brokerId == '':
-            return None
-        else:
-            return int(brokerId)
+        return self.getConfig()['broker-id']
 
     def getMessageType(self):
         """
@@ -202,7 +525,7 @@ class Shelly:
         :return: The message type for this device.
         """
 
-        return self.device.pluginProps.get('message-type', "")
+        return self.getConfig()['message-type']
 
     def getAnnounceMessageType(self):
         """
@@ -211,10 +534,7 @@ class Shelly:
         :return: The message type for announce messages, or None if this is the same as the regular message type.
         """
 
-        if not self.device.pluginProps.get('announce-message-type-same-as-message-type', True):
-            return self.device.pluginProps.get('announce-message-type', "")
-        else:
-            return None
+        return self.getConfig()['announce-message-type']
 
     def getMessageTypes(self):
         """
@@ -223,12 +543,7 @@ class Shelly:
         :return: A list of messages types for this device.
         """
 
-        messageTypes = []
-        if self.getMessageType() != "":
-            messageTypes.append(self.getMessageType())
-        if self.getAnnounceMessageType():
-            messageTypes.append(self.getAnnounceMessageType())
-        return messageTypes
+        return self.getConfig()['message-types']
 
     def sendStatusRequestCommand(self):
         """
@@ -258,7 +573,7 @@ class Shelly:
         """
 
         if self.getAddress() is not None:
-            if not self.device.states.get('has-firmware-update', False):
+            if not self.getState('has-firmware-update', False):
                 self.logger.warning(u"\"%s\" has not notified that it has a newer firmware. Attempting to update anyway...", self.device.name)
             self.publish("{}/command".format(self.getAddress()), "update_fw")
             self.logCommandSent("update firmware")
@@ -285,18 +600,18 @@ class Shelly:
 
         if units == "F":
             temperature += offset
-            self.device.updateStateOnServer(state, temperature, uiValue='{:.{}f} °F'.format(temperature, decimals), decimalPlaces=decimals)
+            self.updateStateOnServer(state, temperature, uiValue='{:.{}f} °F'.format(temperature, decimals), decimalPlaces=decimals)
         elif units == "C->F":
             temperature = self.convertCtoF(temperature)
             temperature += offset
-            self.device.updateStateOnServer(state, temperature, uiValue='{:.{}f} °F'.format(temperature, decimals), decimalPlaces=decimals)
+            self.updateStateOnServer(state, temperature, uiValue='{:.{}f} °F'.format(temperature, decimals), decimalPlaces=decimals)
         elif units == "C":
             temperature += offset
-            self.device.updateStateOnServer(state, temperature, uiValue='{:.{}f} °C'.format(temperature, decimals), decimalPlaces=decimals)
+            self.updateStateOnServer(state, temperature, uiValue='{:.{}f} °C'.format(temperature, decimals), decimalPlaces=decimals)
         elif units == "F->C":
             temperature = self.convertFtoC(temperature)
             temperature += offset
-            self.device.updateStateOnServer(state, temperature, uiValue='{:.{}f} °C'.format(temperature, decimals), decimalPlaces=decimals)
+            self.updateStateOnServer(state, temperature, uiValue='{:.{}f} °C'.format(temperature, decimals), decimalPlaces=decimals)
 
     def convertCtoF(self, celsius):
         """
@@ -333,23 +648,59 @@ class Shelly:
         :return: None
         """
 
-        payload = json.loads(payload)
-        identifier = payload.get('id', None)
-        mac_address = payload.get('mac', None)
-        ip_address = payload.get('ip', None)
-        firmware_version = payload.get('fw_ver', None)
-        has_firmware_update = payload.get('new_fw', False)
+        self.applyAnnouncement(json.loads(payload))
+
+    def applyAnnouncement(self, announcement):
+        """
+        Updates the device details from an announcement that has already been parsed.
+
+        :param announcement: The announcement as a dictionary.
+        :return: None
+        """
+
+        identifier = announcement.get('id', None)
+        mac_address = announcement.get('mac', None)
+        ip_address = announcement.get('ip', None)
+        firmware_version = announcement.get('fw_ver', None)
+        has_firmware_update = announcement.get('new_fw', False)
 
         # id should appear in part of the device address
         if identifier and self.getAddress() and identifier in self.getAddress():
-            self.logger.debug(u"Updated device details for \"{}\" via announcement message".format(self.device.name))
-            self.device.updateStateOnServer('mac-address', mac_address)
-            self.device.updateStateOnServer('ip-address', ip_address)
+            self.logger.debug(u"Updated device details for \"%s\" via announcement message", self.device.name)
+            with self.stateUpdates():
+                self.updateStateOnServer('mac-address', mac_address)
+                self.updateStateOnServer('ip-address', ip_address)
+
+                if self.getState('firmware-version', '') not in [firmware_version, None, '']:
+                    self.logger.debug(u"Detected a firmware change for \"%s\"", self.device.name)
+                self.updateStateOnServer('firmware-version', firmware_version)
+                self.updateStateOnServer('has-firmware-update', has_firmware_update)
+
+    def processOnline(self, payload):
+        """
+        Parses the online status of the device. The input event counter of the device restarts
+        when it comes back online.
+
+        :param payload: Either "true" or "false".
+        :return: None
+        """
+
+        self.applyOnline(payload == "true")
 
-            if self.device.states.get('firmware-version', '') not in [firmware_version, None, '']:
-                self.logger.debug(u"Detected a firmware change for \"{}\"".format(self.device.name))
-            self.device.updateStateOnServer('firmware-version', firmware_version)
-            self.device.updateStateOnServer('has-firmware-update', has_firmware_update)
+    def applyOnline(self, online):
+        """
+        Updates the online status of the device from a message that has already been parsed.
+
+        :param online: True if the device is online.
+        :return: None
+        """
+
+        wasOnline = self.getState('online', False)
+        # The online status is always written so that a reconnect is reflected even if the cache is stale
+        self.updateStateOnServer(key='online', value=online, force=True)
+        self.updateStateImage()
+        if not wasOnline:
+            self.setLastInputEventId(0)
 
     def processInputEvent(self, eventMessage):
         """
@@ -373,7 +724,7 @@ class Shelly:
         """
 
         # Parse the event message
-        event = json.loads(eventMessage)
+        event = self.loadJson(eventMessage)
         eventType = event.get('event', None)
         eventId = event.get('event_cnt', None)
         if eventType is None or eventId is None:
@@ -388,9 +739,7 @@ class Shelly:
 
         # Process all triggers for this input event
         eventName = u"input-event-{}".format(eventType.lower())
-        for trigger in indigo.activePlugin.triggers.values():
-            if trigger.pluginTypeId == eventName and int(trigger.pluginProps.get('device-id', -1)) == self.device.id:
-                indigo.trigger.execute(trigger)
+        self.executeTriggers(eventName, self.device.id)
 
     def processTemperatureSensors(self, payload):
         """
@@ -408,17 +757,28 @@ class Shelly:
         """
 
         try:
-            sensors = json.loads(payload)
-            self.temperature_sensors = []
-            for channel, sensor in sensors.items():
-                # Invalid if the sensor reads 999
-                if sensor['tC'] != 999:
-                    self.temperature_sensors.append({
-                        "channel": int(channel),
-                        "id": sensor['hwID']
-                    })
+            sensors = self.loadJson(payload)
         except ValueError:
             self.logger.error(u"Problem parsing JSON: {}".format(payload))
+            return
+        self.applyTemperatureSensors(sensors)
+
+    def applyTemperatureSensors(self, sensors):
+        """
+        Keeps track of the connected temperature sensors from a message that has already been parsed.
+
+        :param sensors: A dictionary of channel -> sensor information.
+        :return: None
+        """
+
+        self.temperature_sensors = []
+        for channel, sensor in sensors.items():
+            # Invalid if the sensor reads 999
+            if sensor['tC'] != 999:
+                self.temperature_sensors.append({
+                    "channel": int(channel),
+                    "id": sensor['hwID']
+                })
 
     def processHumiditySensors(self, payload):
         """
@@ -434,17 +794,53 @@ class Shelly:
         """
 
         try:
-            sensors = json.loads(payload)
-            self.humidity_sensors = []
-            for channel, sensor in sensors.items():
-                # Invalid if the sensor reads 999
-                if sensor['hum'] != 999:
-                    self.humidity_sensors.append({
-                        "channel": int(channel),
-                        "id": sensor['hwID']
-                    })
+            sensors = self.loadJson(payload)
         except ValueError:
             self.logger.error(u"Problem parsing JSON: {}".format(payload))
+            return
+        self.applyHumiditySensors(sensors)
+
+    def applyHumiditySensors(self, sensors):
+        """
+        Keeps track of the connected humidity sensors from a message that has already been parsed.
+
+        :param sensors: A dictionary of channel -> sensor information.
+        :return: None
+        """
+
+        self.humidity_sensors = []
+        for channel, sensor in sensors.items():
+            # Invalid if the sensor reads 999
+            if sensor['hum'] != 999:
+                self.humidity_sensors.append({
+                    "channel": int(channel),
+                    "id": sensor['hwID']
+                })
+
+    def getSnapshot(self):
+        """
+        Getter for the state learned from the device that should be kept across restarts.
+
+        :return: A dictionary that can be serialized to json, empty if there is nothing to keep.
+        """
+
+        snapshot = {}
+        if self.temperature_sensors:
+            snapshot['temperature-sensors'] = self.temperature_sensors
+        if self.humidity_sensors:
+            snapshot['humidity-sensors'] = self.humidity_sensors
+        return snapshot
+
+    def restoreSnapshot(self, snapshot):
+        """
+        Restores the state that was kept from before a restart, until the device reports it again.
+
+        :param snapshot: A dictionary from getSnapshot.
+        :return: None
+        """
+
+        self.temperature_sensors = snapshot.get('temperature-sensors', [])
+        self.humidity_sensors = snapshot.get('humidity-sensors', [])
 
     def processTemperatureStatus(self, payload):
         """
@@ -454,14 +850,32 @@ class Shelly:
         :return: None
         """
 
-        previous_status = self.device.states.get('temperature-status', None)
-        self.device.updateStateOnServer("temperature-status", payload)
+        if self.applyTemperatureStatus(payload):
+            self.executeTriggers("abnormal-temperature-status-any")
+
+    def applyTemperatureStatus(self, payload):
+        """
+        Updates the temperature status state of the device.
+
+        :param payload: The payload of the temperature status
+        :return: True if the temperature status has changed to an abnormal value.
+        """
+
+        previous_status = self.getState('temperature-status', None)
+        self.updateStateOnServer("temperature-status", payload)
+        return payload != previous_status and payload != "Normal"
 
-        if payload != previous_status and payload != "Normal":
-            # The temperature status has changed to an abnormal value
-            for trigger in indigo.activePlugin.triggers.values():
-                if trigger.pluginTypeId == "abnormal-temperature-status-any":
-                    indigo.trigger.execute(trigger)
+    def executeTriggers(self, pluginTypeId, deviceId=None):
+        """
+        Executes the plugin triggers of an event.
+
+        :param pluginTypeId: The type of the triggers to execute.
+        :param deviceId: The id of the device the triggers watch, None for triggers that are not tied to a device.
+        :return: None
+        """
+
+        for trigger in indigo.activePlugin.triggerIndex.get(pluginTypeId, deviceId):
+            indigo.trigger.execute(trigger)
 
     def getLastInputEventId(self):
         """
@@ -470,19 +884,41 @@ class Shelly:
         :return: an integer of the last input event identifier.
         """
 
+        if self.lastInputEventId is not None:
+            return self.lastInputEventId
         return int(self.device.pluginProps.get('last-input-event-id', -1))
 
     def setLastInputEventId(self, eventId):
         """
         Sets the internal last input event count for the device.
+        The count is kept in memory and written to the plugin props by saveLastInputEventId.
 
         :param eventId: The event id
         :return: None
         """
 
+        self.lastInputEventId = int(eventId)
+
+    def saveLastInputEventId(self):
+        """
+        Writes the last input event count to the plugin props so that duplicate events are still
+        detected after a restart. Nothing is written if the count has not changed since the last save.
+
+        :return: True if the plugin props were written.
+        """
+
+        eventId = self.lastInputEventId
+        if eventId is None or eventId == self.savedInputEventId:
+            return False
+
+        self.savedInputEventId = eventId
         props = self.device.pluginProps
-        props["last-input-event-id"] = int(eventId)
+        if int(props.get('last-input-event-id', -1)) == eventId:
+            return False
+
+        props["last-input-event-id"] = eventId
         self.device.replacePluginPropsOnServer(props)
+        return True
 
     def updateEnergy(self, energy, offsetProp='resetEnergyOffset', energyState='accumEnergyTotal'):
         """
@@ -501,7 +937,7 @@ class Shelly:
         if new_energy < 0:  # If the offset is greater than what is being reported, the device must have reset
             # our last known energy total can be used to determine the previous energy usage
             self.logger.debug(u"%s: Must have lost power and the energy usage has reset to 0. Determining previous usage based on last known energy usage value...")
-            resetEnergyOffset = self.device.states.get(energyState, 0) * 60 * 1000 * -1
+            resetEnergyOffset = self.getState(energyState, 0) * 60 * 1000 * -1
             newProps = self.device.pluginProps
             newProps[offsetProp] = resetEnergyOffset
             self.device.replacePluginPropsOnServer(newProps)
@@ -517,7 +953,7 @@ class Shelly:
         else:
             uiValue = '{:.1f} kWh'.format(kwh)
 
-        self.device.updateStateOnServer(energyState, kwh, uiValue=uiValue, decimalPlaces=4)
+        self.updateStateOnServer(energyState, kwh, uiValue=uiValue, decimalPlaces=4)
 
     def resetEnergy(self):
         """
@@ -527,12 +963,12 @@ class Shelly:
         :return: None
         """
 
-        currEnergyWattMins = self.device.states.get('accumEnergyTotal', 0) * 60 * 1000
+        currEnergyWattMins = self.getState('accumEnergyTotal', 0) * 60 * 1000
         previousResetEnergyOffset = int(self.device.pluginProps.get('resetEnergyOffset', 0))
         offset = currEnergyWattMins + previousResetEnergyOffset
         newProps = self.device.pluginProps
         newProps['resetEnergyOffset'] = offset
-        self.device.updateStateOnServer('accumEnergyTotal', 0.0)
+        self.updateStateOnServer('accumEnergyTotal', 0.0)
         self.device.replacePluginPropsOnServer(newProps)
 
     def turnOn(self):
@@ -544,7 +980,7 @@ class Shelly:
 
         # if not self.isOn():
         #     self.logger.info(u"\"{}\" on".format(self.device.name))
-        self.device.updateStateOnServer(key='onOffState', value=True)
+        self.updateStateOnServer(key='onOffState', value=True)
         self.updateStateImage()
 
     def turnOff(self):
@@ -556,7 +992,7 @@ class Shelly:
 
         # if not self.isOff():
         #     self.logger.info(u"\"{}\" off".format(self.device.name))
-        self.device.updateStateOnServer(key='onOffState', value=False)
+        self.updateStateOnServer(key='onOffState', value=False)
         self.updateStateImage()
 
     def isOn(self):
@@ -566,7 +1002,7 @@ class Shelly:
         :return: True if the device is on.
         """
 
-        return self.device.states.get('onOffState', False)
+        return self.getState('onOffState', False)
 
     def isOff(self):
         """
@@ -575,7 +1011,7 @@ class Shelly:
         :return: True if the device is off.
         """
 
-        return not self.device.states.get('onOffState', False)
+        return not self.getState('onOffState', False)
 
     def getChannel(self):
         """
@@ -584,7 +1020,7 @@ class Shelly:
         :return: The channel of the device. If no channel is found, then 0.
         """
 
-        return self.device.pluginProps.get('channel', 0)
+        return self.getConfig()['channel']
 
     def isAddon(self):
         """
@@ -604,9 +1040,9 @@ class Shelly:
         """
 
         if self.isOn():
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.PowerOn)
+            self.updateStateImageOnServer(indigo.kStateImageSel.PowerOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.PowerOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.PowerOff)
 
     def isMuted(self):
         """
@@ -636,19 +1072,16 @@ class Shelly:
         """
 
         # Get the old battery level to determine if there was a change
-        oldBatteryLevel = self.device.states.get('batteryLevel', None)
+        oldBatteryLevel = self.getState('batteryLevel', None)
         # Save the current battery level
-        self.device.updateStateOnServer(key="batteryLevel", value=batteryLevel, uiValue='{}%'.format(batteryLevel))
+        self.updateStateOnServer(key="batteryLevel", value=batteryLevel, uiValue='{}%'.format(batteryLevel))
 
         try:
             if indigo.activePlugin.lowBatteryThreshold >= int(batteryLevel) != int(oldBatteryLevel) and oldBatteryLevel:
                 # Battery level has changed
                 # Fire all triggers watching for a low battery event
-                for trigger in indigo.activePlugin.triggers.values():
-                    if trigger.pluginTypeId == "low-battery-any":
-                        indigo.trigger.execute(trigger)
-                    elif trigger.pluginTypeId == "low-battery-device" and int(trigger.pluginProps['device-id']) == self.device.id:
-                        indigo.trigger.execute(trigger)
+                self.executeTriggers("low-battery-any")
+                self.executeTriggers("low-battery-device", self.device.id)
         except ValueError:
             pass
 
@@ -661,7 +1094,7 @@ class Shelly:
         """
 
         if indigo.activePlugin.pluginPrefs.get('log-device-activity', True):
-            self.logger.info(u"sent \"{}\" {}".format(self.device.name, message))
+            self.logger.info(u"sent \"%s\" %s", self.device.name, message)
 
     def logCommandReceived(self, message):
         """
@@ -672,7 +1105,7 @@ class Shelly:
         """
 
         if indigo.activePlugin.pluginPrefs.get('log-device-activity', True):
-            self.logger.info(u"received \"{}\" {}".format(self.device.name, message))
+            self.logger.info(u"received \"%s\" %s", self.device.name, message)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
@@ -714,8 +1147,5 @@ class Shelly:
         if origDev.pluginProps.get('channel', None) != newDev.pluginProps.get('channel', None):
             return True
 
-        # If we are here then the device is not restarting, so we should update the device to pull in any chanegs
-        shelly = indigo.activePlugin.shellyDevices.get(newDev.id)
-        if shelly:
-            shelly.refresh_device()
+        # Devices that are not restarting are refreshed by the plugin when their config changed
         return False
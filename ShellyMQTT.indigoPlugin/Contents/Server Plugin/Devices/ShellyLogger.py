@@ -1,5 +1,4 @@
 # coding=utf-8
-import indigo
 import logging
 
 
@@ -7,19 +6,57 @@ class ShellyLogger:
     """
     A wrapper for the logger class.
     This is ued to mute info and debug logging when a device has been marked as muted.
+
+    Each logging method is bound the first time the device uses it. A method that is muted or
+    below the log level is bound to a function that does nothing, so disabled log calls do not
+    check the device props or the logger again. The bindings are reset when the device config
+    or the log level changes.
     """
 
+    levels = {
+        "debug": logging.DEBUG,
+        "info": logging.INFO,
+        "warn": logging.WARNING,
+        "warning": logging.WARNING,
+        "error": logging.ERROR,
+        "exception": logging.ERROR,
+        "critical": logging.CRITICAL
+    }
+
     def __init__(self, shelly):
         self.logger = logging.getLogger("Plugin.ShellyMQTT")
         self.shelly = shelly
 
     def __getattr__(self, method):
-        def handler(*args, **kwargs):
+        # Only called for methods that have not been bound yet
+        handler = getattr(self.logger, method)
+        level = self.levels.get(method, None)
+        if level is not None:
             # Only allow the device to log if:
-            # a) The device is not muted
-            # or
-            # b) The method is not in the list of logging methods that should be muted
-            if not self.shelly.isMuted() or method not in self.shelly.getMutedLoggingMethods():
-                getattr(self.logger, method)(*args, **kwargs)
-
+            # a) The level is enabled
+            # and
+            # b) The device is not muted or the method is not in the list of logging methods that should be muted
+            if not self.logger.isEnabledFor(level) or (self.shelly.isMuted() and method in self.shelly.getMutedLoggingMethods()):
+                handler = self.discard
+            self.__dict__[method] = handler
         return handler
+
+    @staticmethod
+    def discard(*args, **kwargs):
+        """
+        The logging method used when a message would not be logged.
+
+        :return: None
+        """
+
+        pass
+
+    def reset(self):
+        """
+        Forgets the bound logging methods so that they are bound again on their next use.
+
+        :return: None
+        """
+
+        for method in self.levels:
+            self.__dict__.pop(method, None)
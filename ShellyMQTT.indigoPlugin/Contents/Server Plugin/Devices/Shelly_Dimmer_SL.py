@@ -31,45 +31,102 @@ class Shelly_Dimmer_SL(Shelly_1PM):
                 "{}/input_event/{}".format(address, self.getChannel())
             ]
 
-    def handleMessage(self, topic, payload):
+    def getTopicHandlers(self):
         """
-        This method is called when a message comes in and matches one of this devices subscriptions.
+        Builds the mapping of topics to the methods that handle them.
 
-        :param topic: The topic of the message.
-        :param payload: THe payload of the message.
+        :return: A dictionary of topic -> handler.
+        """
+
+        address = self.getAddress()
+        handlers = Shelly_1PM.getTopicHandlers(self)
+        # The dimmer reports on "light" topics where the 1PM reports on "relay" topics
+        relayTopic = "{}/relay/".format(address)
+        for topic, handler in handlers.items():
+            if topic.startswith(relayTopic):
+                handlers["{}/light/{}".format(address, topic[len(relayTopic):])] = handler
+        handlers.update({
+            "{}/light/{}/status".format(address, self.getChannel()): self.processLightStatus,
+            "{}/overload".format(address): self.processOverload
+        })
+        return handlers
+
+    def getCriticalTopics(self):
+        """
+        Getter for the topics that carry control and input messages.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        topics = Shelly_1PM.getCriticalTopics(self)
+        relayTopic = "{}/relay/".format(address)
+        for topic in list(topics):
+            if topic.startswith(relayTopic):
+                topics.append("{}/light/{}".format(address, topic[len(relayTopic):]))
+        return topics + [
+            "{}/light/{}/status".format(address, self.getChannel()),
+            "{}/overload".format(address)
+        ]
+
+    def getTelemetryTopics(self):
+        """
+        Getter for the topics that only carry readings, which can be coalesced.
+
+        :return: A list of topics.
+        """
+
+        address = self.getAddress()
+        topics = Shelly_1PM.getTelemetryTopics(self)
+        relayTopic = "{}/relay/".format(address)
+        for topic in list(topics):
+            if topic.startswith(relayTopic):
+                topics.append("{}/light/{}".format(address, topic[len(relayTopic):]))
+        return topics
+
+    def processLightStatus(self, payload):
+        """
+        Handles the status of the light.
+
+        :param payload: A json-formatted string containing the light status.
         :return: None
         """
 
-        if topic == "{}/light/{}/status".format(self.getAddress(), self.getChannel()):
-            # the payload will be json in the form: {"ison": true/false, "mode": "white", "brightness": x}
-            try:
-                payload = json.loads(payload)
-                if payload['ison']:
-                    # we will accept a brightness value and save it
-
-                    if self.isOff():
-                        # self.logger.info(u"\"{}\" on to {}%".format(self.device.name, payload['brightness']))
-                        self.logCommandReceived(u"brightness to {}%".format(payload['brightness']))
-                    elif self.device.states['brightnessLevel'] != payload['brightness']:
-                        # Brightness will change
-                        # self.logger.info(u"\"{}\" set to {}%".format(self.device.name, payload['brightness']))
-                        self.logCommandReceived(u"brightness to {}%".format(payload['brightness']))
-
-                    self.applyBrightness(payload['brightness'])
-                else:
-                    # The light should be off regardless of a reported brightness value
-                    if not self.isOff():
-                        self.logCommandReceived("off")
-                    self.turnOff()
-            except ValueError:
-                self.logger.error(u"Problem parsing JSON: {}".format(payload))
-        elif topic == "{}/overload".format(self.getAddress()):
-            overloaded = (payload == '1')
-            if not self.device.states['overload'] and overloaded:
-                self.logger.error(u"\"{}\" was overloaded!".format(self.device.name))
-            self.device.updateStateOnServer('overload', overloaded)
-        else:
-            Shelly_1PM.handleMessage(self, topic.replace("light", "relay"), payload)
+        # the payload will be json in the form: {"ison": true/false, "mode": "white", "brightness": x}
+        try:
+            payload = self.loadJson(payload)
+            if payload['ison']:
+                # we will accept a brightness value and save it
+
+                if self.isOff():
+                    # self.logger.info(u"\"{}\" on to {}%".format(self.device.name, payload['brightness']))
+                    self.logCommandReceived(u"brightness to {}%".format(payload['brightness']))
+                elif self.getState('brightnessLevel') != payload['brightness']:
+                    # Brightness will change
+                    # self.logger.info(u"\"{}\" set to {}%".format(self.device.name, payload['brightness']))
+                    self.logCommandReceived(u"brightness to {}%".format(payload['brightness']))
+
+                self.applyBrightness(payload['brightness'])
+            else:
+                # The light should be off regardless of a reported brightness value
+                if not self.isOff():
+                    self.logCommandReceived("off")
+                self.turnOff()
+        except ValueError:
+            self.logger.error(u"Problem parsing JSON: {}".format(payload))
+
+    def processOverload(self, payload):
+        """
+        Handles the overload flag of the device.
+
+        :param payload: Either "1" or "0".
+        :return: None
+        """
+
+        overloaded = (payload == '1')
+        if not self.getState('overload') and overloaded:
+            self.logger.error(u"\"{}\" was overloaded!".format(self.device.name))
+        self.updateStateOnServer('overload', overloaded)
 
     def handleAction(self, action):
         """
@@ -133,7 +190,7 @@ class Shelly_Dimmer_SL(Shelly_1PM):
         """
 
         if brightness > 0:
-            # if self.device.states['brightnessLevel'] != brightness:
+            # if self.getState('brightnessLevel') != brightness:
             #     if self.isOn():
             #         self.logger.info(u"\"{}\" set to {}%".format(self.device.name, brightness))
             #     else:
@@ -142,7 +199,7 @@ class Shelly_Dimmer_SL(Shelly_1PM):
         else:
             self.turnOff()
 
-        self.device.updateStateOnServer("brightnessLevel", brightness)
+        self.updateStateOnServer("brightnessLevel", brightness)
 
     def set(self):
         """
@@ -151,7 +208,7 @@ class Shelly_Dimmer_SL(Shelly_1PM):
         :return: None
         """
 
-        brightness = self.device.states.get('brightnessLevel', 0)
+        brightness = self.getState('brightnessLevel', 0)
         turn = "on" if self.isOn() else "off"
         payload = {
             "turn": turn,
@@ -166,7 +223,7 @@ class Shelly_Dimmer_SL(Shelly_1PM):
         :return: None
         """
 
-        self.device.updateStateOnServer(key='onOffState', value=True)
+        self.updateStateOnServer(key='onOffState', value=True)
         self.updateStateImage()
 
     def updateStateImage(self):
@@ -177,9 +234,9 @@ class Shelly_Dimmer_SL(Shelly_1PM):
         """
 
         if self.isOn():
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.DimmerOn)
+            self.updateStateImageOnServer(indigo.kStateImageSel.DimmerOn)
         else:
-            self.device.updateStateImageOnServer(indigo.kStateImageSel.DimmerOff)
+            self.updateStateImageOnServer(indigo.kStateImageSel.DimmerOff)
 
     @staticmethod
     def validateConfigUI(valuesDict, typeId, devId):
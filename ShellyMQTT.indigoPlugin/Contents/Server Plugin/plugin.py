@@ -1,223 +1,188 @@
 import indigo
 import json
 import os
-
-# Import the relay devices
-from Devices.Relays.Shelly_1 import Shelly_1
-from Devices.Relays.Shelly_1PM import Shelly_1PM
-from Devices.Relays.Shelly_2_5_Relay import Shelly_2_5_Relay
-from Devices.Relays.Shelly_4_Pro import Shelly_4_Pro
-from Devices.Relays.Shelly_EM_Relay import Shelly_EM_Relay
-from Devices.Relays.Shelly_Uni_Relay import Shelly_Uni_Relay
-
-from Devices.Shelly_Dimmer_SL import Shelly_Dimmer_SL
-
-# Import the RGBW2 devices
-from Devices.RGBW2.Shelly_RGBW2_White import Shelly_RGBW2_White
-from Devices.RGBW2.Shelly_RGBW2_Color import Shelly_RGBW2_Color
-
-# Import the sensor devices
-from Devices.Sensors.Shelly_HT import Shelly_HT
-from Devices.Sensors.Shelly_Flood import Shelly_Flood
-from Devices.Sensors.Shelly_Door_Window import Shelly_Door_Window
-from Devices.Sensors.Shelly_EM_Meter import Shelly_EM_Meter
-from Devices.Sensors.Shelly_3EM_Meter import Shelly_3EM_Meter
-from Devices.Sensors.Shelly_i3 import Shelly_i3
-from Devices.Sensors.Shelly_Button1 import Shelly_Button1
-from Devices.Sensors.Shelly_Gas import Shelly_Gas
-from Devices.Sensors.Shelly_Uni_Input import Shelly_Uni_Input
-from Devices.Sensors.Shelly_Motion import Shelly_Motion
-
-# Import the bulb devices
-from Devices.Bulbs.Shelly_Bulb import Shelly_Bulb
-from Devices.Bulbs.Shelly_Bulb_Vintage import Shelly_Bulb_Vintage
-from Devices.Bulbs.Shelly_Bulb_Duo import Shelly_Bulb_Duo
-
-# Import the plug devices
-from Devices.Plugs.Shelly_Plug import Shelly_Plug
-from Devices.Plugs.Shelly_Plug_S import Shelly_Plug_S
-
-# Import the add-on devices
-from Devices.Addons.Shelly_Addon_DS1820 import Shelly_Addon_DS1820
-from Devices.Addons.Shelly_Addon_DHT22 import Shelly_Addon_DHT22
-from Devices.Addons.Shelly_Addon_Detached_Switch import Shelly_Addon_Detached_Switch
-
-from Queue import Queue
+import time
+from collections import OrderedDict
+
+from Devices.PhysicalDevice import PhysicalDevice
+
+from Core.AnnounceScheduler import AnnounceScheduler
+from Core.DeviceMigrator import DeviceMigrator
+from Core.DeviceRegistry import DeviceRegistry
+from Core.JsonPayload import JsonPayload
+from Core.LogPipeline import LogPipeline
+from Core.MessageQueue import MessageQueue
+from Core.MessageTypeIndex import MessageTypeIndex
+from Core.StateSnapshot import StateSnapshot
+from Core.TelemetryCoalescer import TelemetryCoalescer
+from Core.TieredQueue import TieredQueue
+from Core.TriggerIndex import TriggerIndex
+from Core.WorkerPool import WorkerPool
 import logging
 
-kCurDevVersion = 0  # current version of plugin devices
-
-# Maps each device type to a python class for the device
-deviceClasses = {
-    # Relay devices
-    "shelly-1": Shelly_1,
-    "shelly-1pm": Shelly_1PM,
-    "shelly-2-5-relay": Shelly_2_5_Relay,
-    "shelly-4-pro": Shelly_4_Pro,
-    "shelly-em-relay": Shelly_EM_Relay,
-
-    # RGBW2 devices
-    "shelly-rgbw2-white": Shelly_RGBW2_White,
-    "shelly-rgbw2-color": Shelly_RGBW2_Color,
-
-    # Sensor devices
-    "shelly-ht": Shelly_HT,
-    "shelly-flood": Shelly_Flood,
-    "shelly-door-window": Shelly_Door_Window,
-    "shelly-em-meter": Shelly_EM_Meter,
-    "shelly-3em-meter": Shelly_3EM_Meter,
-    "shelly-i3": Shelly_i3,
-    "shelly-button1": Shelly_Button1,
-    "shelly-gas": Shelly_Gas,
-    "shelly-motion": Shelly_Motion,
-
-    # Bulb devices
-    "shelly-bulb": Shelly_Bulb,
-    "shelly-bulb-vintage": Shelly_Bulb_Vintage,
-    "shelly-bulb-duo": Shelly_Bulb_Duo,
-
-    # Plug devices
-    "shelly-plug": Shelly_Plug,
-    "shelly-plug-s": Shelly_Plug_S,
-
-    # Add-on devices
-    "shelly-addon-ds1820": Shelly_Addon_DS1820,
-    "shelly-addon-dht22": Shelly_Addon_DHT22,
-    "shelly-addon-detached-switch": Shelly_Addon_Detached_Switch,
-
-    # Shelly Dimmer
-    "shelly-dimmer-sl": Shelly_Dimmer_SL,
-    
-    # Shelly Uni
-    "shelly-uni-relay": Shelly_Uni_Relay,
-    "shelly-uni-input": Shelly_Uni_Input
-}
-
-deviceModelInformation = {
+kInputEventSaveInterval = 60  # seconds between writes of the input event counters to the device props
+kSnapshotSaveInterval = 300  # seconds between writes of the state snapshot
+kLogQueueSize = 1000  # device log records that can wait to be written before more are suppressed
+kDefaultMessageQueueCapacity = 10000  # messages that can wait to be handled before telemetry is dropped
+kDefaultAnnounceRate = 10  # announce commands sent per second while devices are starting
+kAnnounceBurst = 10  # announce commands that can be sent at once before they are paced
+kAnnounceJitter = 0.5  # fraction of the interval between announce commands that is randomised
+
+# Describes each device type: the module of the python class for the device, the device types
+# whose devices can be used as a template for it and the categories of addons it can host
+# The module is only imported once a device of the type is used
+deviceModels = DeviceRegistry({
     # Relay devices
     "shelly-1": {
-        "class": Shelly_1,
-        "relations": []
+        "module": "Devices.Relays.Shelly_1",
+        "relations": [],
+        "addons": ["ds1820", "dht22", "detached-switch"]
     },
     "shelly-1pm": {
-        "class": Shelly_1PM,
-        "relations": []
+        "module": "Devices.Relays.Shelly_1PM",
+        "relations": [],
+        "addons": ["ds1820", "dht22", "detached-switch"]
     },
     "shelly-2-5-relay": {
-        "class": Shelly_2_5_Relay,
-        "relations": [Shelly_2_5_Relay]
+        "module": "Devices.Relays.Shelly_2_5_Relay",
+        "relations": ["shelly-2-5-relay"],
+        "addons": ["detached-switch"]
     },
     "shelly-4-pro": {
-        "class": Shelly_4_Pro,
-        "relations": [Shelly_4_Pro]
+        "module": "Devices.Relays.Shelly_4_Pro",
+        "relations": ["shelly-4-pro"],
+        "addons": ["detached-switch"]
     },
     "shelly-em-relay": {
-        "class": Shelly_EM_Relay,
-        "relations": [Shelly_EM_Meter, Shelly_3EM_Meter]
+        "module": "Devices.Relays.Shelly_EM_Relay",
+        "relations": ["shelly-em-meter", "shelly-3em-meter"],
+        "addons": []
     },
 
     # RGBW2 devices
     "shelly-rgbw2-white": {
-        "class": Shelly_RGBW2_White,
-        "relations": [Shelly_RGBW2_White]
+        "module": "Devices.RGBW2.Shelly_RGBW2_White",
+        "relations": ["shelly-rgbw2-white"],
+        "addons": []
     },
     "shelly-rgbw2-color": {
-        "class": Shelly_RGBW2_Color,
-        "relations": []
+        "module": "Devices.RGBW2.Shelly_RGBW2_Color",
+        "relations": [],
+        "addons": []
     },
 
     # Sensor devices
     "shelly-ht": {
-        "class": Shelly_HT,
-        "relations": []
+        "module": "Devices.Sensors.Shelly_HT",
+        "relations": [],
+        "addons": []
     },
     "shelly-flood": {
-        "class": Shelly_Flood,
-        "relations": []
+        "module": "Devices.Sensors.Shelly_Flood",
+        "relations": [],
+        "addons": []
     },
     "shelly-door-window": {
-        "class": Shelly_Door_Window,
-        "relations": []
+        "module": "Devices.Sensors.Shelly_Door_Window",
+        "relations": [],
+        "addons": []
     },
     "shelly-em-meter": {
-        "class": Shelly_EM_Meter,
-        "relations": [Shelly_EM_Meter, Shelly_EM_Relay]
+        "module": "Devices.Sensors.Shelly_EM_Meter",
+        "relations": ["shelly-em-meter", "shelly-em-relay"],
+        "addons": []
     },
     "shelly-3em-meter": {
-        "class": Shelly_3EM_Meter,
-        "relations": [Shelly_3EM_Meter, Shelly_EM_Relay]
+        "module": "Devices.Sensors.Shelly_3EM_Meter",
+        "relations": ["shelly-3em-meter", "shelly-em-relay"],
+        "addons": []
     },
     "shelly-i3": {
-        "class": Shelly_i3,
-        "relations": [Shelly_i3]
+        "module": "Devices.Sensors.Shelly_i3",
+        "relations": ["shelly-i3"],
+        "addons": []
     },
     "shelly-button1": {
-        "class": Shelly_Button1,
-        "relations": []
+        "module": "Devices.Sensors.Shelly_Button1",
+        "relations": [],
+        "addons": []
     },
     "shelly-gas": {
-        "class": Shelly_Gas,
-        "relations": []
+        "module": "Devices.Sensors.Shelly_Gas",
+        "relations": [],
+        "addons": []
     },
     "shelly-motion": {
-        "class": Shelly_Motion,
-        "relations": []
+        "module": "Devices.Sensors.Shelly_Motion",
+        "relations": [],
+        "addons": []
     },
 
     # Bulb devices
     "shelly-bulb": {
-        "class": Shelly_Bulb,
-        "relations": []
+        "module": "Devices.Bulbs.Shelly_Bulb",
+        "relations": [],
+        "addons": []
     },
     "shelly-bulb-vintage": {
-        "class": Shelly_Bulb_Vintage,
-        "relations": []
+        "module": "Devices.Bulbs.Shelly_Bulb_Vintage",
+        "relations": [],
+        "addons": []
     },
     "shelly-bulb-duo": {
-        "class": Shelly_Bulb_Duo,
-        "relations": []
+        "module": "Devices.Bulbs.Shelly_Bulb_Duo",
+        "relations": [],
+        "addons": []
     },
 
     # Plug devices
     "shelly-plug": {
-        "class": Shelly_Plug,
-        "relations": []
+        "module": "Devices.Plugs.Shelly_Plug",
+        "relations": [],
+        "addons": []
     },
     "shelly-plug-s": {
-        "class": Shelly_Plug_S,
-        "relations": []
+        "module": "Devices.Plugs.Shelly_Plug_S",
+        "relations": [],
+        "addons": []
     },
 
     # Add-on devices
     "shelly-addon-ds1820": {
-        "class": Shelly_Addon_DS1820,
-        "relations": []
+        "module": "Devices.Addons.Shelly_Addon_DS1820",
+        "relations": [],
+        "addons": []
     },
     "shelly-addon-dht22": {
-        "class": Shelly_Addon_DHT22,
-        "relations": []
+        "module": "Devices.Addons.Shelly_Addon_DHT22",
+        "relations": [],
+        "addons": []
     },
     "shelly-addon-detached-switch": {
-        "class": Shelly_Addon_Detached_Switch,
-        "relations": []
+        "module": "Devices.Addons.Shelly_Addon_Detached_Switch",
+        "relations": [],
+        "addons": []
     },
 
     # Shelly Dimmer
     "shelly-dimmer-sl": {
-        "class": Shelly_Dimmer_SL,
-        "relations": []
+        "module": "Devices.Shelly_Dimmer_SL",
+        "relations": [],
+        "addons": ["detached-switch"]
     },
 
     # Shelly Uni
     "shelly-uni-relay": {
-        "class": Shelly_Uni_Relay,
-        "relations": [Shelly_Uni_Relay, Shelly_Uni_Input]
+        "module": "Devices.Relays.Shelly_Uni_Relay",
+        "relations": ["shelly-uni-relay", "shelly-uni-input"],
+        "addons": ["ds1820", "dht22"]
     },
     "shelly-uni-input": {
-        "class": Shelly_Uni_Input,
-        "relations": [Shelly_Uni_Input, Shelly_Uni_Relay]
+        "module": "Devices.Sensors.Shelly_Uni_Input",
+        "relations": ["shelly-uni-input", "shelly-uni-relay"],
+        "addons": ["ds1820", "dht22"]
     }
-}
+})
 
 
 class Plugin(indigo.PluginBase):
@@ -225,8 +190,6 @@ class Plugin(indigo.PluginBase):
     def __init__(self, pluginId, pluginDisplayName, pluginVersion, pluginPrefs):
         indigo.PluginBase.__init__(self, pluginId, pluginDisplayName, pluginVersion, pluginPrefs)
 
-        # self.debug = pluginPrefs.get("debugMode", False)
-        self.setLogLevel(pluginPrefs.get('log-level', "info"))
         self.lowBatteryThreshold = pluginPrefs.get("low-battery-threshold", 20)
 
         # {
@@ -235,6 +198,9 @@ class Plugin(indigo.PluginBase):
         # }
         self.shellyDevices = {}
 
+        # self.debug = pluginPrefs.get("debugMode", False)
+        self.setLogLevel(pluginPrefs.get('log-level', "info"))
+
         # {
         #   devId: <Indigo device id>,
         #   anotherDevId: <Shelly object>
@@ -243,6 +209,18 @@ class Plugin(indigo.PluginBase):
         # For example, a temperature addon being started before its host device
         self.dependents = {}
 
+        # {
+        #   <hostId>: set([<addonId>, <anotherAddonId>])
+        # }
+        # This is used to find the addons of a host, including addons waiting for their host to start
+        self.hostAddons = {}
+
+        # {
+        #     (<brokerId>, <address>): <PhysicalDevice object>
+        # }
+        # This is used to handle the topics that are shared by the channels of a unit only once
+        self.physicalDevices = {}
+
         # {
         #   <brokerId>: {
         #       'some/topic': [dev1, dev2, dev3],
@@ -255,6 +233,13 @@ class Plugin(indigo.PluginBase):
         # }
         self.brokerDeviceSubscriptions = {}
 
+        # {
+        #     (<brokerId>, <identifier>): [<deviceId>, ...]
+        # }
+        # This is used to deliver an announcement only to the devices it belongs to.
+        # The identifier is the last part of the device address.
+        self.announcementSubscriptions = {}
+
         # {
         #     <brokerId>: {
         #         id: {id, mac, ip, fw_ver, new_fw}
@@ -263,9 +248,56 @@ class Plugin(indigo.PluginBase):
         # This is used to store the latest announcement message for each device that
         # has broadcast on a broker
         self.discoveredDevices = {}
-        self.triggers = {}
-        self.messageTypes = []
-        self.messageQueue = Queue()
+
+        # {
+        #     devId: {'temperature-sensors': [...], 'humidity-sensors': [...]}
+        # }
+        # This is used to store the snapshot of devices that are not running, either restored from
+        # the last run until the device starts or kept from a device that has stopped
+        self.deviceSnapshots = {}
+        self.stateSnapshot = StateSnapshot(os.path.join(indigo.server.getInstallFolderPath(), "Preferences", "Plugins", "{}.snapshot.json".format(pluginId)))
+        self.snapshotSavedAt = time.time()
+        self.triggerIndex = TriggerIndex()
+        self.messageTypes = MessageTypeIndex()
+        self.messageQueue = MessageQueue()
+        self.workerPool = None  # Only used when messages are handled on worker threads
+        self.messageQueueCapacity = kDefaultMessageQueueCapacity  # Messages that can wait to be handled, 0 for no limit
+        self.queueSaturated = False  # True while messages are being dropped
+        self.droppedMessages = 0  # Messages that had been dropped at the end of the last pass
+        self.telemetryCoalescer = TelemetryCoalescer()
+        self.announceScheduler = AnnounceScheduler(kDefaultAnnounceRate, kAnnounceBurst, kAnnounceJitter)
+        self.inputEventsSavedAt = time.time()
+        self.logPipeline = LogPipeline(self.logger, kLogQueueSize)  # Writes the device log records off the message threads
+
+        # Migrations that bring devices up to the current version, in the order they were added
+        self.deviceMigrator = DeviceMigrator([
+            self.migrateDeviceType
+        ])
+        self.startedAt = time.time()  # When the plugin started, used to log the startup time
+
+        # Counters for the devices that were migrated when they started
+        self.migrationStatistics = {
+            'migrated': 0,
+            'seconds': 0.0
+        }
+
+        # Counters for the calls made to fetch queued messages from the MQTT Connector and the device refreshes
+        self.messageStatistics = {
+            'fetches': 0,
+            'empty-fetches': 0,
+            'deferred-fetches': 0,
+            'critical-messages': 0,
+            'bulk-messages': 0,
+            'shared-messages': 0,
+            'dropped-critical-messages': 0,
+            'dropped-bulk-messages': 0,
+            'saturations': 0,
+            'refreshes': 0,
+            'refreshes-avoided': 0,
+            'input-event-saves': 0,
+            'snapshot-saves': 0
+        }
+
         self.mqttPlugin = indigo.server.getPlugin("com.flyingdiver.indigoplugin.mqtt")
 
     def startup(self):
@@ -275,10 +307,17 @@ class Plugin(indigo.PluginBase):
         :return: None
         """
 
+        self.startedAt = time.time()
         if not self.mqttPlugin:
             self.logger.error(u"MQTT Connector plugin is required!!")
             exit(-1)
+        self.logPipeline.install(logging.getLogger("Plugin.ShellyMQTT"))
+        self.restoreSnapshot()
         indigo.server.subscribeToBroadcast(u"com.flyingdiver.indigoplugin.mqtt", u"com.flyingdiver.indigoplugin.mqtt-message_queued", "message_handler")
+        self.messageQueueCapacity = int(self.pluginPrefs.get('message-queue-capacity', kDefaultMessageQueueCapacity))
+        self.startWorkerPool(int(self.pluginPrefs.get('message-workers', 0)), self.messageQueueCapacity)
+        self.telemetryCoalescer.setWindow(int(self.pluginPrefs.get('telemetry-window', 0)) / 1000.0)
+        self.announceScheduler.rate = int(self.pluginPrefs.get('announce-rate', kDefaultAnnounceRate))
 
         # Subscribe to trigger changes so we can examine "Topic Component Match" events
         indigo.triggers.subscribeToChanges()
@@ -288,7 +327,7 @@ class Plugin(indigo.PluginBase):
             if self.isMQTTConnectorTopicMatchTrigger(trigger) and trigger.enabled:
                 messageType = trigger.globalProps["com.flyingdiver.indigoplugin.mqtt"].get("message_type", "")
                 if len(messageType) > 0:
-                    self.messageTypes.append(messageType)
+                    self.messageTypes.add(messageType, ("trigger", trigger.id))
 
     def shutdown(self):
         """
@@ -297,6 +336,9 @@ class Plugin(indigo.PluginBase):
         :return: None
         """
 
+        self.startWorkerPool(0)
+        self.saveSnapshot()
+        self.logPipeline.stop()
         self.logger.info(u"Stopped ShellyMQTT...")
 
     def runConcurrentThread(self):
@@ -306,18 +348,46 @@ class Plugin(indigo.PluginBase):
         :return: None
         """
 
+        # Indigo starts the devices before the concurrent thread
+        self.logger.info(u"Started {} devices in {:.2f} seconds ({} migrated in {:.2f} seconds)".format(
+            len(self.shellyDevices), time.time() - self.startedAt, self.migrationStatistics['migrated'], self.migrationStatistics['seconds']))
+
         try:
             while True:
                 if not self.mqttPlugin.isEnabled():
                     self.logger.error(u"MQTT Connector plugin not enabled, aborting.")
                     self.sleep(60)
                 else:
+                    # Block until message_handler queues a message, held telemetry or an announce is due or the thread is stopped
+                    if not self.messageQueue.wait(self.getWaitTimeout()):
+                        raise self.StopThread
                     self.processMessages()
-                    self.sleep(0.1)
+                    self.sendAnnounces()
 
         except self.StopThread:
             pass
 
+    def stopConcurrentThread(self):
+        """
+        Called by Indigo when the concurrent thread should stop.
+        The message queue is stopped so that the blocked concurrent thread wakes up.
+
+        :return: None
+        """
+
+        super(Plugin, self).stopConcurrentThread()
+        self.messageQueue.stop()
+
+    def getWaitTimeout(self):
+        """
+        Getter for the time the concurrent thread can wait for messages before it has other work to do.
+
+        :return: The number of seconds to wait, or None if there is nothing to wait for.
+        """
+
+        timeouts = [timeout for timeout in (self.telemetryCoalescer.getTimeout(), self.announceScheduler.getTimeout()) if timeout is not None]
+        return min(timeouts) if timeouts else None
+
     ##########################################################################
     #
     # MARK: Devices
@@ -333,19 +403,16 @@ class Plugin(indigo.PluginBase):
         :return: True or false to indicate if the device was started.
         """
 
-        instanceVers = int(device.pluginProps.get('devVersCount', 0))
-        if instanceVers < kCurDevVersion or kCurDevVersion == 0:
-            device = indigo.device.changeDeviceTypeId(device, device.deviceTypeId)
-            device.replaceOnServer()
-            newProps = device.pluginProps
-            newProps["devVersCount"] = kCurDevVersion
-            device.replacePluginPropsOnServer(newProps)
-            device.stateListOrDisplayStateIdChanged()
-            self.logger.debug(u"%s: Updated to version %s", device.name, kCurDevVersion)
-        elif instanceVers >= kCurDevVersion:
-            self.logger.debug(u"{}: Device Version is up to date".format(device.name))
+        #
+        # Run the migrations the device has not run yet, up to date devices need no calls to the server
+        #
+        if self.deviceMigrator.needsMigration(device):
+            migrationStart = time.time()
+            device = self.deviceMigrator.migrate(device)
+            self.migrationStatistics['migrated'] += 1
+            self.migrationStatistics['seconds'] += time.time() - migrationStart
         else:
-            self.logger.error(u"%s: Unknown device version: %s", device.name, instanceVers)
+            self.logger.debug(u"%s: Device Version is up to date", device.name)
 
         #
         # Get or generate a shelly device
@@ -361,6 +428,7 @@ class Plugin(indigo.PluginBase):
         # Save the device so that the host can trigger it to start later
         #
         if shelly.isAddon():
+            self.addHostedAddon(shelly)
             # Ensure the temperature addon has a host
             if shelly.getHostDevice() is None:
                 # If the host is missing, this device has been started before the host
@@ -368,6 +436,7 @@ class Plugin(indigo.PluginBase):
                     # This device has already been attempted to be started, so it must not have a host defined
                     self.logger.error(u"{} is not properly setup! Check the device host.".format(device.name))
                     del self.dependents[device.id]
+                    self.removeHostedAddon(shelly)
                     return False
                 else:
                     # Could not get a host, but this is the first time the device is starting
@@ -386,6 +455,8 @@ class Plugin(indigo.PluginBase):
             # Ensure the device has a broker and address
             self.logger.error(u"brokerId: \"{}\" address: \"{}\"".format(shelly.getBrokerId(), shelly.getAddress()))
             self.logger.error(u"\"{}\" is not properly setup! Check the broker and topic root.".format(device.name))
+            if shelly.isAddon():
+                self.removeHostedAddon(shelly)
             return False
 
         #
@@ -395,19 +466,30 @@ class Plugin(indigo.PluginBase):
         # shelly.subscribe()
         self.addDeviceSubscriptions(shelly)
         self.shellyDevices[device.id] = shelly
-        self.messageTypes.append(shelly.getMessageType())
-        if shelly.getAnnounceMessageType():
-            self.messageTypes.append(shelly.getAnnounceMessageType())
-
-        # Force the device to announce itself to gather the latest device information
-        shelly.announce()
+        snapshot = self.deviceSnapshots.pop(device.id, None)
+        if snapshot:
+            # Menus such as the addon sensor pickers work before the device reports again
+            shelly.restoreSnapshot(snapshot)
+        for messageType in shelly.getMessageTypes():
+            self.messageTypes.add(messageType, ("device", device.id))
+
+        # Channels of the same physical unit share the messages that report on the unit
+        unit = None
+        if not shelly.isAddon():
+            unit = self.attachPhysicalDevice(shelly)
+
+        # Ask the device to announce itself to gather the latest device information
+        if unit is None or len(unit) == 1:
+            self.scheduleAnnounce(shelly)
+        elif unit.hasAnnounced():
+            # The unit has already announced itself, so the details are passed to the new channel
+            self.dispatchToDevice(shelly, False, shelly.applyAnnouncement, unit.details)
 
         #
         # Attempt to start any addon devices that this device hosts
         #
-        for dependentId in self.dependents.keys():
-            addon = self.dependents[dependentId]
-            if addon.isAddon() and addon.getHostDevice() and addon.getHostDevice().device.id == shelly.device.id:
+        for dependentId in list(self.hostAddons.get(device.id, [])):
+            if dependentId in self.dependents:
                 # This addon is hosted by the device that has just been started, so it must have failed startup before
                 del self.dependents[dependentId]
                 self.deviceStartComm(indigo.devices[dependentId])
@@ -416,6 +498,20 @@ class Plugin(indigo.PluginBase):
         if shelly.isAddon():
             shelly.refreshAddressColumn()
 
+    def migrateDeviceType(self, device):
+        """
+        Device migration 1: Reloads the device type so the device picks up the states and display
+        state that are defined in Devices.xml.
+
+        :param device: The device to migrate.
+        :return: The migrated device.
+        """
+
+        device = indigo.device.changeDeviceTypeId(device, device.deviceTypeId)
+        device.replaceOnServer()
+        device.stateListOrDisplayStateIdChanged()
+        return device
+
     def deviceStopComm(self, device):
         """
         Handles processes for a device that has been told to stop communication.
@@ -427,27 +523,44 @@ class Plugin(indigo.PluginBase):
         """
 
         if device.id not in self.shellyDevices:
+            # An addon that is waiting for its host to start no longer needs to be started by the host
+            addon = self.dependents.pop(device.id, None)
+            if addon is not None:
+                self.removeHostedAddon(addon)
             return
         self.logger.info(u"Stopping \"%s\"...", device.name)
 
         shelly = self.shellyDevices[device.id]  # The shelly object for this device
+        if shelly.saveLastInputEventId():
+            self.messageStatistics['input-event-saves'] += 1
 
         #
         # See if any add-ons are connected
         #
-        for addonDev in self.shellyDevices.keys():
-            addon_shelly = self.shellyDevices[addonDev]
-            if addon_shelly.isAddon() and addon_shelly.getHostDevice().device.id == shelly.device.id:
+        for addonId in list(self.hostAddons.get(device.id, [])):
+            addon_shelly = self.shellyDevices.get(addonId, None)
+            if addon_shelly:
                 # Save and stop dependents because these should be started when this device starts again
                 self.dependents[addon_shelly.device.id] = addon_shelly
                 self.deviceStopComm(addon_shelly.device)
 
+        # Addons that are not waiting for their host to start again are no longer hosted
+        if shelly.isAddon() and device.id not in self.dependents:
+            self.removeHostedAddon(shelly)
+
+        unit = shelly.physicalDevice
+        if unit is not None:
+            self.detachPhysicalDevice(shelly)
+
+        # The announce is still needed by the other channels of the unit
+        if self.announceScheduler.discard(device.id) and unit is not None and len(unit) > 0:
+            self.scheduleAnnounce(unit.getChannels()[0])
+
         #
         # Remove subscriptions and message handlers
         #
         self.removeDeviceSubscriptions(shelly)
-        for message_type in shelly.getMessageTypes():
-            self.messageTypes.remove(message_type)
+        self.messageTypes.removeHolder(("device", device.id))
 
         #
         # Attempt to unsubscribe from topics that are no longer being listened to
@@ -478,6 +591,10 @@ class Plugin(indigo.PluginBase):
                     topic = topic[2:]
                 del brokerSubscriptions[topic]
 
+        # Indigo stops the devices before shutdown is called, so the snapshot is kept for the next save
+        snapshot = shelly.getSnapshot()
+        if snapshot:
+            self.deviceSnapshots[device.id] = snapshot
         del self.shellyDevices[device.id]
 
     def didDeviceCommPropertyChange(self, origDev, newDev):
@@ -495,7 +612,7 @@ class Plugin(indigo.PluginBase):
         :return: True or false whether the device had the communication properties changed.
         """
 
-        deviceClass = deviceClasses.get(newDev.deviceTypeId, None)
+        deviceClass = deviceModels.get(newDev.deviceTypeId, None)
         if deviceClass:
             return deviceClass.didCommPropertyChange(origDev, newDev)
 
@@ -524,13 +641,21 @@ class Plugin(indigo.PluginBase):
         # Get the corresponding shelly device
         shelly = self.shellyDevices.get(origDev.id, None)
 
+        # State updates, including the ones made by our own handlers, do not need a refresh
+        if not self.didDeviceConfigChange(origDev, newDev):
+            self.messageStatistics['refreshes-avoided'] += 1
+            return
+
         # Refresh the associated indigo device
         if shelly:
             shelly.refresh_device()
+            self.messageStatistics['refreshes'] += 1
 
-        # Refresh the address column of addon devices that this device hosts
-        for dev in self.shellyDevices.values():
-            if dev.isAddon() and dev.getHostDevice() == shelly:
+        # Refresh the config and address column of addon devices that this device hosts
+        for addonId in self.hostAddons.get(origDev.id, []):
+            dev = self.shellyDevices.get(addonId, None)
+            if dev:
+                dev.resetConfig()
                 dev.refreshAddressColumn()
 
     def addDeviceSubscriptions(self, shelly):
@@ -555,6 +680,12 @@ class Plugin(indigo.PluginBase):
             brokerSubscriptions[topic].append(shelly.device.id)
             # self.logger.debug(u"Added '%s' to '%s' on '%s'", shelly.device.name, topic, indigo.devices[shelly.getBrokerId()].name)
 
+        if "shellies/announce" in subscriptions:
+            key = self.getAnnouncementKey(shelly)
+            if key not in self.announcementSubscriptions:
+                self.announcementSubscriptions[key] = []
+            self.announcementSubscriptions[key].append(shelly.device.id)
+
     def removeDeviceSubscriptions(self, shelly):
         """
         Removes a Shelly device from the dictionary of device subscriptions.
@@ -576,6 +707,119 @@ class Plugin(indigo.PluginBase):
             if len(brokerSubscriptions) == 0:
                 del self.brokerDeviceSubscriptions[shelly.getBrokerId()]
 
+        if "shellies/announce" in shelly.getSubscriptions():
+            key = self.getAnnouncementKey(shelly)
+            if key in self.announcementSubscriptions and shelly.device.id in self.announcementSubscriptions[key]:
+                self.announcementSubscriptions[key].remove(shelly.device.id)
+                if len(self.announcementSubscriptions[key]) == 0:
+                    del self.announcementSubscriptions[key]
+
+    @staticmethod
+    def didDeviceConfigChange(origDev, newDev):
+        """
+        Helper method to determine if a device update changed more than the device states.
+
+        :param origDev: The device before updates.
+        :param newDev: The device after updates.
+        :return: True if the name or the plugin props of the device changed.
+        """
+
+        if origDev.name != newDev.name:
+            return True
+        return dict(origDev.pluginProps) != dict(newDev.pluginProps)
+
+    def addHostedAddon(self, addon):
+        """
+        Adds an addon device to the index of the addons of its host.
+
+        :param addon: The Shelly addon device.
+        :return: None
+        """
+
+        hostId = addon.getHostId()
+        if hostId is not None:
+            self.hostAddons.setdefault(hostId, set()).add(addon.device.id)
+
+    def removeHostedAddon(self, addon):
+        """
+        Removes an addon device from the index of the addons of its host.
+
+        :param addon: The Shelly addon device.
+        :return: None
+        """
+
+        addons = self.hostAddons.get(addon.getHostId(), None)
+        if addons is not None:
+            addons.discard(addon.device.id)
+            if not addons:
+                del self.hostAddons[addon.getHostId()]
+
+    def attachPhysicalDevice(self, shelly):
+        """
+        Adds a device to the physical unit it is a channel of, creating the unit for its first channel.
+
+        :param shelly: The Shelly device.
+        :return: The PhysicalDevice object.
+        """
+
+        key = PhysicalDevice.getKey(shelly)
+        unit = self.physicalDevices.get(key, None)
+        if unit is None:
+            unit = PhysicalDevice(*key)
+            self.physicalDevices[key] = unit
+        unit.attach(shelly)
+        return unit
+
+    def detachPhysicalDevice(self, shelly):
+        """
+        Removes a device from its physical unit, forgetting the unit once it has no channels.
+
+        :param shelly: The Shelly device.
+        :return: None
+        """
+
+        unit = shelly.physicalDevice
+        if unit.detach(shelly) == 0:
+            self.physicalDevices.pop(unit.getDispatchKey(), None)
+
+    def scheduleAnnounce(self, shelly):
+        """
+        Schedules the command that asks a device to announce itself. The commands are paced so that
+        starting many devices at once does not flood the broker.
+
+        :param shelly: The Shelly device.
+        :return: None
+        """
+
+        if not self.announceScheduler.isEnabled():
+            shelly.announce()
+        elif self.announceScheduler.put(shelly.device.id, shelly):
+            # The concurrent thread may be waiting without a timeout
+            self.messageQueue.wake()
+
+    def sendAnnounces(self):
+        """
+        Sends the scheduled announce commands that are due.
+
+        :return: None
+        """
+
+        for deviceId, shelly in self.announceScheduler.flush():
+            if self.debugLogging:
+                self.logger.debug(u"Asking \"%s\" to announce itself", shelly.device.name)
+            shelly.announce()
+
+    @staticmethod
+    def getAnnouncementKey(shelly):
+        """
+        Builds the key used to look up the devices that an announcement belongs to.
+
+        :param shelly: The Shelly device.
+        :return: A tuple of the form (brokerId, identifier).
+        """
+
+        return shelly.getBrokerId(), shelly.getAddress().split('/')[-1]
+
     def actionControlDevice(self, action, device):
         """
         Handles an action being performed on the device.
@@ -619,7 +863,7 @@ class Plugin(indigo.PluginBase):
         if self.isMQTTConnectorTopicMatchTrigger(trigger) and trigger.enabled:
             messageType = trigger.globalProps["com.flyingdiver.indigoplugin.mqtt"].get("message_type", "")
             if len(messageType) > 0:
-                self.messageTypes.append(messageType)
+                self.messageTypes.add(messageType, ("trigger", trigger.id))
 
     def triggerDeleted(self, trigger):
         """
@@ -630,10 +874,7 @@ class Plugin(indigo.PluginBase):
         """
 
         super(Plugin, self).triggerDeleted(trigger)
-        if self.isMQTTConnectorTopicMatchTrigger(trigger) and trigger.enabled:
-            messageType = trigger.globalProps["com.flyingdiver.indigoplugin.mqtt"].get("message_type", "")
-            if len(messageType) > 0:
-                self.messageTypes.remove(messageType)
+        self.messageTypes.removeHolder(("trigger", trigger.id))
 
     def triggerStartProcessing(self, trigger):
         """
@@ -643,7 +884,7 @@ class Plugin(indigo.PluginBase):
         :return:
         """
 
-        self.triggers[trigger.id] = trigger
+        self.triggerIndex.add(trigger)
 
     def triggerStopProcessing(self, trigger):
         """
@@ -653,7 +894,7 @@ class Plugin(indigo.PluginBase):
         :return:
         """
 
-        del self.triggers[trigger.id]
+        self.triggerIndex.remove(trigger.id)
 
     def triggerUpdated(self, origTrigger, newTrigger):
         """
@@ -665,21 +906,17 @@ class Plugin(indigo.PluginBase):
         """
 
         super(Plugin, self).triggerUpdated(origTrigger, newTrigger)
-        if self.isMQTTConnectorTopicMatchTrigger(origTrigger) and origTrigger.enabled:
-            messageType = origTrigger.globalProps["com.flyingdiver.indigoplugin.mqtt"].get("message_type", "")
-            if len(messageType) > 0:
-                self.messageTypes.remove(messageType)
-
+        self.messageTypes.removeHolder(("trigger", origTrigger.id))
         if self.isMQTTConnectorTopicMatchTrigger(newTrigger) and newTrigger.enabled:
             messageType = newTrigger.globalProps["com.flyingdiver.indigoplugin.mqtt"].get("message_type", "")
             if len(messageType) > 0:
-                self.messageTypes.append(messageType)
+                self.messageTypes.add(messageType, ("trigger", newTrigger.id))
 
         if self.isShellyMQTTTrigger(origTrigger):
-            del self.triggers[origTrigger.id]
+            self.triggerIndex.remove(origTrigger.id)
 
         if self.isShellyMQTTTrigger(newTrigger):
-            self.triggers[newTrigger.id] = newTrigger
+            self.triggerIndex.add(newTrigger)
 
     ##########################################################################
     #
@@ -697,10 +934,13 @@ class Plugin(indigo.PluginBase):
 
         if message['message_type'] not in self.messageTypes:
             # None of the devices care about this message
-            self.logger.debug(u"ignoring MQTT message of type \"%s\"", message["message_type"])
+            if self.debugLogging:
+                self.logger.debug(u"ignoring MQTT message of type \"%s\"", message["message_type"])
             return
         else:
-            self.logger.debug(u"Queued MQTT message type {} from {}".format(message["message_type"], indigo.devices[int(message["brokerID"])].name))
+            if self.debugLogging:
+                # Only look up the broker name when the message is logged
+                self.logger.debug(u"Queued MQTT message type %s from %s", message["message_type"], indigo.devices[int(message["brokerID"])].name)
             self.messageQueue.put(message)
 
     def processMessages(self):
@@ -708,42 +948,254 @@ class Plugin(indigo.PluginBase):
         Processes messages in the queue until the queue is empty. This is used to pass
         messages that have come from MQTT into the appropriate devices.
 
+        A pass fetches at most as many messages as the message queue can hold. The messages that
+        are left on the broker are fetched by the next pass, once the fetched ones have been handled.
+
         :return: None
         """
 
-        while not self.messageQueue.empty():
+        # Messages are handed to the devices once the messages of the pass have been fetched,
+        # so that control and input messages are handled ahead of the telemetry of other devices.
+        pending = TieredQueue(self.messageQueueCapacity)
+        fetchesLeft = self.messageQueueCapacity or kDefaultMessageQueueCapacity
+        for message in self.messageQueue.drain():
             # At least 1 of the devices care about this message
-            message = self.messageQueue.get()
             if not message:
-                return
+                continue
 
             # We have a valid message
             # Find the devices that need to get this message and give it to them
             brokerID = int(message['brokerID'])
             props = {'message_type': message['message_type']}
             while True:
+                if fetchesLeft <= 0:
+                    # The broker may have more messages of this type, they are fetched by the next pass
+                    self.messageQueue.put(message)
+                    self.messageStatistics['deferred-fetches'] += 1
+                    break
+
                 data = self.mqttPlugin.executeAction("fetchQueuedMessage", deviceId=brokerID, props=props, waitUntilDone=True)
+                self.messageStatistics['fetches'] += 1
+                fetchesLeft -= 1
                 if data is None:  # Ensure we got data back
+                    self.messageStatistics['empty-fetches'] += 1
                     break
 
                 topic = '/'.join(data['topic_parts'])  # transform the topic into a single string
                 payload = data['payload']
                 message_type = data['message_type']
-                self.logger.debug(u"    Processing: \"%s\" on topic \"%s\"", payload, topic)
-                deviceSubscriptions = self.brokerDeviceSubscriptions.get(brokerID, {})  # get device subscriptions for this broker
-                devices = deviceSubscriptions.get(topic, list())  # get devices listening on this broker for this topic
-                for deviceId in devices:
-                    shelly = self.shellyDevices.get(deviceId, None)
-                    if shelly is not None and message_type in shelly.getMessageTypes():
-                        # Send this message data to the shelly object
-                        self.logger.debug(u"        \"%s\" handling \"%s\" on \"%s\"", shelly.device.name, payload, topic)
-                        shelly.handleMessage(topic, payload)
-
+                if self.debugLogging:
+                    self.logger.debug(u"    Processing: \"%s\" on topic \"%s\"", payload, topic)
                 if topic == "shellies/announce":
-                    # Send this message to also be parsed by the plugin
-                    self.processAnnouncement(brokerID, payload)
+                    # Announcements are parsed once and only passed to the devices they belong to
+                    self.processAnnouncement(brokerID, payload, message_type)
+                    continue
+
+                shellies = self.getSubscribedShellies(brokerID, topic, message_type)
+                if self.telemetryCoalescer.isEnabled() and shellies and all(shelly.isTelemetryTopic(topic) for shelly in shellies):
+                    # Only the newest reading is kept until the coalescing window has passed, changes such as
+                    # online or temperature_status are never held so that none of them are skipped
+                    self.telemetryCoalescer.put((brokerID, topic), (message_type, payload))
+                else:
+                    self.queueForShellies(pending, shellies, topic, payload)
+
+        # Held telemetry is handled once its window has passed, it is flushed when coalescing is turned off
+        for (brokerID, topic), (message_type, payload) in self.telemetryCoalescer.flush(force=not self.telemetryCoalescer.isEnabled()):
+            self.queueForShellies(pending, self.getSubscribedShellies(brokerID, topic, message_type), topic, payload)
+
+        for target, critical, args in pending.drain():
+            # Send this message data to the shelly object, or to the physical unit for shared topics
+            self.dispatchToDevice(target, critical, target.handleMessage, *args)
+        self.countDroppedMessages(*pending.getDropped())
+        self.checkSaturation()
+
+        if time.time() - self.inputEventsSavedAt >= kInputEventSaveInterval:
+            self.saveInputEvents()
+        if time.time() - self.snapshotSavedAt >= kSnapshotSaveInterval:
+            self.saveSnapshot()
+
+    def countDroppedMessages(self, bulk, critical):
+        """
+        Adds messages that were dropped because a queue was full to the message statistics.
+
+        :param bulk: The number of telemetry messages that were dropped.
+        :param critical: The number of control and input messages that were dropped.
+        :return: None
+        """
+
+        self.messageStatistics['dropped-bulk-messages'] += bulk
+        self.messageStatistics['dropped-critical-messages'] += critical
+
+    def getDroppedMessages(self):
+        """
+        Getter for the number of messages that have been dropped, including the ones dropped by the worker threads.
+
+        :return: The number of dropped messages.
+        """
+
+        dropped = self.messageStatistics['dropped-bulk-messages'] + self.messageStatistics['dropped-critical-messages']
+        if self.workerPool:
+            dropped += sum(self.workerPool.getDropped())
+        return dropped
+
+    def checkSaturation(self):
+        """
+        Fires the "message-queue-saturated" triggers when messages start being dropped. The triggers
+        fire again after a pass in which no messages were dropped.
+
+        :return: None
+        """
+
+        dropped = self.getDroppedMessages()
+        if dropped > self.droppedMessages:
+            if not self.queueSaturated:
+                self.queueSaturated = True
+                self.messageStatistics['saturations'] += 1
+                self.logger.warning(u"Messages are arriving faster than they can be handled, telemetry is being dropped")
+                for trigger in self.triggerIndex.get("message-queue-saturated"):
+                    indigo.trigger.execute(trigger)
+        else:
+            self.queueSaturated = False
+        self.droppedMessages = dropped
+
+    def saveInputEvents(self):
+        """
+        Writes the input event counters that changed since they were last saved to the device props.
+        The counters are kept in memory while messages are handled so that the props are not
+        rewritten for every input event.
+
+        :return: None
+        """
+
+        self.inputEventsSavedAt = time.time()
+        for shelly in self.shellyDevices.values():
+            if shelly.saveLastInputEventId():
+                self.messageStatistics['input-event-saves'] += 1
+
+    def buildSnapshot(self):
+        """
+        Builds the snapshot of the state that has been learned from the devices.
+
+        :return: A dictionary that can be serialized to json.
+        """
+
+        devices = dict(self.deviceSnapshots)
+        for deviceId, shelly in self.shellyDevices.items():
+            snapshot = shelly.getSnapshot()
+            if snapshot:
+                devices[deviceId] = snapshot
+            else:
+                devices.pop(deviceId, None)
+
+        # Json only has string keys
+        return {
+            'discovered-devices': {str(brokerId): brokerDevices for brokerId, brokerDevices in self.discoveredDevices.items() if brokerDevices},
+            'devices': {str(deviceId): snapshot for deviceId, snapshot in devices.items()}
+        }
+
+    def saveSnapshot(self):
+        """
+        Writes the state snapshot so that it can be restored when the plugin starts again.
+
+        :return: None
+        """
+
+        self.snapshotSavedAt = time.time()
+        if self.stateSnapshot.save(self.buildSnapshot()):
+            self.messageStatistics['snapshot-saves'] += 1
+
+    def restoreSnapshot(self):
+        """
+        Restores the state snapshot from the last run. The device snapshots are applied as the
+        devices start, and the snapshots of devices that have since been deleted are dropped.
+
+        :return: None
+        """
+
+        state = self.stateSnapshot.load()
+        for brokerId, brokerDevices in state.get('discovered-devices', {}).items():
+            self.discoveredDevices[int(brokerId)] = brokerDevices
+        for deviceId, snapshot in state.get('devices', {}).items():
+            if int(deviceId) in indigo.devices:
+                self.deviceSnapshots[int(deviceId)] = snapshot
+
+        if state:
+            self.logger.debug(u"Restored the snapshot of %d devices and %d discovered devices", len(self.deviceSnapshots),
+                              sum(len(brokerDevices) for brokerDevices in self.discoveredDevices.values()))
+
+    def getSubscribedShellies(self, brokerID, topic, message_type):
+        """
+        Helper method to find the Shelly devices that need a message.
+
+        :param brokerID: The id of the broker the message came from.
+        :param topic: The topic of the message.
+        :param message_type: The message type of the message.
+        :return: A list of Shelly devices.
+        """
+
+        deviceSubscriptions = self.brokerDeviceSubscriptions.get(brokerID, {})  # get device subscriptions for this broker
+        devices = deviceSubscriptions.get(topic, list())  # get devices listening on this broker for this topic
+        shellies = []
+        for deviceId in devices:
+            shelly = self.shellyDevices.get(deviceId, None)
+            if shelly is not None and message_type in shelly.getMessageTypes():
+                shellies.append(shelly)
+        return shellies
 
-    def processAnnouncement(self, brokerId, payload):
+    def queueForShellies(self, pending, shellies, topic, payload):
+        """
+        Helper method to queue a message for each device that needs it.
+
+        :param pending: The TieredQueue of messages to hand to the devices.
+        :param shellies: The Shelly devices that need the message.
+        :param topic: The topic of the message.
+        :param payload: The payload of the message.
+        :return: None
+        """
+
+        # A message for several devices, such as a host and its addons, is only decoded once
+        parsed = JsonPayload(payload) if len(shellies) > 1 else None
+
+        units = OrderedDict()  # {<PhysicalDevice object>: [<channel>, ...]}
+        for shelly in shellies:
+            unit = shelly.physicalDevice
+            if unit is not None and unit.isSharedTopic(topic):
+                # The message reports on the unit, so it is handled once for all of its channels
+                units.setdefault(unit, []).append(shelly)
+                continue
+
+            critical = shelly.isCriticalTopic(topic)
+            if self.debugLogging:
+                self.logger.debug(u"        \"%s\" handling \"%s\" on \"%s\"", shelly.device.name, payload, topic)
+            pending.offer((shelly, critical, (topic, payload, parsed)), critical, shelly.getDispatchKey())
+            self.messageStatistics['critical-messages' if critical else 'bulk-messages'] += 1
+
+        for unit, channels in units.items():
+            critical = any(shelly.isCriticalTopic(topic) for shelly in channels)
+            if self.debugLogging:
+                self.logger.debug(u"        \"%s\" handling \"%s\" on \"%s\" for %d channels", unit.address, payload, topic, len(channels))
+            pending.offer((unit, critical, (topic, payload, channels, parsed)), critical, unit.getDispatchKey())
+            self.messageStatistics['critical-messages' if critical else 'bulk-messages'] += 1
+            self.messageStatistics['shared-messages'] += len(channels) - 1
+
+    def dispatchToDevice(self, shelly, critical, handler, *args):
+        """
+        Calls a message handler of a device. When worker threads are enabled, the handler runs on
+        the worker that owns the device so that messages for a device stay in order.
+
+        :param shelly: The Shelly device or PhysicalDevice that handles the message.
+        :param critical: True if the message should be handled ahead of the telemetry of other devices.
+        :param handler: The method of the device to call.
+        :param args: The arguments to call the handler with.
+        :return: None
+        """
+
+        if self.workerPool:
+            self.workerPool.submit(shelly.getDispatchKey(), critical, handler, *args)
+        else:
+            handler(*args)
+
+    def processAnnouncement(self, brokerId, payload, messageType=None):
         """
         Parses the data from an announce message. The payload is expected to be of the form:
         {
@@ -754,11 +1206,12 @@ class Plugin(indigo.PluginBase):
             "new_fw": <true/false>
         }
 
-        This method will check against a list of known devices and will keep track
-        of announcement messages that don't belong to a known device.
+        The announcement is passed to the devices it belongs to. Announcements that don't
+        belong to a known device are kept track of.
 
         :param brokerId The device id of the broker that the message was published to.
         :param payload The payload of the message.
+        :param messageType The message type the announcement was received as.
         :return: None
         """
 
@@ -779,19 +1232,32 @@ class Plugin(indigo.PluginBase):
         if brokerId not in self.discoveredDevices:
             self.discoveredDevices[brokerId] = {}
 
-        # See if this device is not in our indigo devices list
-        # This would indicate that this is an unknown device
-        known = False
-        for shelly in self.shellyDevices.values():
-            if shelly.getBrokerId() and shelly.getBrokerId() == brokerId and identifier in shelly.getAddress():
-                # This device is on the same broker and has the same address/identifier
-                known = True
-
-                # Ensure this identifier on the broker is not in the "unknown" list
-                self.discoveredDevices[brokerId].pop(identifier, None)
-                break
-
-        if not known:
+        # Find the devices on the same broker with this identifier
+        # No devices would indicate that this is an unknown device
+        deviceIds = self.announcementSubscriptions.get((brokerId, identifier), [])
+        units = OrderedDict()  # {<PhysicalDevice object>: [<channel>, ...]}
+        for deviceId in deviceIds:
+            # The device details are fresh, so a scheduled announce is no longer needed
+            self.announceScheduler.discard(deviceId)
+            shelly = self.shellyDevices.get(deviceId, None)
+            if shelly is not None and (messageType is None or messageType in shelly.getMessageTypes()):
+                if shelly.physicalDevice is not None:
+                    units.setdefault(shelly.physicalDevice, []).append(shelly)
+                    continue
+                if self.debugLogging:
+                    self.logger.debug(u"        \"%s\" handling announcement", shelly.device.name)
+                self.dispatchToDevice(shelly, False, shelly.applyAnnouncement, announcement)
+
+        for unit, channels in units.items():
+            # The unit keeps the announced details and passes them to its channels
+            if self.debugLogging:
+                self.logger.debug(u"        \"%s\" handling announcement for %d channels", unit.address, len(channels))
+            self.dispatchToDevice(unit, False, unit.applyAnnouncement, announcement, channels)
+
+        if deviceIds:
+            # Ensure this identifier on the broker is not in the "unknown" list
+            self.discoveredDevices[brokerId].pop(identifier, None)
+        else:
             # Here is where device creation COULD happen automatically
             self.logger.info(u"Discovered a new device with an address of \"{}\" with ip: \"{}\"".format(identifier, announcement.get('ip', "Unavailable")))
 
@@ -826,6 +1292,54 @@ class Plugin(indigo.PluginBase):
                 isValid = False
                 errors['low-battery-threshold'] = u"You must enter an integer value."
 
+        # Validate the number of message workers
+        workers = valuesDict.get('message-workers', None)
+        if not workers:
+            valuesDict['message-workers'] = 0
+        else:
+            try:
+                if not 0 <= int(workers) <= 16:
+                    raise ValueError
+            except ValueError:
+                isValid = False
+                errors['message-workers'] = u"You must enter an integer value between 0 and 16."
+
+        # Validate the message queue capacity
+        capacity = valuesDict.get('message-queue-capacity', None)
+        if not capacity:
+            valuesDict['message-queue-capacity'] = kDefaultMessageQueueCapacity
+        else:
+            try:
+                if not 0 <= int(capacity) <= 1000000:
+                    raise ValueError
+            except ValueError:
+                isValid = False
+                errors['message-queue-capacity'] = u"You must enter an integer value between 0 and 1000000."
+
+        # Validate the announce rate
+        rate = valuesDict.get('announce-rate', None)
+        if not rate:
+            valuesDict['announce-rate'] = kDefaultAnnounceRate
+        else:
+            try:
+                if not 0 <= int(rate) <= 1000:
+                    raise ValueError
+            except ValueError:
+                isValid = False
+                errors['announce-rate'] = u"You must enter an integer value between 0 and 1000."
+
+        # Validate the telemetry coalescing window
+        window = valuesDict.get('telemetry-window', None)
+        if not window:
+            valuesDict['telemetry-window'] = 0
+        else:
+            try:
+                if not 0 <= int(window) <= 10000:
+                    raise ValueError
+            except ValueError:
+                isValid = False
+                errors['telemetry-window'] = u"You must enter an integer value between 0 and 10000."
+
         return isValid, valuesDict, errors
 
     def validateDeviceConfigUi(self, valuesDict, typeId, devId):
@@ -838,7 +1352,7 @@ class Plugin(indigo.PluginBase):
         :return: True if the config is valid.
         """
 
-        deviceClass = deviceClasses.get(typeId, None)
+        deviceClass = deviceModels.get(typeId, None)
         if deviceClass:
             errors = indigo.Dict()
             isValid, valuesDict, errors = deviceClass.validateConfigUI(valuesDict, typeId, devId)
@@ -962,6 +1476,12 @@ class Plugin(indigo.PluginBase):
         if userCancelled is False:
             self.setLogLevel(valuesDict.get('log-level', "info"))
             self.lowBatteryThreshold = int(valuesDict.get('low-battery-threshold', 20))
+            self.messageQueueCapacity = int(valuesDict.get('message-queue-capacity', kDefaultMessageQueueCapacity))
+            self.startWorkerPool(int(valuesDict.get('message-workers', 0)), self.messageQueueCapacity)
+            if self.telemetryCoalescer.setWindow(int(valuesDict.get('telemetry-window', 0)) / 1000.0):
+                # The telemetry held under the old window is handled right away
+                self.messageQueue.wake()
+            self.announceScheduler.rate = int(valuesDict.get('announce-rate', kDefaultAnnounceRate))
 
         for shelly in self.shellyDevices.values():
             if shelly.isAddon():
@@ -973,6 +1493,29 @@ class Plugin(indigo.PluginBase):
     #
     ##########################################################################
 
+    def startWorkerPool(self, workers, capacity=0):
+        """
+        Helper method to (re)start the worker threads that handle device messages.
+        The current pool finishes its queued messages before it is replaced.
+
+        :param workers: The number of worker threads, 0 to handle messages on the concurrent thread.
+        :param capacity: The number of messages that can wait on each worker, 0 for no limit.
+        :return: None
+        """
+
+        if self.workerPool and self.workerPool.getSize() == workers and self.workerPool.capacity == capacity:
+            return
+
+        if self.workerPool:
+            workerPool = self.workerPool
+            self.workerPool = None
+            workerPool.stop()
+            self.countDroppedMessages(*workerPool.getDropped())
+
+        if workers > 0:
+            self.workerPool = WorkerPool(workers, capacity)
+            self.logger.info(u"Handling device messages on {} worker threads".format(workers))
+
     def setLogLevel(self, level):
         """
         Helper method to set the logging level.
@@ -987,14 +1530,23 @@ class Plugin(indigo.PluginBase):
 
         if level == "debug":
             self.indigo_log_handler.setLevel(logging.DEBUG)
+            self.logger.setLevel(logging.DEBUG)
             self.logger.debug(u"Log level set to debug")
         elif level == "info":
             self.indigo_log_handler.setLevel(logging.INFO)
+            self.logger.setLevel(logging.INFO)
             self.logger.info(u"Log level set to info")
         elif level == "warning":
             self.indigo_log_handler.setLevel(logging.WARNING)
+            self.logger.setLevel(logging.WARNING)
             self.logger.warning(u"Log level set to warning")
 
+        # Messages below the level are dropped by the logger before they are formatted. The debug lines
+        # logged for every message check the level up front and the device loggers check it on their next use
+        self.debugLogging = self.logger.isEnabledFor(logging.DEBUG)
+        for shelly in self.shellyDevices.values():
+            shelly.logger.reset()
+
     def createDeviceObject(self, device):
         """
         Helper function to generate a Shelly object from an indigo device
@@ -1004,7 +1556,7 @@ class Plugin(indigo.PluginBase):
         """
 
         deviceType = device.deviceTypeId
-        deviceClass = deviceClasses[deviceType]
+        deviceClass = deviceModels.get(deviceType)
         if deviceClass:
             return deviceClass(device)
         else:
@@ -1248,6 +1800,68 @@ class Plugin(indigo.PluginBase):
 
             logDividerRow()
 
+    def printMessageStatistics(self, pluginAction=None, device=None, callerWaitingForResult=False):
+        """
+        Prints the counters related to processing messages.
+
+        :return: None
+        """
+
+        queueStatistics = self.messageQueue.getStatistics()
+        self.logger.info(u"Message statistics:")
+        self.logger.info(u"    Notifications queued: {}".format(queueStatistics['queued']))
+        self.logger.info(u"    Notifications coalesced (empty fetches avoided): {}".format(queueStatistics['coalesced']))
+        self.logger.info(u"    Notifications pending: {}".format(queueStatistics['pending']))
+        self.logger.info(u"    Fetches: {}".format(self.messageStatistics['fetches']))
+        self.logger.info(u"    Empty fetches: {}".format(self.messageStatistics['empty-fetches']))
+        self.logger.info(u"    Fetches deferred to the next pass: {}".format(self.messageStatistics['deferred-fetches']))
+        self.logger.info(u"    Control and input messages: {}".format(self.messageStatistics['critical-messages']))
+        self.logger.info(u"    Telemetry messages: {}".format(self.messageStatistics['bulk-messages']))
+        self.logger.info(u"    Shared messages handled once per unit: {}".format(self.messageStatistics['shared-messages']))
+        self.logger.info(u"    Queue capacity: {}".format(self.messageQueueCapacity or "Unlimited"))
+        if self.workerPool:
+            droppedBulk, droppedCritical = self.workerPool.getDropped()
+        else:
+            droppedBulk, droppedCritical = 0, 0
+        self.logger.info(u"    Telemetry messages dropped: {}".format(self.messageStatistics['dropped-bulk-messages'] + droppedBulk))
+        self.logger.info(u"    Control and input messages dropped: {}".format(self.messageStatistics['dropped-critical-messages'] + droppedCritical))
+        self.logger.info(u"    Queue saturations: {}".format(self.messageStatistics['saturations']))
+        coalescerStatistics = self.telemetryCoalescer.getStatistics()
+        self.logger.info(u"    Telemetry messages held: {}".format(coalescerStatistics['held']))
+        self.logger.info(u"    Telemetry messages coalesced: {}".format(coalescerStatistics['coalesced']))
+        self.logger.info(u"    Telemetry messages pending: {}".format(coalescerStatistics['pending']))
+        announceStatistics = self.announceScheduler.getStatistics()
+        self.logger.info(u"    Announces scheduled: {}".format(announceStatistics['scheduled']))
+        self.logger.info(u"    Announces sent: {}".format(announceStatistics['released']))
+        self.logger.info(u"    Announces skipped (device already announced or stopped): {}".format(announceStatistics['skipped']))
+        self.logger.info(u"    Announces pending: {}".format(announceStatistics['pending']))
+        self.logger.info(u"    Unchanged state writes skipped: {}".format(sum(shelly.stateWritesSaved for shelly in self.shellyDevices.values())))
+        self.logger.info(u"    Device refreshes: {}".format(self.messageStatistics['refreshes']))
+        self.logger.info(u"    Device refreshes avoided (state updates only): {}".format(self.messageStatistics['refreshes-avoided']))
+        self.logger.info(u"    Input event counter saves: {}".format(self.messageStatistics['input-event-saves']))
+        self.logger.info(u"    State snapshot saves: {}".format(self.messageStatistics['snapshot-saves']))
+        self.logger.info(u"    Log messages suppressed: {}".format(self.logPipeline.totalSuppressed))
+        if self.workerPool:
+            for shard, statistics in enumerate(self.workerPool.getStatistics()):
+                self.logger.info(u"    Worker {}: {} queued, {} max queued, {} handled, {} dropped".format(shard, statistics['depth'], statistics['max-depth'], statistics['processed'], statistics['dropped']))
+
+    def printMessageTypes(self, pluginAction=None, device=None, callerWaitingForResult=False):
+        """
+        Prints the message types that are listened to and the devices and triggers that need them.
+
+        :return: None
+        """
+
+        self.logger.info(u"Message types:")
+        if len(self.messageTypes.getMessageTypes()) == 0:
+            self.logger.info(u"    No message types are being listened to!")
+        for messageType in self.messageTypes.getMessageTypes():
+            self.logger.info(u"    \"{}\" ({} references)".format(messageType, self.messageTypes.getCount(messageType)))
+            for kind, holderId in self.messageTypes.getHolders(messageType):
+                holders = indigo.devices if kind == "device" else indigo.triggers
+                name = holders[holderId].name if holderId in holders else u"unknown"
+                self.logger.info(u"        {} \"{}\" ({})".format(kind, name, holderId))
+
     def printConnectedSensors(self, valuesDict={}, typeId=None):
         """
         Prints an overview of sensors connected to the chosen device.
@@ -1445,11 +2059,7 @@ class Plugin(indigo.PluginBase):
 
         # Dynamically build a filter if none was supplied
         if filter is None or len(filter) == 0:
-            related_device_types = []
-            for model in deviceModelInformation[typeId]['relations']:
-                for model_type_id, info in deviceModelInformation.items():
-                    if info['class'] is model:
-                        related_device_types.append("self.{}".format(model_type_id))
+            related_device_types = ["self.{}".format(model_type_id) for model_type_id in deviceModels.getRelatedDeviceTypeIds(typeId)]
             filter = ",".join(related_device_types)
 
         # Build the related devices section
@@ -1502,26 +2112,20 @@ class Plugin(indigo.PluginBase):
         :return: A list of devices which are capable to hosting add-ons.
         """
 
-        hostable_model_categories = {  # Shelly models that can host an "addon"
-            "ds1820": ["shelly-1", "shelly-1pm", "shelly-uni-relay", "shelly-uni-input"],
-            "dht22": ["shelly-1", "shelly-1pm", "shelly-uni-relay", "shelly-uni-input"],
-            "detached-switch": ["shelly-1", "shelly-1pm", "shelly-2-5-relay", "shelly-4-pro", "shelly-dimmer-sl"]
-        }
-
         hostable_models = set()
         if filter:
             categories = [cat.strip() for cat in filter.split(",")]
             for category in categories:
-                models = hostable_model_categories.get(category, None)
-                if models:
-                    for model in models:
-                        hostable_models.add(model)
+                hostable_models.update(deviceModels.getAddonHostDeviceTypeIds(category))
 
-        shellies = self.getShellyDevices()
+        if not hostable_models:
+            return []
+
+        # Only the devices of the types that can host the addon are examined
+        typeFilter = ",".join("self.{}".format(model) for model in sorted(hostable_models))
         hostable = []
-        for dev in shellies:
-            shelly = self.shellyDevices.get(dev[0])
-            if shelly and shelly.device.deviceTypeId in hostable_models:
+        for dev in self.getShellyDevices(filter=typeFilter):
+            if dev[0] in self.shellyDevices:
                 hostable.append(dev)
         return hostable
 
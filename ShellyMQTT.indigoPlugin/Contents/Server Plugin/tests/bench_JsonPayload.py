@@ -0,0 +1,95 @@
+# coding=utf-8
+"""
+Benchmarks decoding a JSON payload once for every device that handles the message.
+
+A host with several DS1820 and DHT22 add-ons is fed a burst of "ext_temperatures" and
+"ext_humidities" messages, as recorded from a Shelly 1 with a temperature add-on. Each message
+is handled by the host and by every add-on, either decoding the payload per device or sharing
+a single JsonPayload between them.
+
+Run from the "Server Plugin" directory:
+    python tests/bench_JsonPayload.py
+"""
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mocking.IndigoDevice import IndigoDevice
+from mocking.IndigoServer import Indigo
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+
+from Core.JsonPayload import JsonPayload
+from Devices.Relays.Shelly_1 import Shelly_1
+from Devices.Addons.Shelly_Addon_DS1820 import Shelly_Addon_DS1820
+from Devices.Addons.Shelly_Addon_DHT22 import Shelly_Addon_DHT22
+
+ROUNDS = 200
+ADDRESS = "shellies/shelly1-bench"
+PROBES = ["28aa0000000001", "28aa0000000002", "28aa0000000003"]
+HUMIDITY_PROBE = "28bb0000000001"
+
+
+def burst():
+    """Builds the recorded burst: the probes report every few seconds with slowly drifting readings."""
+    messages = []
+    for step in range(20):
+        temperatures = {}
+        for channel, probe in enumerate(PROBES):
+            temperatures[str(channel)] = {"hwID": probe, "tC": 20.5 + channel + step * 0.0625}
+        temperatures[str(len(PROBES))] = {"hwID": HUMIDITY_PROBE, "tC": 22.0 + step * 0.0625}
+        humidities = {"0": {"hwID": HUMIDITY_PROBE, "hum": 45.0 + step * 0.1}}
+        messages.append(("{}/ext_temperatures".format(ADDRESS), json.dumps(temperatures)))
+        messages.append(("{}/ext_humidities".format(ADDRESS), json.dumps(humidities)))
+    return messages
+
+
+def build(deviceClass, deviceId, probe=None):
+    device = IndigoDevice(id=deviceId, name="{} {}".format(deviceClass.__name__, deviceId))
+    device.pluginProps.update({
+        "broker-id": "1", "address": ADDRESS, "message-type": "shellies", "host-id": "1",
+        "probe-number": probe, "temp-units": "C", "temp-decimals": "1", "humidity-decimals": "1"
+    })
+    device.states.update({"temperature": 0.0, "humidity": 0.0, "online": True})
+    return deviceClass(device)
+
+
+def main():
+    logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
+    indigo.activePlugin.pluginPrefs['log-device-activity'] = False
+
+    host = build(Shelly_1, 1)
+    indigo.activePlugin.shellyDevices[1] = host
+    shellies = [host]
+    for deviceId, probe in enumerate(PROBES, start=2):
+        shellies.append(build(Shelly_Addon_DS1820, deviceId, probe))
+    shellies.append(build(Shelly_Addon_DHT22, len(shellies) + 1, HUMIDITY_PROBE))
+    messages = burst()
+
+    def perDevice():
+        for topic, payload in messages:
+            for shelly in shellies:
+                shelly.handleMessage(topic, payload)
+
+    def shared():
+        for topic, payload in messages:
+            parsed = JsonPayload(payload)
+            for shelly in shellies:
+                shelly.handleMessage(topic, payload, parsed)
+
+    handled = ROUNDS * len(messages)
+    print("{} devices, {} messages per round".format(len(shellies), len(messages)))
+    print("{:<30} {:>12}".format("mode", "us/message"))
+    for name, run in [("decode per device", perDevice), ("decode once (JsonPayload)", shared)]:
+        elapsed = min(timeit.repeat(run, number=ROUNDS, repeat=3))
+        print("{:<30} {:>12.2f}".format(name, elapsed / handled * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# coding=utf-8
+"""
+Benchmarks the enqueue-to-handleMessage latency of the concurrent thread.
+
+The legacy loop (processMessages followed by a 100 ms sleep) is compared against the
+MessageQueue that blocks until message_handler queues a message.
+
+Run from the "Server Plugin" directory:
+    python tests/bench_MessageQueue.py
+"""
+import os
+import random
+import sys
+import threading
+import time
+from Queue import Queue, Empty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Core.MessageQueue import MessageQueue
+
+MESSAGES = 200
+MAX_GAP = 0.02  # seconds between messages from the "broker"
+IDLE = 1.0  # seconds the fleet is idle when counting wakeups
+
+
+class LegacyConsumer:
+    """The pre-MessageQueue runConcurrentThread loop."""
+
+    def __init__(self):
+        self.queue = Queue()
+        self.latencies = []
+        self.wakeups = 0
+        self.running = True
+
+    def put(self, message):
+        self.queue.put(message)
+
+    def run(self):
+        while self.running:
+            self.wakeups += 1
+            while not self.queue.empty():
+                try:
+                    sent = self.queue.get_nowait()
+                except Empty:
+                    break
+                self.latencies.append(time.time() - sent)
+            time.sleep(0.1)
+
+    def stop(self):
+        self.running = False
+
+
+class BlockingConsumer:
+    """The runConcurrentThread loop using a MessageQueue."""
+
+    def __init__(self):
+        self.queue = MessageQueue()
+        self.latencies = []
+        self.wakeups = 0
+
+    def put(self, message):
+        # Use a unique message type so that no notification is coalesced
+        self.queue.put({'brokerID': 1, 'message_type': repr(message), 'sent': message})
+
+    def run(self):
+        while self.queue.wait():
+            self.wakeups += 1
+            for message in self.queue.drain():
+                self.latencies.append(time.time() - message['sent'])
+
+    def stop(self):
+        self.queue.stop()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run(consumer):
+    thread = threading.Thread(target=consumer.run)
+    thread.start()
+
+    random.seed(42)
+    for _ in range(MESSAGES):
+        time.sleep(random.uniform(0, MAX_GAP))
+        consumer.put(time.time())
+
+    # Let the last message drain, then measure wakeups while idle
+    time.sleep(0.2)
+    wakeups = consumer.wakeups
+    time.sleep(IDLE)
+    idle_wakeups = consumer.wakeups - wakeups
+
+    consumer.stop()
+    thread.join()
+
+    latencies = [l * 1000 for l in consumer.latencies]
+    return percentile(latencies, 50), percentile(latencies, 99), idle_wakeups
+
+
+def main():
+    print("{:<10} {:>10} {:>10} {:>14}".format("loop", "p50 (ms)", "p99 (ms)", "idle wakeups/s"))
+    for name, consumer in (("sleep-poll", LegacyConsumer()), ("blocking", BlockingConsumer())):
+        p50, p99, idle = run(consumer)
+        print("{:<10} {:>10.3f} {:>10.3f} {:>14}".format(name, p50, p99, idle))
+
+
+if __name__ == "__main__":
+    main()
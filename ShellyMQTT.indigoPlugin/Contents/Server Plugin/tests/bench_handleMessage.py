@@ -0,0 +1,172 @@
+# coding=utf-8
+"""
+Micro-benchmark of handleMessage for every device class.
+
+Each device is fed a round-robin of messages on all of the topics it subscribes to and the
+average time per message is reported. The Indigo server is mocked, so the numbers reflect
+the cost of routing and handling a message within the plugin.
+
+Run from the "Server Plugin" directory:
+    python tests/bench_handleMessage.py
+"""
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mocking.IndigoDevice import IndigoDevice
+from mocking.IndigoServer import Indigo
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+
+from Devices.Relays.Shelly_1 import Shelly_1
+from Devices.Relays.Shelly_1PM import Shelly_1PM
+from Devices.Relays.Shelly_2_5_Relay import Shelly_2_5_Relay
+from Devices.Relays.Shelly_4_Pro import Shelly_4_Pro
+from Devices.Relays.Shelly_EM_Relay import Shelly_EM_Relay
+from Devices.Relays.Shelly_Uni_Relay import Shelly_Uni_Relay
+from Devices.Shelly_Dimmer_SL import Shelly_Dimmer_SL
+from Devices.RGBW2.Shelly_RGBW2_White import Shelly_RGBW2_White
+from Devices.RGBW2.Shelly_RGBW2_Color import Shelly_RGBW2_Color
+from Devices.Sensors.Shelly_HT import Shelly_HT
+from Devices.Sensors.Shelly_Flood import Shelly_Flood
+from Devices.Sensors.Shelly_Door_Window import Shelly_Door_Window
+from Devices.Sensors.Shelly_EM_Meter import Shelly_EM_Meter
+from Devices.Sensors.Shelly_3EM_Meter import Shelly_3EM_Meter
+from Devices.Sensors.Shelly_i3 import Shelly_i3
+from Devices.Sensors.Shelly_Button1 import Shelly_Button1
+from Devices.Sensors.Shelly_Gas import Shelly_Gas
+from Devices.Sensors.Shelly_Uni_Input import Shelly_Uni_Input
+from Devices.Sensors.Shelly_Motion import Shelly_Motion
+from Devices.Bulbs.Shelly_Bulb import Shelly_Bulb
+from Devices.Bulbs.Shelly_Bulb_Vintage import Shelly_Bulb_Vintage
+from Devices.Bulbs.Shelly_Bulb_Duo import Shelly_Bulb_Duo
+from Devices.Plugs.Shelly_Plug import Shelly_Plug
+from Devices.Plugs.Shelly_Plug_S import Shelly_Plug_S
+from Devices.Addons.Shelly_Addon_DS1820 import Shelly_Addon_DS1820
+from Devices.Addons.Shelly_Addon_DHT22 import Shelly_Addon_DHT22
+from Devices.Addons.Shelly_Addon_Detached_Switch import Shelly_Addon_Detached_Switch
+
+MESSAGES = 20000
+ADDRESS = "shellies/bench"
+
+CLASSES = [
+    Shelly_1, Shelly_1PM, Shelly_2_5_Relay, Shelly_4_Pro, Shelly_EM_Relay, Shelly_Uni_Relay,
+    Shelly_Dimmer_SL, Shelly_RGBW2_White, Shelly_RGBW2_Color,
+    Shelly_HT, Shelly_Flood, Shelly_Door_Window, Shelly_EM_Meter, Shelly_3EM_Meter, Shelly_i3,
+    Shelly_Button1, Shelly_Gas, Shelly_Uni_Input, Shelly_Motion,
+    Shelly_Bulb, Shelly_Bulb_Vintage, Shelly_Bulb_Duo, Shelly_Plug, Shelly_Plug_S,
+    Shelly_Addon_DS1820, Shelly_Addon_DHT22, Shelly_Addon_Detached_Switch
+]
+
+# Payloads keyed by the part of the topic after the device address
+PAYLOADS = {
+    "online": "true",
+    "relay/0": "on",
+    "input/0": "1",
+    "longpush/0": "0",
+    "relay/0/power": "12.5",
+    "relay/0/overpower_value": "0",
+    "relay/0/energy": "100",
+    "light/0/power": "12.5",
+    "light/0/energy": "100",
+    "temperature": "45.2",
+    "overtemperature": "0",
+    "overload": "0",
+    "input_event/0": '{"event": "S", "event_cnt": 1}',
+    "ext_temperatures": '{"0": {"hwID": "28aabbccdd", "tC": 20.5}}',
+    "ext_humidities": '{"0": {"hwID": "28aabbccdd", "hum": 50}}',
+    "ext_temperature/0": "20.5",
+    "ext_humidity/0": "50",
+    "temperature_status": "Normal",
+    "info": '{"adcs": [{"voltage": 5.1}]}',
+    "status": '{"motion": false, "active": true, "vibration": false, "lux": 100, "bat": 90}',
+    "light/0/status": '{"ison": true, "brightness": 50, "white": 10, "temp": 4000, "red": 1, "green": 2, "blue": 3}',
+    "white/0/status": '{"ison": true, "mode": "white", "brightness": 50, "power": 10, "overpower": false}',
+    "color/0/status": '{"ison": true, "mode": "color", "gain": 50, "red": 1, "green": 2, "blue": 3, "white": 4, "power": 10, "overpower": false}',
+    "sensor/state": "close",
+    "sensor/lux": "100",
+    "sensor/tilt": "5",
+    "sensor/vibration": "0",
+    "sensor/temperature": "20.5",
+    "sensor/humidity": "50",
+    "sensor/battery": "90",
+    "sensor/flood": "false",
+    "sensor/operation": "normal",
+    "sensor/gas": "none",
+    "sensor/self_test": "completed",
+    "sensor/concentration": "0",
+    "emeter/0/energy": "100",
+    "emeter/0/returned_energy": "100",
+    "emeter/0/power": "12.5",
+    "emeter/0/reactive_power": "1.5",
+    "emeter/0/voltage": "230.1",
+    "emeter/0/current": "1.2",
+    "emeter/0/pf": "0.9",
+    "emeter/0/total": "1000",
+    "emeter/0/total_returned": "10",
+}
+ANNOUNCEMENT = '{"id": "bench", "mac": "AABBCC", "ip": "192.168.1.2", "fw_ver": "1.0", "new_fw": false}'
+
+STATES = {
+    "online": True, "onOffState": False, "brightnessLevel": 0, "whiteTemperature": 4000, "overpower": False,
+    "overload": False, "temperature": 0.0, "humidity": 0.0, "vibration": False, "accumEnergyTotal": 0.0,
+    "energy-consumed": 0.0, "energy-returned": 0.0, "batteryLevel": 90
+}
+
+PROPS = {
+    "broker-id": "1", "address": ADDRESS, "channel": "0", "message-type": "shellies", "host-id": "1",
+    "probe-number": "0", "temp-units": "F", "int-temp-units": "C", "energy-display": "net", "useCase": "door",
+    "last-input-event-id": -1
+}
+
+
+def build(deviceClass):
+    device = IndigoDevice(id=2, name=deviceClass.__name__)
+    device.pluginProps.update(PROPS)
+    device.states.update(STATES)
+    return deviceClass(device)
+
+
+def messages(shelly):
+    result = []
+    for topic in shelly.getSubscriptions():
+        if topic == "shellies/announce":
+            result.append((topic, ANNOUNCEMENT))
+        else:
+            result.append((topic, PAYLOADS[topic[len(ADDRESS) + 1:]]))
+    return result
+
+
+def main():
+    logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
+    indigo.activePlugin.pluginPrefs['log-device-activity'] = False
+
+    # Add-ons need a running host device
+    host = build(Shelly_1)
+    indigo.activePlugin.shellyDevices[1] = host
+
+    print("{:<30} {:>8} {:>12}".format("class", "topics", "us/message"))
+    total = 0
+    for deviceClass in CLASSES:
+        shelly = build(deviceClass)
+        batch = messages(shelly)
+
+        def run():
+            for topic, payload in batch:
+                shelly.handleMessage(topic, payload)
+
+        rounds = max(1, MESSAGES // len(batch))
+        elapsed = min(timeit.repeat(run, number=rounds, repeat=3))
+        perMessage = elapsed / (rounds * len(batch)) * 1e6
+        total += perMessage
+        print("{:<30} {:>8} {:>12.2f}".format(deviceClass.__name__, len(batch), perMessage))
+    print("{:<30} {:>8} {:>12.2f}".format("mean", "", total / len(CLASSES)))
+
+
+if __name__ == "__main__":
+    main()
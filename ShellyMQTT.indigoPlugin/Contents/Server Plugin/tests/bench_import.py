@@ -0,0 +1,61 @@
+# coding=utf-8
+"""
+Measures the time it takes to import plugin.py and to start an install that only has plugs and
+H&Ts, along with the number of device modules that are loaded.
+
+Each run imports the plugin in a fresh interpreter so that nothing is cached between runs. The
+mock indigo module is used, with a placeholder for PluginBase since the plugin class is only
+defined and never instantiated.
+
+Run from the "Server Plugin" directory:
+    python tests/bench_import.py
+"""
+import os
+import subprocess
+import sys
+import time
+
+RUNS = 20
+DEVICE_TYPES = ["shelly-plug", "shelly-plug-s", "shelly-ht"]
+
+
+def measure():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from mocking.IndigoServer import Indigo
+    indigo = Indigo()
+    indigo.PluginBase = object
+    sys.modules['indigo'] = indigo
+
+    start = time.time()
+    import plugin
+    imported = time.time() - start
+    importedModules = len([name for name in sys.modules if name.startswith("Devices.") and sys.modules[name] is not None])
+
+    for deviceType in DEVICE_TYPES:
+        plugin.deviceModels.get(deviceType)
+    started = time.time() - start
+    startedModules = len([name for name in sys.modules if name.startswith("Devices.") and sys.modules[name] is not None])
+    print("{} {} {} {}".format(imported, importedModules, started, startedModules))
+
+
+def main():
+    results = []
+    for _ in range(RUNS):
+        # Skip the .pyc files so that every run compiles the same way
+        output = subprocess.check_output([sys.executable, "-B", os.path.abspath(__file__), "--measure"])
+        results.append([float(value) for value in output.split()])
+
+    imported = sorted(result[0] for result in results)[RUNS // 2]
+    started = sorted(result[2] for result in results)[RUNS // 2]
+    print("Median of {} runs".format(RUNS))
+    print("import plugin:             {:7.1f} ms ({} device modules)".format(imported * 1000, int(results[0][1])))
+    print("plugs and H&Ts started:    {:7.1f} ms ({} device modules)".format(started * 1000, int(results[0][3])))
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        measure()
+    else:
+        main()
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""
+Profiles the cost of logging while messages are handled at the info log level.
+
+10k messages are handled by a Shelly 1PM and a Shelly Motion at the info level, the default for
+the plugin, along with the debug lines that processMessages logs for each message. The time spent
+in the logging module and in ShellyLogger is reported as a share of the total time.
+
+Pass --handler-level to set the level on the log handler only, as the plugin used to, instead of
+on the logger.
+
+Run from the "Server Plugin" directory:
+    python tests/bench_logging.py [--handler-level]
+"""
+import cProfile
+import logging
+import os
+import pstats
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mocking.IndigoDevice import IndigoDevice
+from mocking.IndigoServer import Indigo
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+
+from Devices.Relays.Shelly_1PM import Shelly_1PM
+from Devices.Sensors.Shelly_Motion import Shelly_Motion
+
+MESSAGES = 10000
+ADDRESS = "shellies/bench"
+
+BURST = [
+    (Shelly_1PM, "relay/0", "on"),
+    (Shelly_1PM, "relay/0/power", "12.5"),
+    (Shelly_1PM, "relay/0/energy", "100"),
+    (Shelly_1PM, "temperature", "45.2"),
+    (Shelly_1PM, "input_event/0", '{"event": "S", "event_cnt": 1}'),
+    (Shelly_1PM, "shellies/announce", '{"id": "bench", "mac": "AABBCC", "ip": "192.168.1.2", "fw_ver": "1.0", "new_fw": false}'),
+    (Shelly_Motion, "status", '{"motion": false, "active": true, "vibration": false, "lux": 100, "bat": 90}'),
+]
+
+
+def build(deviceClass, deviceId):
+    device = IndigoDevice(id=deviceId, name=deviceClass.__name__)
+    device.pluginProps.update({
+        "broker-id": "1", "address": ADDRESS, "channel": "0", "message-type": "shellies",
+        "int-temp-units": "C", "last-input-event-id": -1
+    })
+    device.states.update({"online": True, "onOffState": False, "accumEnergyTotal": 0.0, "batteryLevel": 90})
+    return deviceClass(device)
+
+
+def isLogging(function):
+    filename = function[0]
+    return os.sep + "logging" + os.sep in filename or filename.endswith("ShellyLogger.py")
+
+
+def main():
+    pluginLogger = logging.getLogger('Plugin')
+    handler = logging.NullHandler()
+    pluginLogger.addHandler(handler)
+    if "--handler-level" in sys.argv:
+        pluginLogger.setLevel(logging.DEBUG)
+        handler.setLevel(logging.INFO)
+    else:
+        pluginLogger.setLevel(logging.INFO)
+    indigo.activePlugin.pluginPrefs['log-device-activity'] = True
+
+    shellies = {deviceClass: build(deviceClass, deviceId) for deviceId, deviceClass in enumerate([Shelly_1PM, Shelly_Motion], start=1)}
+    messages = [(shellies[deviceClass], topic if topic == "shellies/announce" else "{}/{}".format(ADDRESS, topic), payload) for deviceClass, topic, payload in BURST]
+    messages = (messages * (MESSAGES // len(messages) + 1))[:MESSAGES]
+
+    # The level check that processMessages makes up front
+    debugLogging = "--handler-level" in sys.argv or pluginLogger.isEnabledFor(logging.DEBUG)
+
+    def run():
+        for shelly, topic, payload in messages:
+            if debugLogging:
+                pluginLogger.debug(u"    Processing: \"%s\" on topic \"%s\"", payload, topic)
+                pluginLogger.debug(u"        \"%s\" handling \"%s\" on \"%s\"", shelly.device.name, payload, topic)
+            shelly.handleMessage(topic, payload)
+
+    profile = cProfile.Profile()
+    profile.runcall(run)
+    stats = pstats.Stats(profile)
+
+    total = stats.total_tt
+    logging_time = sum(stat[2] for function, stat in stats.stats.items() if isLogging(function))
+    print("{} messages at the info level{}".format(MESSAGES, " (handler level)" if "--handler-level" in sys.argv else ""))
+    print("total:   {:8.1f} ms".format(total * 1000))
+    print("logging: {:8.1f} ms ({:.1f}%)".format(logging_time * 1000, logging_time / total * 100))
+
+
+if __name__ == "__main__":
+    main()
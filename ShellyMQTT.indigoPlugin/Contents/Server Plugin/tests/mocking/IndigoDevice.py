@@ -8,8 +8,18 @@ class IndigoDevice:
         self.pluginProps = {}
         self.image = None
         self.brightness = 0
+        self.serverCalls = 0  # The number of round-trips made to the Indigo server
 
     def updateStateOnServer(self, key, value, uiValue=None, decimalPlaces=0):
+        self.serverCalls += 1
+        self.setState(key, value, uiValue, decimalPlaces)
+
+    def updateStatesOnServer(self, states):
+        self.serverCalls += 1
+        for state in states:
+            self.setState(state['key'], state['value'], state.get('uiValue', None), state.get('decimalPlaces', 0))
+
+    def setState(self, key, value, uiValue=None, decimalPlaces=0):
         self.states[key] = value
         self.states_meta[key] = {'value': value, 'uiValue': uiValue, 'decimalPlaces': decimalPlaces}
 
@@ -18,9 +28,11 @@ class IndigoDevice:
             self.brightness = value
 
     def replacePluginPropsOnServer(self, pluginProps):
+        self.serverCalls += 1
         self.pluginProps = pluginProps
 
     def updateStateImageOnServer(self, image):
+        self.serverCalls += 1
         self.image = image
 
     def refreshFromServer(self):
@@ -1,3 +1,8 @@
+import logging
+
+from Core.TriggerIndex import TriggerIndex
+
+
 class IndigoPlugin:
 
     def __init__(self):
@@ -9,5 +14,31 @@ class ShellyPlugin(IndigoPlugin):
     def __init__(self):
         IndigoPlugin.__init__(self)
         self.shellyDevices = {}
-        self.triggers = {}
+        self.triggerIndex = TriggerIndex()
         self.lowBatteryThreshold = 20
+
+
+class PluginBase(object):
+    """
+    The parts of indigo.PluginBase that plugin.py relies on.
+    """
+
+    def __init__(self, pluginId, pluginDisplayName, pluginVersion, pluginPrefs):
+        self.pluginId = pluginId
+        self.pluginDisplayName = pluginDisplayName
+        self.pluginVersion = pluginVersion
+        self.pluginPrefs = pluginPrefs
+        self.logger = logging.getLogger("Plugin")
+        self.indigo_log_handler = logging.NullHandler()
+
+    def deviceUpdated(self, origDev, newDev):
+        # Indigo restarts the device when its communication properties change
+        if self.didDeviceCommPropertyChange(origDev, newDev):
+            self.deviceStopComm(origDev)
+            self.deviceStartComm(newDev)
+
+    def didDeviceCommPropertyChange(self, origDev, newDev):
+        return False
+
+    def stopConcurrentThread(self):
+        pass
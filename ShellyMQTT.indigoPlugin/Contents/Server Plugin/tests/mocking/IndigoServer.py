@@ -1,5 +1,5 @@
 from MQTTConnector import MQTTConnector
-from IndigoPlugin import ShellyPlugin
+from IndigoPlugin import ShellyPlugin, PluginBase
 
 
 class Indigo:
@@ -12,6 +12,8 @@ class Indigo:
         self.activePlugin = ShellyPlugin()
         self.device = IndigoDevice()
         self.trigger = TriggerExecutor()
+        self.PluginBase = PluginBase
+        self.devices = {}  # {<deviceId>: <IndigoDevice>}
 
     def Dict(self):
         return {}
@@ -27,6 +29,10 @@ class IndigoServer:
     def getPlugin(self, identifier):
         return self.plugins.get(identifier, None)
 
+    @staticmethod
+    def getInstallFolderPath():
+        return "/Library/Application Support/Perceptive Automation/Indigo"
+
 
 class IndigoDevice:
 
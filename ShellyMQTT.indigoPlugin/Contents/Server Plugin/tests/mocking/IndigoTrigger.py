@@ -1,6 +1,7 @@
 class IndigoTrigger:
 
-    def __init__(self, pluginTypeId, pluginProps={}):
+    def __init__(self, pluginTypeId, pluginProps={}, id=None):
+        self.id = id
         self.pluginTypeId = pluginTypeId
         self.pluginProps = pluginProps
         self.executed = False
@@ -0,0 +1,71 @@
+# coding=utf-8
+import unittest
+
+from Core.AnnounceScheduler import AnnounceScheduler
+
+
+class Test_AnnounceScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = AnnounceScheduler(rate=10, burst=2)
+
+    def test_disabled_releases_everything(self):
+        """Test that every announce is released right away when the rate is 0."""
+        self.scheduler.rate = 0
+        for key in range(5):
+            self.scheduler.put(key, "shelly %d" % key)
+
+        self.assertEqual(0, self.scheduler.getTimeout(now=0))
+        self.assertEqual(5, len(self.scheduler.flush(now=0)))
+
+    def test_burst(self):
+        """Test that only a burst of announces is released at once."""
+        for key in range(5):
+            self.scheduler.put(key, "shelly %d" % key)
+
+        self.assertListEqual([(0, "shelly 0"), (1, "shelly 1")], self.scheduler.flush(now=100))
+        self.assertListEqual([], self.scheduler.flush(now=100))
+        self.assertAlmostEqual(0.1, self.scheduler.getTimeout(now=100))
+
+    def test_rate(self):
+        """Test that announces are released at the rate once the burst is used."""
+        for key in range(5):
+            self.scheduler.put(key, "shelly %d" % key)
+        self.scheduler.flush(now=100)
+
+        self.assertListEqual([(2, "shelly 2")], self.scheduler.flush(now=100.1))
+        self.assertListEqual([(3, "shelly 3"), (4, "shelly 4")], self.scheduler.flush(now=100.35))
+        self.assertIsNone(self.scheduler.getTimeout(now=100.35))
+
+    def test_jitter(self):
+        """Test that the interval between announces changes by at most the jitter."""
+        self.scheduler.jitter = 0.5
+        intervals = [self.scheduler.getInterval() for _ in range(100)]
+        self.assertTrue(all(0.05 <= interval <= 0.15 for interval in intervals))
+        self.assertGreater(len(set(intervals)), 1)
+
+    def test_put_existing_key(self):
+        """Test that a device that is already scheduled is only announced once."""
+        self.assertTrue(self.scheduler.put(1, "shelly 1"))
+        self.assertFalse(self.scheduler.put(2, "shelly 2"))
+        self.assertFalse(self.scheduler.put(1, "shelly 1"))
+
+        self.assertListEqual([(1, "shelly 1"), (2, "shelly 2")], self.scheduler.flush(now=100))
+        self.assertEqual(2, self.scheduler.getStatistics()['scheduled'])
+
+    def test_discard(self):
+        """Test that a discarded announce is not released."""
+        self.scheduler.put(1, "shelly 1")
+        self.scheduler.put(2, "shelly 2")
+        self.assertTrue(self.scheduler.discard(1))
+        self.assertFalse(self.scheduler.discard(1))
+
+        self.assertListEqual([(2, "shelly 2")], self.scheduler.flush(now=100))
+        self.assertDictEqual({'scheduled': 2, 'released': 1, 'skipped': 1, 'pending': 0}, self.scheduler.getStatistics())
+
+    def test_force(self):
+        """Test that a forced flush releases every announce."""
+        for key in range(5):
+            self.scheduler.put(key, "shelly %d" % key)
+
+        self.assertEqual(5, len(self.scheduler.flush(now=100, force=True)))
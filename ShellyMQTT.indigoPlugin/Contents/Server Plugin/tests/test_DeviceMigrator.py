@@ -0,0 +1,69 @@
+# coding=utf-8
+import unittest
+
+from mocking.IndigoDevice import IndigoDevice
+
+from Core.DeviceMigrator import DeviceMigrator
+
+
+class Test_DeviceMigrator(unittest.TestCase):
+
+    def setUp(self):
+        self.device = IndigoDevice(id=123456789, name="Device")
+        self.applied = []
+        self.migrator = DeviceMigrator([self.first, self.second])
+
+    def first(self, device):
+        self.applied.append("first")
+        return device
+
+    def second(self, device):
+        self.applied.append("second")
+        return device
+
+    def test_getCurrentVersion(self):
+        """Test that the current version is the number of migrations."""
+        self.assertEqual(2, self.migrator.getCurrentVersion())
+
+    def test_getVersion(self):
+        """Test that the version is read from the device props."""
+        self.assertEqual(0, self.migrator.getVersion(self.device))
+        self.device.pluginProps['devVersCount'] = "1"
+        self.assertEqual(1, self.migrator.getVersion(self.device))
+        self.device.pluginProps['devVersCount'] = "invalid"
+        self.assertEqual(0, self.migrator.getVersion(self.device))
+
+    def test_migrate_new_device(self):
+        """Test that a device without a version runs every migration and is updated to the current version."""
+        self.assertTrue(self.migrator.needsMigration(self.device))
+        self.migrator.migrate(self.device)
+
+        self.assertListEqual(["first", "second"], self.applied)
+        self.assertEqual(2, self.device.pluginProps['devVersCount'])
+        self.assertFalse(self.migrator.needsMigration(self.device))
+
+    def test_migrate_runs_remaining_migrations(self):
+        """Test that a device only runs the migrations it has not run yet."""
+        self.device.pluginProps['devVersCount'] = 1
+        self.migrator.migrate(self.device)
+
+        self.assertListEqual(["second"], self.applied)
+        self.assertEqual(2, self.device.pluginProps['devVersCount'])
+
+    def test_migrate_up_to_date(self):
+        """Test that an up to date device makes no calls to the server."""
+        self.device.pluginProps['devVersCount'] = 2
+        self.assertFalse(self.migrator.needsMigration(self.device))
+        self.migrator.migrate(self.device)
+
+        self.assertListEqual([], self.applied)
+        self.assertEqual(0, self.device.serverCalls)
+
+    def test_migrate_unknown_version(self):
+        """Test that a device from a newer version of the plugin is left alone."""
+        self.device.pluginProps['devVersCount'] = 3
+        self.assertFalse(self.migrator.needsMigration(self.device))
+        self.migrator.migrate(self.device)
+
+        self.assertListEqual([], self.applied)
+        self.assertEqual(3, self.device.pluginProps['devVersCount'])
@@ -0,0 +1,74 @@
+# coding=utf-8
+import unittest
+import sys
+
+from mocking.IndigoServer import Indigo
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+from Core.DeviceRegistry import DeviceRegistry
+
+
+class Test_DeviceRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = DeviceRegistry({
+            "shelly-1": {
+                "module": "Devices.Relays.Shelly_1",
+                "relations": [],
+                "addons": ["ds1820", "dht22", "detached-switch"]
+            },
+            "shelly-2-5-relay": {
+                "module": "Devices.Relays.Shelly_2_5_Relay",
+                "relations": ["shelly-2-5-relay"],
+                "addons": ["detached-switch"]
+            },
+            "shelly-plug": {
+                "module": "Devices.Plugs.Shelly_Plug",
+                "relations": [],
+                "addons": []
+            },
+            "shelly-bulb-duo": {
+                "module": "Devices.Bulbs.Shelly_Bulb_Duo",
+                "relations": [],
+                "addons": []
+            }
+        })
+
+    def test_get(self):
+        """Test that the class of a device type is imported from its module."""
+        from Devices.Plugs.Shelly_Plug import Shelly_Plug
+        self.assertIs(Shelly_Plug, self.registry.get("shelly-plug"))
+        self.assertIs(Shelly_Plug, self.registry.get("shelly-plug"))
+        self.assertListEqual(["shelly-plug"], self.registry.getLoadedDeviceTypeIds())
+
+    def test_get_unknown(self):
+        """Test that an unknown device type has no class."""
+        self.assertNotIn("shelly-unknown", self.registry)
+        self.assertIsNone(self.registry.get("shelly-unknown"))
+        self.assertEqual("default", self.registry.get("shelly-unknown", "default"))
+
+    def test_modules_are_imported_on_first_use(self):
+        """Test that the module of a device type is not imported until the device type is used."""
+        sys.modules.pop("Devices.Bulbs.Shelly_Bulb_Duo", None)
+        self.assertIn("shelly-bulb-duo", self.registry)
+        self.assertNotIn("Devices.Bulbs.Shelly_Bulb_Duo", sys.modules)
+
+        self.registry.get("shelly-bulb-duo")
+        self.assertIn("Devices.Bulbs.Shelly_Bulb_Duo", sys.modules)
+
+    def test_getRelatedDeviceTypeIds(self):
+        """Test that the device types that can be used as a template are looked up."""
+        self.assertListEqual(["shelly-2-5-relay"], self.registry.getRelatedDeviceTypeIds("shelly-2-5-relay"))
+        self.assertListEqual([], self.registry.getRelatedDeviceTypeIds("shelly-plug"))
+        self.assertListEqual([], self.registry.getRelatedDeviceTypeIds("shelly-unknown"))
+
+    def test_getAddonHostDeviceTypeIds(self):
+        """Test that the device types that can host each addon category are indexed."""
+        self.assertListEqual(["shelly-1"], self.registry.getAddonHostDeviceTypeIds("ds1820"))
+        self.assertListEqual(["shelly-1", "shelly-2-5-relay"], self.registry.getAddonHostDeviceTypeIds("detached-switch"))
+        self.assertListEqual([], self.registry.getAddonHostDeviceTypeIds("unknown"))
+
+    def test_indexes_do_not_import_modules(self):
+        """Test that building the indexes does not import the device modules."""
+        self.assertListEqual([], self.registry.getLoadedDeviceTypeIds())
@@ -0,0 +1,27 @@
+# coding=utf-8
+import unittest
+from mock import patch
+
+from Core.JsonPayload import JsonPayload
+
+
+class Test_JsonPayload(unittest.TestCase):
+
+    def test_getValue(self):
+        """Test that the payload is decoded."""
+        parsed = JsonPayload('{"0": {"hwID": "28aabbccdd", "tC": 20.5}}')
+        self.assertDictEqual({"0": {"hwID": "28aabbccdd", "tC": 20.5}}, parsed.getValue())
+
+    def test_getValue_decodes_once(self):
+        """Test that the payload is only decoded on the first call."""
+        parsed = JsonPayload('{"ison": true}')
+        with patch('json.loads', return_value={"ison": True}) as loads:
+            parsed.getValue()
+            parsed.getValue()
+        self.assertEqual(1, loads.call_count)
+
+    def test_getValue_invalid(self):
+        """Test that an invalid payload raises a ValueError on every call."""
+        parsed = JsonPayload("not json")
+        self.assertRaises(ValueError, parsed.getValue)
+        self.assertRaises(ValueError, parsed.getValue)
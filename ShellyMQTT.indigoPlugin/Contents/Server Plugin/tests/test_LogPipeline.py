@@ -0,0 +1,82 @@
+# coding=utf-8
+import unittest
+import logging
+import threading
+import time
+
+from Core.LogPipeline import LogPipeline
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+        self.blocked = threading.Event()
+        self.blocked.set()
+
+    def emit(self, record):
+        self.blocked.wait(5)
+        self.messages.append(record.getMessage())
+
+
+class Test_LogPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.target = logging.getLogger('Test')
+        self.target.setLevel(logging.DEBUG)
+        self.handler = RecordingHandler()
+        self.target.addHandler(self.handler)
+        self.logger = logging.getLogger('Test.Device')
+        self.pipeline = LogPipeline(self.target, capacity=3)
+        self.pipeline.install(self.logger)
+
+    def tearDown(self):
+        self.handler.blocked.set()
+        self.pipeline.stop()
+        self.target.removeHandler(self.handler)
+
+    def test_records_are_written_in_order(self):
+        """Test that the records are written by the target logger in the order they were logged."""
+        for i in range(3):
+            self.logger.info(u"message %d", i)
+        self.pipeline.stop()
+
+        self.assertListEqual([u"message 0", u"message 1", u"message 2"], self.handler.messages)
+
+    def test_install_stops_propagation(self):
+        """Test that the records are only written by the pipeline."""
+        self.assertFalse(self.logger.propagate)
+        self.pipeline.stop()
+        self.assertTrue(self.logger.propagate)
+        self.assertNotIn(self.pipeline, self.logger.handlers)
+
+    def test_overflow_is_summarised(self):
+        """Test that records that don't fit are dropped and reported in a single summary."""
+        self.handler.blocked.clear()
+        self.logger.error(u"first")
+        # Wait for the writer to take the first record so that it is blocked writing it
+        while self.pipeline.qsize() > 0:
+            time.sleep(0.001)
+
+        for i in range(10):
+            self.logger.error(u"error %d", i)
+        self.assertEqual(3, self.pipeline.qsize())
+        self.handler.blocked.set()
+        self.pipeline.stop()
+
+        self.assertListEqual([u"first", u"error 0", u"error 1", u"error 2", u"7 log messages suppressed because too many were logged at once"], self.handler.messages)
+        self.assertEqual(7, self.pipeline.totalSuppressed)
+
+    def test_emit_does_not_block(self):
+        """Test that logging returns while the writer is blocked."""
+        self.handler.blocked.clear()
+        done = threading.Event()
+
+        def flood():
+            for i in range(100):
+                self.logger.error(u"error %d", i)
+            done.set()
+
+        threading.Thread(target=flood).start()
+        self.assertTrue(done.wait(1))
@@ -0,0 +1,115 @@
+# coding=utf-8
+import unittest
+import threading
+import time
+
+from Core.MessageQueue import MessageQueue
+
+
+def message(brokerID=1, message_type="shellies"):
+    return {'brokerID': brokerID, 'message_type': message_type}
+
+
+class Test_MessageQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = MessageQueue()
+
+    def test_empty(self):
+        """Test that a new queue is empty."""
+        self.assertTrue(self.queue.empty())
+
+    def test_put(self):
+        """Test that putting a message makes the queue non-empty."""
+        self.queue.put(message())
+        self.assertFalse(self.queue.empty())
+
+    def test_drain_returns_messages_in_order(self):
+        """Test draining returns all messages in the order they were queued."""
+        self.queue.put(message(1, "a"))
+        self.queue.put(message(1, "b"))
+        self.queue.put(message(2, "a"))
+        self.assertListEqual([message(1, "a"), message(1, "b"), message(2, "a")], self.queue.drain())
+        self.assertTrue(self.queue.empty())
+
+    def test_drain_empty(self):
+        """Test draining an empty queue."""
+        self.assertListEqual([], self.queue.drain())
+
+    def test_wait_returns_immediately_with_messages(self):
+        """Test waiting on a queue that already has messages."""
+        self.queue.put(message())
+        self.assertTrue(self.queue.wait())
+
+    def test_duplicate_keys_are_coalesced(self):
+        """Test that notifications for a pending broker and message type are merged."""
+        for _ in range(5):
+            self.queue.put(message(1, "a"))
+        self.queue.put(message("1", "a"))
+        self.queue.put(message(1, "b"))
+
+        self.assertListEqual([message(1, "a"), message(1, "b")], self.queue.drain())
+        statistics = self.queue.getStatistics()
+        self.assertEqual(2, statistics['queued'])
+        self.assertEqual(5, statistics['coalesced'])
+        self.assertEqual(0, statistics['pending'])
+
+    def test_key_can_be_queued_again_after_drain(self):
+        """Test that a drained key is queued again by a new notification."""
+        self.queue.put(message())
+        self.queue.drain()
+        self.queue.put(message())
+
+        self.assertListEqual([message()], self.queue.drain())
+        self.assertEqual(0, self.queue.getStatistics()['coalesced'])
+
+    def test_wait_after_stop(self):
+        """Test that a stopped queue does not block."""
+        self.queue.stop()
+        self.assertFalse(self.queue.wait())
+
+    def test_put_wakes_waiting_thread(self):
+        """Test that a blocked thread wakes up when a message is queued."""
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.queue.wait()))
+        waiter.start()
+        time.sleep(0.01)
+        self.assertTrue(waiter.is_alive())
+
+        self.queue.put(message())
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertListEqual([True], results)
+
+    def test_stop_wakes_waiting_thread(self):
+        """Test that a blocked thread wakes up when the queue is stopped."""
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.queue.wait()))
+        waiter.start()
+        time.sleep(0.01)
+
+        self.queue.stop()
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertListEqual([False], results)
+
+    def test_wake_wakes_waiting_thread(self):
+        """Test that a blocked thread wakes up without a message when the queue is woken."""
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.queue.wait()))
+        waiter.start()
+        time.sleep(0.01)
+        self.assertTrue(waiter.is_alive())
+
+        self.queue.wake()
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertListEqual([True], results)
+        self.assertTrue(self.queue.empty())
+
+    def test_wait_with_timeout(self):
+        """Test that a wait with a timeout returns when nothing is queued."""
+        start = time.time()
+        self.assertTrue(self.queue.wait(0.01))
+        self.assertTrue(self.queue.empty())
+        self.assertLess(time.time() - start, 1)
@@ -0,0 +1,82 @@
+# coding=utf-8
+import unittest
+
+from Core.MessageTypeIndex import MessageTypeIndex
+
+
+class Test_MessageTypeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = MessageTypeIndex()
+
+    def test_empty(self):
+        """Test that a new index does not contain any message types."""
+        self.assertNotIn("shellies", self.index)
+        self.assertListEqual([], self.index.getMessageTypes())
+
+    def test_add(self):
+        """Test that an added message type is in the index."""
+        self.index.add("shellies", ("device", 1))
+        self.assertIn("shellies", self.index)
+        self.assertEqual(1, self.index.getCount("shellies"))
+
+    def test_add_counts_references(self):
+        """Test that every reference to a message type is counted."""
+        for deviceId in range(500):
+            self.index.add("shellies", ("device", deviceId))
+        self.index.add("shellies", ("trigger", 1))
+
+        self.assertEqual(501, self.index.getCount("shellies"))
+        self.assertListEqual(["shellies"], self.index.getMessageTypes())
+
+    def test_remove_keeps_type_while_referenced(self):
+        """Test that a message type stays in the index until the last reference is removed."""
+        self.index.add("shellies", ("device", 1))
+        self.index.add("shellies", ("trigger", 2))
+
+        self.assertTrue(self.index.remove("shellies", ("device", 1)))
+        self.assertIn("shellies", self.index)
+        self.assertTrue(self.index.remove("shellies", ("trigger", 2)))
+        self.assertNotIn("shellies", self.index)
+
+    def test_remove_same_holder_twice(self):
+        """Test that a holder can reference the same message type more than once."""
+        self.index.add("shellies", ("device", 1))
+        self.index.add("shellies", ("device", 1))
+
+        self.index.remove("shellies", ("device", 1))
+        self.assertIn("shellies", self.index)
+        self.index.remove("shellies", ("device", 1))
+        self.assertNotIn("shellies", self.index)
+
+    def test_remove_unknown_reference(self):
+        """Test that removing a reference that was never added does not raise."""
+        self.index.add("shellies", ("device", 1))
+
+        self.assertFalse(self.index.remove("shellies", ("device", 2)))
+        self.assertFalse(self.index.remove("other", ("device", 1)))
+        self.assertEqual(1, self.index.getCount("shellies"))
+
+    def test_removeHolder(self):
+        """Test that all references of a holder are removed."""
+        self.index.add("shellies", ("device", 1))
+        self.index.add("announce", ("device", 1))
+        self.index.add("shellies", ("device", 2))
+
+        self.index.removeHolder(("device", 1))
+        self.assertListEqual(["shellies"], self.index.getMessageTypes())
+        self.assertListEqual([("device", 2)], self.index.getHolders("shellies"))
+
+    def test_removeHolder_unknown(self):
+        """Test that removing a holder without references does not raise."""
+        self.index.removeHolder(("trigger", 1))
+        self.assertListEqual([], self.index.getMessageTypes())
+
+    def test_getHolders(self):
+        """Test getting the devices and triggers that hold a message type."""
+        self.index.add("shellies", ("trigger", 3))
+        self.index.add("shellies", ("device", 2))
+        self.index.add("shellies", ("device", 1))
+
+        self.assertListEqual([("device", 1), ("device", 2), ("trigger", 3)], self.index.getHolders("shellies"))
+        self.assertListEqual([], self.index.getHolders("other"))
@@ -0,0 +1,167 @@
+# coding=utf-8
+import unittest
+from mock import patch
+import sys
+import logging
+
+from mocking.IndigoDevice import IndigoDevice
+from mocking.IndigoServer import Indigo
+from mocking.IndigoTrigger import IndigoTrigger
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+from Core.TriggerIndex import TriggerIndex
+from Devices.PhysicalDevice import PhysicalDevice
+from Devices.Relays.Shelly_2_5_Relay import Shelly_2_5_Relay
+from Devices.Sensors.Shelly_EM_Meter import Shelly_EM_Meter
+
+
+class Test_PhysicalDevice(unittest.TestCase):
+
+    def setUp(self):
+        indigo.__init__()
+        # Devices.Shelly keeps the indigo mock of the first test module that imported it
+        patcher = patch('Devices.Shelly.indigo', indigo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        indigo.activePlugin.triggerIndex = TriggerIndex()
+        logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
+        self.unit = PhysicalDevice(1, "shellies/shelly25relay-test")
+
+        self.channels = []
+        for channel in range(2):
+            device = IndigoDevice(id=123456 + channel, name="Channel {}".format(channel))
+            device.pluginProps['address'] = "shellies/shelly25relay-test"
+            device.pluginProps['int-temp-units'] = "C"
+            device.pluginProps['channel'] = channel
+            device.updateStateOnServer("online", False)
+            device.updateStateOnServer("overtemperature", False)
+            device.updateStateOnServer("temperature-status", "Normal")
+            shelly = Shelly_2_5_Relay(device)
+            self.unit.attach(shelly)
+            self.channels.append(shelly)
+
+    def test_attach(self):
+        """Test that attached devices are channels of the unit."""
+        self.assertEqual(2, len(self.unit))
+        self.assertListEqual(self.channels, self.unit.getChannels())
+        for shelly in self.channels:
+            self.assertIs(self.unit, shelly.physicalDevice)
+
+    def test_detach(self):
+        """Test that a detached device is no longer a channel of the unit."""
+        self.assertEqual(1, self.unit.detach(self.channels[0]))
+        self.assertIsNone(self.channels[0].physicalDevice)
+        self.assertListEqual([self.channels[1]], self.unit.getChannels())
+
+    def test_getDispatchKey_is_shared(self):
+        """Test that the channels are handled under the key of the unit."""
+        self.assertEqual((1, "shellies/shelly25relay-test"), self.unit.getDispatchKey())
+        for shelly in self.channels:
+            self.assertEqual(self.unit.getDispatchKey(), shelly.getDispatchKey())
+
+    def test_isSharedTopic(self):
+        """Test that only the topics reporting on the unit are shared."""
+        self.assertTrue(self.unit.isSharedTopic("shellies/shelly25relay-test/online"))
+        self.assertTrue(self.unit.isSharedTopic("shellies/shelly25relay-test/temperature"))
+        self.assertTrue(self.unit.isSharedTopic("shellies/shelly25relay-test/ext_temperatures"))
+        self.assertFalse(self.unit.isSharedTopic("shellies/shelly25relay-test/relay/0"))
+        self.assertFalse(self.unit.isSharedTopic("shellies/another-test/online"))
+
+    def test_handleMessage_online(self):
+        """Test that the online status is passed to every channel."""
+        self.unit.handleMessage("shellies/shelly25relay-test/online", "true")
+        for shelly in self.channels:
+            self.assertTrue(shelly.device.states['online'])
+
+    def test_handleMessage_temperature(self):
+        """Test that the internal temperature is passed to every channel."""
+        self.unit.handleMessage("shellies/shelly25relay-test/temperature", "50")
+        for shelly in self.channels:
+            self.assertAlmostEqual(50, shelly.device.states['internal-temperature'])
+
+    def test_handleMessage_only_given_channels(self):
+        """Test that a message is only passed to the channels that need it."""
+        self.unit.handleMessage("shellies/shelly25relay-test/overtemperature", "1", [self.channels[1]])
+        self.assertFalse(self.channels[0].device.states['overtemperature'])
+        self.assertTrue(self.channels[1].device.states['overtemperature'])
+
+    def test_handleMessage_shared_topics_are_not_routed_to_channels(self):
+        """Test that the shared topics are parsed by the unit instead of by each channel."""
+        with patch.object(Shelly_2_5_Relay, 'handleMessage') as handleMessage:
+            for topic, payload in [("online", "true"), ("temperature", "50"), ("overtemperature", "1")]:
+                self.unit.handleMessage("shellies/shelly25relay-test/{}".format(topic), payload)
+        handleMessage.assert_not_called()
+        for shelly in self.channels:
+            self.assertTrue(shelly.device.states['online'])
+            self.assertTrue(shelly.device.states['overtemperature'])
+
+    def test_handleMessage_temperature_channel_units(self):
+        """Test that each channel applies its own units to the temperature of the unit."""
+        self.channels[1].device.pluginProps['int-temp-units'] = "C->F"
+        self.unit.handleMessage("shellies/shelly25relay-test/temperature", "50")
+        self.assertAlmostEqual(50, self.channels[0].device.states['internal-temperature'])
+        self.assertAlmostEqual(122, self.channels[1].device.states['internal-temperature'])
+
+    def test_handleMessage_temperature_invalid(self):
+        """Test that an invalid temperature is not applied to the channels."""
+        self.unit.handleMessage("shellies/shelly25relay-test/temperature", "hot")
+        for shelly in self.channels:
+            self.assertNotIn('internal-temperature', shelly.device.states)
+
+    def test_handleMessage_temperature_skips_channels_without_handler(self):
+        """Test that channels that don't report the temperature, such as an EM meter, are skipped."""
+        device = IndigoDevice(id=123458, name="Meter")
+        device.pluginProps['address'] = "shellies/shelly25relay-test"
+        meter = Shelly_EM_Meter(device)
+        self.unit.attach(meter)
+
+        self.unit.handleMessage("shellies/shelly25relay-test/temperature", "50")
+        self.unit.handleMessage("shellies/shelly25relay-test/overtemperature", "1")
+        self.assertNotIn('internal-temperature', device.states)
+        self.assertNotIn('overtemperature', device.states)
+
+    def test_handleMessage_ext_temperatures(self):
+        """Test that the sensors are parsed once and kept by every channel."""
+        self.unit.handleMessage("shellies/shelly25relay-test/ext_temperatures", '{"0":{"hwID":"AAAA","tC":20.5},"1":{"hwID":"BBBB","tC":999}}')
+        for shelly in self.channels:
+            self.assertListEqual([{"channel": 0, "id": "AAAA"}], shelly.temperature_sensors)
+
+    def test_handleMessage_ext_temperatures_invalid(self):
+        """Test that a payload that is not json is ignored."""
+        self.unit.handleMessage("shellies/shelly25relay-test/ext_temperatures", "not json")
+        for shelly in self.channels:
+            self.assertListEqual([], shelly.temperature_sensors)
+
+    def test_handleMessage_temperature_status_executes_triggers_once(self):
+        """Test that an abnormal temperature of the unit fires the triggers once."""
+        executed = []
+        indigo.trigger.execute = executed.append
+        trigger = IndigoTrigger("abnormal-temperature-status-any", {}, id=1)
+        indigo.activePlugin.triggerIndex.add(trigger)
+
+        self.unit.handleMessage("shellies/shelly25relay-test/temperature_status", "High")
+        self.assertListEqual([trigger], executed)
+        for shelly in self.channels:
+            self.assertEqual("High", shelly.device.states['temperature-status'])
+
+    def test_applyAnnouncement(self):
+        """Test that the unit keeps the announced details and passes them to its channels."""
+        self.assertFalse(self.unit.hasAnnounced())
+        self.unit.applyAnnouncement({
+            "id": "shelly25relay-test",
+            "mac": "aa:bb:cc:dd:ee:ff",
+            "ip": "192.168.1.100",
+            "fw_ver": "0.1.2",
+            "new_fw": True
+        })
+
+        self.assertTrue(self.unit.hasAnnounced())
+        self.assertEqual("192.168.1.100", self.unit.getIpAddress())
+        self.assertEqual("0.1.2", self.unit.getFirmware())
+        self.assertTrue(self.unit.updateAvailable())
+        for shelly in self.channels:
+            self.assertEqual("192.168.1.100", shelly.device.states['ip-address'])
+            self.assertEqual("192.168.1.100", shelly.getIpAddress())
+            self.assertEqual("0.1.2", shelly.getFirmware())
+            self.assertTrue(shelly.updateAvailable())
@@ -3,6 +3,7 @@ import unittest
 from mock import patch
 import sys
 import logging
+import threading
 
 from mocking.IndigoDevice import IndigoDevice
 from mocking.IndigoServer import Indigo
@@ -11,12 +12,17 @@ from mocking.IndigoTrigger import IndigoTrigger
 indigo = Indigo()
 sys.modules['indigo'] = indigo
 import Devices.Shelly
+from Core.JsonPayload import JsonPayload
 
 
 class Test_Shelly(unittest.TestCase):
 
     def setUp(self):
         indigo.__init__()
+        # Devices.Shelly keeps the indigo mock of the first test module that imported it
+        patcher = patch('Devices.Shelly.indigo', indigo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
         self.device = IndigoDevice(id=123456, name="New Device")
         self.shelly = Devices.Shelly.Shelly(self.device)
         logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
@@ -133,12 +139,15 @@ class Test_Shelly(unittest.TestCase):
 
         self.device.pluginProps['announce-message-type'] = "some-other-type"
         self.device.pluginProps['announce-message-type-same-as-message-type'] = True
+        self.shelly.resetConfig()
         self.assertListEqual(["some-type"], self.shelly.getMessageTypes())
 
         self.device.pluginProps['announce-message-type-same-as-message-type'] = False
+        self.shelly.resetConfig()
         self.assertListEqual(["some-type", "some-other-type"], self.shelly.getMessageTypes())
 
         del self.device.pluginProps['message-type']
+        self.shelly.resetConfig()
         self.assertListEqual(["some-other-type"], self.shelly.getMessageTypes())
 
     @patch('Devices.Shelly.Shelly.publish')
@@ -286,6 +295,17 @@ class Test_Shelly(unittest.TestCase):
         self.assertEqual("3", self.device.states['firmware-version'])
         self.assertFalse(self.device.states['has-firmware-update'])
 
+    def test_applyAnnouncement(self):
+        """Apply an announcement that has already been parsed."""
+        self.device.pluginProps['address'] = "shellies/test-shelly"
+        announcement = {"id": "test-shelly", "mac": "aa:bb:cc:dd", "ip": "192.168.1.100", "fw_ver": "0.0.0", "new_fw": False}
+
+        self.shelly.applyAnnouncement(announcement)
+        self.assertEqual("aa:bb:cc:dd", self.device.states['mac-address'])
+        self.assertEqual("192.168.1.100", self.device.states['ip-address'])
+        self.assertEqual("0.0.0", self.device.states['firmware-version'])
+        self.assertFalse(self.device.states['has-firmware-update'])
+
     def test_updateEnergy_4_decimals(self):
         self.shelly.updateEnergy(50)
         self.assertAlmostEqual(0.0008, self.shelly.device.states['accumEnergyTotal'], 4)
@@ -436,15 +456,42 @@ class Test_Shelly(unittest.TestCase):
         self.shelly.processInputEvent(message)
         self.assertEqual(1, self.shelly.getLastInputEventId())
 
+    def test_process_input_event_does_not_write_props(self):
+        """Test that processing an event message keeps the event id in memory"""
+        self.device.serverCalls = 0
+        for eventId in range(1, 4):
+            self.shelly.processInputEvent('{"event": "S", "event_cnt": %d}' % eventId)
+
+        self.assertEqual(3, self.shelly.getLastInputEventId())
+        self.assertEqual(-1, self.device.pluginProps['last-input-event-id'])
+        self.assertEqual(0, self.device.serverCalls)
+
+    def test_saveLastInputEventId(self):
+        """Test that the last event id is only written to the props when it changed"""
+        self.assertFalse(self.shelly.saveLastInputEventId())
+        self.shelly.processInputEvent('{"event": "S", "event_cnt": 2}')
+
+        self.assertTrue(self.shelly.saveLastInputEventId())
+        self.assertEqual(2, self.device.pluginProps['last-input-event-id'])
+        self.assertFalse(self.shelly.saveLastInputEventId())
+
+    def test_saved_input_event_is_not_processed_after_restart(self):
+        """Test that an event that was saved is still detected as a duplicate by a new device object"""
+        self.shelly.processInputEvent('{"event": "S", "event_cnt": 2}')
+        self.shelly.saveLastInputEventId()
+
+        shelly = Devices.Shelly.Shelly(self.device)
+        self.assertEqual(2, shelly.getLastInputEventId())
+
     def test_process_input_event_trigger_executed(self):
         """Test processing an event message and a trigger was executed"""
-        trigger_S = IndigoTrigger("input-event-s", {'device-id': self.device.id})
-        trigger_S_other = IndigoTrigger("input-event-s", {'device-id': self.device.id + 1})
-        trigger_L = IndigoTrigger("input-event-l", {'device-id': self.device.id})
+        trigger_S = IndigoTrigger("input-event-s", {'device-id': self.device.id}, id=1)
+        trigger_S_other = IndigoTrigger("input-event-s", {'device-id': self.device.id + 1}, id=3)
+        trigger_L = IndigoTrigger("input-event-l", {'device-id': self.device.id}, id=2)
 
-        indigo.activePlugin.triggers['1'] = trigger_S
-        indigo.activePlugin.triggers['2'] = trigger_L
-        indigo.activePlugin.triggers['3'] = trigger_S_other
+        indigo.activePlugin.triggerIndex.add(trigger_S)
+        indigo.activePlugin.triggerIndex.add(trigger_L)
+        indigo.activePlugin.triggerIndex.add(trigger_S_other)
 
         message = '{"event": "S", "event_cnt": 1}'
 
@@ -455,16 +502,16 @@ class Test_Shelly(unittest.TestCase):
 
     def test_process_temperature_status_normal_event_trigger_executed(self):
         """Test that a normal temperature status fires executes a trigger"""
-        trigger = IndigoTrigger("abnormal-temperature-status-any", {})
-        indigo.activePlugin.triggers['1'] = trigger
+        trigger = IndigoTrigger("abnormal-temperature-status-any", {}, id=1)
+        indigo.activePlugin.triggerIndex.add(trigger)
 
         self.shelly.processTemperatureStatus("Normal")
         self.assertFalse(trigger.executed)
 
     def test_process_temperature_status_abnormal_event_trigger_executed(self):
         """Test that an abnormal temperature status fires executes a trigger"""
-        trigger = IndigoTrigger("abnormal-temperature-status-any", {})
-        indigo.activePlugin.triggers['1'] = trigger
+        trigger = IndigoTrigger("abnormal-temperature-status-any", {}, id=1)
+        indigo.activePlugin.triggerIndex.add(trigger)
 
         self.shelly.processTemperatureStatus("High")
         self.assertTrue(trigger.executed)
@@ -481,6 +528,18 @@ class Test_Shelly(unittest.TestCase):
         ]
         self.assertItemsEqual(expected, self.shelly.temperature_sensors)
 
+    def test_snapshot(self):
+        """Test that the connected sensors are kept in the snapshot and restored from it"""
+        self.assertDictEqual({}, self.shelly.getSnapshot())
+        self.shelly.processTemperatureSensors('{"0":{"hwID":"2885186e38190123","tC":20.5}}')
+        self.shelly.processHumiditySensors('{"0":{"hwID":"2885186e38190123","hum":50}}')
+        snapshot = self.shelly.getSnapshot()
+
+        restored = Devices.Shelly.Shelly(IndigoDevice(id=654321, name="Restored Device"))
+        restored.restoreSnapshot(snapshot)
+        self.assertListEqual([{"channel": 0, "id": "2885186e38190123"}], restored.temperature_sensors)
+        self.assertListEqual([{"channel": 0, "id": "2885186e38190123"}], restored.humidity_sensors)
+
     def test_process_temperature_sensors_ignores_invalid_sensors(self):
         """Test that the list of sensors is properly created"""
         payload = '{"0":{"hwID":"2885186e38190123","tC":20.5}, "1":{"hwID":"000000000000000","tC":999}, "2":{"hwID":"2885186e38190789","tC":22.5}}'
@@ -560,3 +619,178 @@ class Test_Shelly(unittest.TestCase):
             {"channel": 0, "id": "2885186e38190456"}
         ]
         self.assertItemsEqual(expected, self.shelly.humidity_sensors)
+
+    def test_handleMessage_uses_shared_json_payload(self):
+        """Test that a payload decoded for another device is not decoded again"""
+        topic = 'shellies/test-shelly/ext_temperatures'
+        payload = '{"0":{"hwID":"2885186e38190123","tC":20.5}}'
+        parsed = JsonPayload(payload)
+        parsed.getValue()
+
+        with patch('json.loads') as loads:
+            self.shelly.handleMessage(topic, payload, parsed)
+            loads.assert_not_called()
+
+        self.assertItemsEqual([{"channel": 0, "id": "2885186e38190123"}], self.shelly.temperature_sensors)
+        self.assertIsNone(self.shelly.jsonPayload)
+
+    def test_loadJson_ignores_other_payload(self):
+        """Test that the shared payload is only used for the payload it was decoded from"""
+        self.shelly.jsonPayload = JsonPayload('{"a": 1}')
+        self.assertDictEqual({"b": 2}, self.shelly.loadJson('{"b": 2}'))
+
+    def test_handleMessage_unknown_topic_ignored(self):
+        """Test that a message on a topic without a handler is ignored"""
+        self.shelly.handleMessage('shellies/test-shelly/unknown', 'payload')
+        self.assertEqual(0, len(self.device.states))
+
+    def test_getTopicHandler_builds_handlers_once(self):
+        """Test that the topic handlers are only built on the first lookup"""
+        self.assertIsNone(self.shelly.topicHandlers)
+        self.assertEqual(self.shelly.processOnline, self.shelly.getTopicHandler('shellies/test-shelly/online'))
+        handlers = self.shelly.topicHandlers
+
+        self.assertIsNone(self.shelly.getTopicHandler('shellies/test-shelly/unknown'))
+        self.assertIs(handlers, self.shelly.topicHandlers)
+
+    def test_resetConfig_uses_new_config(self):
+        """Test that the topic handlers are rebuilt after a config change"""
+        self.shelly.getTopicHandler('shellies/test-shelly/online')
+        self.device.pluginProps['address'] = "shellies/new-address"
+        self.assertIsNotNone(self.shelly.getTopicHandler('shellies/test-shelly/online'))
+
+        self.shelly.resetConfig()
+        self.assertIsNone(self.shelly.getTopicHandler('shellies/test-shelly/online'))
+        self.assertEqual(self.shelly.processOnline, self.shelly.getTopicHandler('shellies/new-address/online'))
+
+    def test_isCriticalTopic(self):
+        """Test that input events are handled ahead of telemetry"""
+        self.assertTrue(self.shelly.isCriticalTopic('shellies/test-shelly/input_event/0'))
+        self.assertFalse(self.shelly.isCriticalTopic('shellies/test-shelly/temperature_status'))
+        self.assertFalse(self.shelly.isCriticalTopic('shellies/test-shelly/online'))
+
+    def test_isTelemetryTopic(self):
+        """Test that only readings are coalesced and changes are never held"""
+        self.assertTrue(self.shelly.isTelemetryTopic('shellies/test-shelly/ext_temperatures'))
+        self.assertTrue(self.shelly.isTelemetryTopic('shellies/test-shelly/ext_humidities'))
+        self.assertFalse(self.shelly.isTelemetryTopic('shellies/test-shelly/online'))
+        self.assertFalse(self.shelly.isTelemetryTopic('shellies/test-shelly/temperature_status'))
+        self.assertFalse(self.shelly.isTelemetryTopic('shellies/test-shelly/input_event/0'))
+
+    def test_updateStateOnServer_skips_unchanged_state(self):
+        """Test that writing a state with the same value again does not go to the server"""
+        self.assertTrue(self.shelly.updateStateOnServer('curEnergyLevel', 10, uiValue='10 W'))
+        self.assertFalse(self.shelly.updateStateOnServer('curEnergyLevel', 10, uiValue='10 W'))
+        self.assertEqual(1, self.device.serverCalls)
+        self.assertEqual(1, self.shelly.stateWritesSaved)
+
+    def test_updateStateOnServer_writes_changed_state(self):
+        """Test that a new value, uiValue or value type is written to the server"""
+        self.shelly.updateStateOnServer('curEnergyLevel', 10, uiValue='10 W')
+        self.shelly.updateStateOnServer('curEnergyLevel', 11, uiValue='11 W')
+        self.shelly.updateStateOnServer('curEnergyLevel', 11, uiValue='11.0 W')
+        self.shelly.updateStateOnServer('curEnergyLevel', 11.0, uiValue='11.0 W')
+        self.assertEqual(4, self.device.serverCalls)
+        self.assertEqual(0, self.shelly.stateWritesSaved)
+        self.assertEqual('11.0 W', self.device.states_meta['curEnergyLevel']['uiValue'])
+
+    def test_updateStateOnServer_writes_state_changed_elsewhere(self):
+        """Test that a state is written again if the device has a different value"""
+        self.shelly.updateStateOnServer('online', True)
+        self.device.updateStateOnServer('online', False)
+
+        self.assertTrue(self.shelly.updateStateOnServer('online', True))
+        self.assertTrue(self.device.states['online'])
+
+    def test_updateStateOnServer_force(self):
+        """Test that a forced write always goes to the server"""
+        self.shelly.updateStateOnServer('online', True)
+        self.assertTrue(self.shelly.updateStateOnServer('online', True, force=True))
+
+    def test_resetStateCache(self):
+        """Test that a state is written again after the cache is reset"""
+        self.shelly.updateStateOnServer('online', True)
+        self.shelly.resetStateCache()
+        self.assertTrue(self.shelly.updateStateOnServer('online', True))
+
+    def test_refresh_device_resets_state_cache(self):
+        """Test that every state is written again after the device is refreshed from the server"""
+        indigo.devices[self.device.id] = self.device
+        self.shelly.updateStateOnServer('ip-address', "192.168.1.100")
+        self.shelly.refresh_device()
+        self.assertDictEqual({}, self.shelly.stateCache)
+
+    def test_processOnline_always_writes(self):
+        """Test that the online status is written even when it has not changed"""
+        self.shelly.processOnline("true")
+        calls = self.device.serverCalls
+        self.shelly.processOnline("true")
+        self.assertEqual(calls + 2, self.device.serverCalls)
+
+    def test_stateUpdates_batches_states(self):
+        """Test that the states written in a block are sent to the server together"""
+        with self.shelly.stateUpdates():
+            self.shelly.updateStateOnServer('mac-address', "aa:bb:cc:dd:ee:ff")
+            self.shelly.updateStateOnServer('ip-address', "192.168.1.100")
+            self.shelly.updateStateImageOnServer(indigo.kStateImageSel.PowerOn)
+            self.assertEqual(0, self.device.serverCalls)
+            self.assertEqual("192.168.1.100", self.shelly.getState('ip-address'))
+
+        self.assertEqual(2, self.device.serverCalls)
+        self.assertEqual("aa:bb:cc:dd:ee:ff", self.device.states['mac-address'])
+        self.assertEqual("192.168.1.100", self.device.states['ip-address'])
+        self.assertEqual(indigo.kStateImageSel.PowerOn, self.device.image)
+
+    def test_stateUpdates_nested(self):
+        """Test that nested blocks are only sent to the server when the outer block ends"""
+        with self.shelly.stateUpdates():
+            with self.shelly.stateUpdates():
+                self.shelly.updateStateOnServer('online', True)
+            self.shelly.updateStateOnServer('online', False)
+            self.assertEqual(0, self.device.serverCalls)
+
+        self.assertEqual(1, self.device.serverCalls)
+        self.assertFalse(self.device.states['online'])
+
+    def test_stateUpdates_other_thread_writes_immediately(self):
+        """Test that a write from another thread, such as an action, is not held back by the batch of a message"""
+        with self.shelly.stateUpdates():
+            self.shelly.updateStateOnServer('online', True)
+            action = threading.Thread(target=self.shelly.updateStateOnServer, args=('onOffState', True))
+            action.start()
+            action.join()
+
+            self.assertEqual(1, self.device.serverCalls)
+            self.assertTrue(self.device.states['onOffState'])
+            self.assertNotIn('online', self.device.states)
+
+        self.assertEqual(2, self.device.serverCalls)
+        self.assertTrue(self.device.states['online'])
+
+    def test_stateUpdates_caches_after_write(self):
+        """Test that a batched state is only recorded as written once it has been sent to the server"""
+        with patch.object(IndigoDevice, 'updateStatesOnServer', side_effect=IOError):
+            with self.assertRaises(IOError):
+                with self.shelly.stateUpdates():
+                    self.shelly.updateStateOnServer('online', True)
+        self.assertNotIn('online', self.shelly.stateCache)
+
+        self.assertTrue(self.shelly.updateStateOnServer('online', True))
+        self.assertTrue(self.device.states['online'])
+
+    def test_applyAnnouncement_single_round_trip(self):
+        """Test that the details from an announcement are written in a single round-trip"""
+        self.shelly.applyAnnouncement({'id': "test-shelly", 'mac': "aa:bb:cc:dd:ee:ff", 'ip': "192.168.1.100", 'fw_ver': "1.0", 'new_fw': False})
+        self.assertEqual(1, self.device.serverCalls)
+
+    def test_getConfig_is_built_once(self):
+        """Test that the derived config is only rebuilt after a reset"""
+        self.assertEqual("shellies/test-shelly", self.shelly.getAddress())
+        self.device.pluginProps['address'] = "shellies/new-address/"
+        self.device.pluginProps['broker-id'] = "54321"
+        self.assertEqual("shellies/test-shelly", self.shelly.getAddress())
+        self.assertEqual(12345, self.shelly.getBrokerId())
+
+        self.shelly.resetConfig()
+        self.assertEqual("shellies/new-address", self.shelly.getAddress())
+        self.assertEqual(54321, self.shelly.getBrokerId())
@@ -0,0 +1,64 @@
+# coding=utf-8
+import unittest
+from mock import patch
+import sys
+import logging
+
+from mocking.IndigoDevice import IndigoDevice
+from mocking.IndigoServer import Indigo
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+from Devices.Shelly import Shelly
+
+
+class Test_ShellyLogger(unittest.TestCase):
+
+    def setUp(self):
+        indigo.__init__()
+        self.device = IndigoDevice(id=123456, name="New Device")
+        self.shelly = Shelly(self.device)
+        self.logger = logging.getLogger('Plugin.ShellyMQTT')
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.logger.setLevel(logging.NOTSET)
+
+    def test_logs_when_enabled(self):
+        """Test that an enabled logging method is passed to the logger."""
+        with patch.object(self.logger, 'info') as info:
+            self.shelly.logger.info(u"message %s", 1)
+        info.assert_called_once_with(u"message %s", 1)
+
+    def test_muted_methods_are_discarded(self):
+        """Test that the muted logging methods do nothing for a muted device."""
+        self.device.pluginProps['muted'] = True
+        with patch.object(self.logger, 'info') as info, patch.object(self.logger, 'error') as error:
+            self.shelly.logger.info(u"message")
+            self.shelly.logger.error(u"message")
+        info.assert_not_called()
+        error.assert_called_once_with(u"message")
+
+    def test_disabled_level_is_discarded(self):
+        """Test that a logging method below the log level does nothing."""
+        self.logger.setLevel(logging.INFO)
+        with patch.object(self.logger, 'debug') as debug:
+            self.shelly.logger.debug(u"message")
+        debug.assert_not_called()
+
+    def test_method_is_bound_once(self):
+        """Test that the device props are only checked the first time a method is used."""
+        with patch.object(self.shelly, 'isMuted', return_value=False) as isMuted:
+            self.shelly.logger.debug(u"message")
+            self.shelly.logger.debug(u"message")
+        self.assertEqual(1, isMuted.call_count)
+
+    def test_resetConfig_rebinds_methods(self):
+        """Test that a change to the muted prop is picked up after the config is reset."""
+        self.shelly.logger.info(u"message")
+        self.device.pluginProps['muted'] = True
+        self.shelly.resetConfig()
+        with patch.object(self.logger, 'info') as info:
+            self.shelly.logger.info(u"message")
+        info.assert_not_called()
@@ -7,9 +7,11 @@ import logging
 from mocking.IndigoDevice import IndigoDevice
 from mocking.IndigoServer import Indigo
 from mocking.IndigoAction import IndigoAction
+from mocking.IndigoTrigger import IndigoTrigger
 
 indigo = Indigo()
 sys.modules['indigo'] = indigo
+from Core.TriggerIndex import TriggerIndex
 from Devices.Relays.Shelly_1PM import Shelly_1PM
 
 
@@ -17,6 +19,11 @@ class Test_Shelly_1PM(unittest.TestCase):
 
     def setUp(self):
         indigo.__init__()
+        # Devices.Shelly keeps the indigo mock of the first test module that imported it
+        patcher = patch('Devices.Shelly.indigo', indigo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        indigo.activePlugin.triggerIndex = TriggerIndex()
         self.device = IndigoDevice(id=123456, name="New Device")
         self.shelly = Shelly_1PM(self.device)
         logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
@@ -87,6 +94,19 @@ class Test_Shelly_1PM(unittest.TestCase):
         self.assertEqual("100.12", self.shelly.device.states['overpower-value'])
         self.assertEqual("100.12 W", self.shelly.device.states_meta['overpower-value']['uiValue'])
 
+    def test_handleMessage_relay_overpower_value_executes_triggers(self):
+        """Test that an overpower message executes the overpower triggers of the device."""
+        trigger_any = IndigoTrigger("overpower-any", {}, id=1)
+        trigger_device = IndigoTrigger("overpower-device", {'device-id': str(self.device.id)}, id=2)
+        trigger_other = IndigoTrigger("overpower-device", {'device-id': str(self.device.id + 1)}, id=3)
+        for trigger in [trigger_any, trigger_device, trigger_other]:
+            indigo.activePlugin.triggerIndex.add(trigger)
+
+        self.shelly.handleMessage("shellies/shelly1pm-test/relay/0/overpower_value", "100.12")
+        self.assertTrue(trigger_any.executed)
+        self.assertTrue(trigger_device.executed)
+        self.assertFalse(trigger_other.executed)
+
     def test_handleMessage_switch_on(self):
         """Test getting a switch on message."""
         self.assertFalse(self.shelly.device.states['sw-input'])
@@ -272,3 +292,21 @@ class Test_Shelly_1PM(unittest.TestCase):
         self.shelly.handleMessage("shellies/shelly1pm-test/input_event/0", '{"event": "S", "event_cnt": 1}')
         processInputEvent.assert_called_with('{"event": "S", "event_cnt": 1}')
 
+
+    def test_isCriticalTopic(self):
+        """Test that relay and input messages are handled ahead of telemetry"""
+        self.assertTrue(self.shelly.isCriticalTopic("shellies/shelly1pm-test/relay/0"))
+        self.assertTrue(self.shelly.isCriticalTopic("shellies/shelly1pm-test/input/0"))
+        self.assertTrue(self.shelly.isCriticalTopic("shellies/shelly1pm-test/relay/0/overpower_value"))
+        self.assertFalse(self.shelly.isCriticalTopic("shellies/shelly1pm-test/relay/0/power"))
+        self.assertFalse(self.shelly.isCriticalTopic("shellies/shelly1pm-test/relay/0/energy"))
+
+    def test_isTelemetryTopic(self):
+        """Test that power, energy and temperature readings are coalesced and changes are never held"""
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/relay/0/power"))
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/relay/0/energy"))
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/temperature"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/relay/0"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/relay/0/overpower_value"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/overtemperature"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly1pm-test/online"))
@@ -65,4 +65,9 @@ class Test_Shelly_Addon(unittest.TestCase):
     def test_isAddon(self):
         self.assertTrue(self.shelly.isAddon())
 
+    def test_getHostId(self):
+        self.assertEqual(self.host_shelly.device.id, self.shelly.getHostId())
 
+    def test_getHostId_none(self):
+        self.device.pluginProps['host-id'] = None
+        self.assertIsNone(self.shelly.getHostId())
@@ -79,6 +79,8 @@ class Test_Shelly_Button1(unittest.TestCase):
         self.device.pluginProps['last-input-event-id'] = 3
         self.device.states['online'] = False
         self.shelly.handleMessage("shellies/shelly-button1-test/online", "true")
+        self.assertEqual(0, self.shelly.getLastInputEventId())
+        self.shelly.saveLastInputEventId()
         self.assertEqual(0, self.device.pluginProps['last-input-event-id'])
 
     def test_input_event_cnt_is_not_reset_on_duplicate_online(self):
@@ -86,4 +88,6 @@ class Test_Shelly_Button1(unittest.TestCase):
         self.device.pluginProps['last-input-event-id'] = 3
         self.device.states['online'] = True
         self.shelly.handleMessage("shellies/shelly-button1-test/online", "true")
+        self.assertEqual(3, self.shelly.getLastInputEventId())
+        self.shelly.saveLastInputEventId()
         self.assertEqual(3, self.device.pluginProps['last-input-event-id'])
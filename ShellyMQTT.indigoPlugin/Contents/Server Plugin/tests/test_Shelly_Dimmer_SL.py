@@ -55,6 +55,14 @@ class Test_Shelly_Dimmer_SL(unittest.TestCase):
         ]
         self.assertListEqual(topics, self.shelly.getSubscriptions())
 
+    def test_isTelemetryTopic(self):
+        """Test that the power and energy readings on the light topics are coalesced"""
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly-dimmer-sl-test/light/0/power"))
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly-dimmer-sl-test/light/0/energy"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly-dimmer-sl-test/light/0"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly-dimmer-sl-test/light/0/status"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly-dimmer-sl-test/overload"))
+
     def test_handleMessage_status_invalid(self):
         """Test getting invalid status data."""
         self.assertRaises(ValueError, self.shelly.handleMessage("shellies/shelly-dimmer-sl-test/light/0/status", '{"ison": true, "mo'))
@@ -44,6 +44,13 @@ class Test_Shelly_HT(unittest.TestCase):
         ]
         self.assertListEqual(topics, self.shelly.getSubscriptions())
 
+    def test_isTelemetryTopic(self):
+        """Test that temperature and humidity readings are coalesced and the battery level is never held"""
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly-ht-test/sensor/temperature"))
+        self.assertTrue(self.shelly.isTelemetryTopic("shellies/shelly-ht-test/sensor/humidity"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly-ht-test/sensor/battery"))
+        self.assertFalse(self.shelly.isTelemetryTopic("shellies/shelly-ht-test/online"))
+
     def test_handleMessage_online_true(self):
         self.shelly.device.states['online'] = False
         self.assertFalse(self.shelly.device.states['online'])
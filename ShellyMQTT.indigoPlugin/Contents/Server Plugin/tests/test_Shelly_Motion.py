@@ -92,6 +92,16 @@ class Test_Shelly_Motion(unittest.TestCase):
         self.shelly.handleMessage("shellies/shelly-motion-test/status", '{"bat": 68}')
         self.assertEqual(68, self.device.states['batteryLevel'])
 
+    def test_handleMessage_status_single_round_trip(self):
+        """Test that all states of a status message and the state image are written in a single flush"""
+        self.device.serverCalls = 0
+        self.shelly.handleMessage("shellies/shelly-motion-test/status", '{"motion": true, "active": true, "vibration": false, "lux": 88, "bat": 68}')
+
+        self.assertEqual(2, self.device.serverCalls)
+        self.assertTrue(self.device.states['onOffState'])
+        self.assertEqual(88, self.device.states['lux'])
+        self.assertEqual(indigo.kStateImageSel.MotionSensorTripped, self.device.image)
+
     def test_handleMessage_invalid_json(self):
         self.assertRaises(ValueError, self.shelly.handleMessage("shellies/shelly-motion-test/status", '{"bat": 6]'))
 
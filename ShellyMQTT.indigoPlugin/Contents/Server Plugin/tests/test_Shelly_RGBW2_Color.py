@@ -88,6 +88,25 @@ class Test_Shelly_RGBW2_Color(unittest.TestCase):
         self.assertEqual(52, self.shelly.device.states['greenLevel'])
         self.assertEqual(53, self.shelly.device.states['blueLevel'])
 
+    def test_handleMessage_status_single_round_trip(self):
+        """Test that all states of a status message and the state image are written in a single flush."""
+        self.device.serverCalls = 0
+        payload = {
+            "ison": True,
+            "mode": "color",
+            "red": 51,
+            "green": 52,
+            "blue": 53,
+            "white": 54,
+            "gain": 100,
+            "power": 25,
+            "overpower": False
+        }
+        self.shelly.handleMessage("shellies/shelly-rgbw2-color-test/color/0/status", json.dumps(payload))
+
+        self.assertEqual(2, self.device.serverCalls)
+        self.assertEqual(54, self.shelly.device.states['whiteLevel'])
+
     def test_handleMessage_light_off(self):
         """Test getting a light off message."""
         self.shelly.turnOn()
@@ -227,6 +246,16 @@ class Test_Shelly_RGBW2_Color(unittest.TestCase):
         self.assertEqual(50, self.shelly.device.states['brightnessLevel'])
         publish.assert_called_with("shellies/shelly-rgbw2-color-test/color/0/set", json.dumps({"turn": "on", "mode": "color", "white": 100, "red": 0, "green": 0, "blue": 0, "gain": 50}))
 
+    @patch('Devices.Shelly.Shelly.publish')
+    def test_handleAction_setColorLevels_always_writes(self, publish):
+        setColorLevels = IndigoAction(indigo.kDeviceAction.SetColorLevels, actionValue={'redLevel': 10, 'greenLevel': 20, 'blueLevel': 30, 'whiteLevel': 40})
+        self.shelly.handleAction(setColorLevels)
+        calls = self.device.serverCalls
+
+        self.shelly.handleAction(setColorLevels)
+        self.assertEqual(10, self.shelly.device.states['redLevel'])
+        self.assertLessEqual(calls + 4, self.device.serverCalls)
+
     @patch('Devices.Shelly.Shelly.publish')
     def test_handleAction_brightenBy(self, publish):
         self.assertEqual(0, self.shelly.device.states['brightnessLevel'])
@@ -0,0 +1,55 @@
+# coding=utf-8
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+from Core.StateSnapshot import StateSnapshot
+
+
+class Test_StateSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "snapshot.json")
+        self.snapshot = StateSnapshot(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_load_missing(self):
+        """Test that there is no state before a snapshot is written."""
+        self.assertDictEqual({}, self.snapshot.load())
+
+    def test_save_and_load(self):
+        """Test that a saved state is loaded by the next run."""
+        state = {'devices': {'123': {'temperature-sensors': [{'channel': 0, 'id': "28aabbccdd"}]}}}
+        self.assertTrue(self.snapshot.save(state))
+
+        self.assertDictEqual(state, StateSnapshot(self.path).load())
+        self.assertFalse(os.path.exists("{}.tmp".format(self.path)))
+
+    def test_save_unchanged(self):
+        """Test that the snapshot is only written when the state changed."""
+        self.assertTrue(self.snapshot.save({'devices': {}}))
+        self.assertFalse(self.snapshot.save({'devices': {}}))
+        self.assertTrue(self.snapshot.save({'devices': {'123': {}}}))
+
+    def test_load_corrupt(self):
+        """Test that a snapshot that can't be read is ignored."""
+        with open(self.path, "w") as snapshotFile:
+            snapshotFile.write('{"version": 1, "sta')
+        self.assertDictEqual({}, self.snapshot.load())
+
+    def test_load_other_version(self):
+        """Test that a snapshot from another version is ignored."""
+        with open(self.path, "w") as snapshotFile:
+            snapshotFile.write('{"version": 0, "state": {"devices": {}}}')
+        self.assertDictEqual({}, self.snapshot.load())
+
+    def test_save_error(self):
+        """Test that a snapshot that can't be written is reported without raising."""
+        snapshot = StateSnapshot(os.path.join(self.folder, "missing", "snapshot.json"))
+        self.assertFalse(snapshot.save({'devices': {}}))
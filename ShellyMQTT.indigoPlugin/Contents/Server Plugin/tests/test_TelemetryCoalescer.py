@@ -0,0 +1,88 @@
+# coding=utf-8
+import unittest
+
+from Core.TelemetryCoalescer import TelemetryCoalescer
+
+
+class Test_TelemetryCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.coalescer = TelemetryCoalescer(0.5)
+
+    def test_isEnabled(self):
+        """Test that coalescing is only enabled with a window."""
+        self.assertTrue(self.coalescer.isEnabled())
+        self.assertFalse(TelemetryCoalescer().isEnabled())
+
+    def test_empty(self):
+        """Test that a new coalescer does not hold any messages."""
+        self.assertListEqual([], self.coalescer.flush(force=True))
+        self.assertIsNone(self.coalescer.getTimeout())
+
+    def test_newest_value_wins(self):
+        """Test that only the newest message of a key is kept."""
+        for power in range(5):
+            self.coalescer.put((1, "shellies/plug/relay/0/power"), power, now=100)
+
+        self.assertListEqual([((1, "shellies/plug/relay/0/power"), 4)], self.coalescer.flush(now=101))
+        statistics = self.coalescer.getStatistics()
+        self.assertEqual(1, statistics['held'])
+        self.assertEqual(4, statistics['coalesced'])
+        self.assertEqual(0, statistics['pending'])
+
+    def test_keys_are_separate(self):
+        """Test that messages on different brokers and topics are held separately."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.coalescer.put((2, "shellies/plug/relay/0/power"), 20, now=100)
+        self.coalescer.put((1, "shellies/plug/relay/0/energy"), 30, now=100)
+
+        self.assertListEqual([
+            ((1, "shellies/plug/relay/0/power"), 10),
+            ((2, "shellies/plug/relay/0/power"), 20),
+            ((1, "shellies/plug/relay/0/energy"), 30)
+        ], self.coalescer.flush(now=101))
+
+    def test_flush_waits_for_window(self):
+        """Test that messages are held until their window has passed."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.coalescer.put((1, "shellies/plug/relay/0/energy"), 20, now=100.25)
+
+        self.assertListEqual([], self.coalescer.flush(now=100.25))
+        self.assertListEqual([((1, "shellies/plug/relay/0/power"), 10)], self.coalescer.flush(now=100.5))
+        self.assertListEqual([((1, "shellies/plug/relay/0/energy"), 20)], self.coalescer.flush(now=100.75))
+
+    def test_window_is_not_extended(self):
+        """Test that a newer message does not postpone the flush of a key."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 11, now=100.4)
+
+        self.assertListEqual([((1, "shellies/plug/relay/0/power"), 11)], self.coalescer.flush(now=100.5))
+
+    def test_flush_force(self):
+        """Test that all messages are returned when the flush is forced."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.assertListEqual([((1, "shellies/plug/relay/0/power"), 10)], self.coalescer.flush(now=100, force=True))
+
+    def test_getTimeout(self):
+        """Test the time until the oldest message is due."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.coalescer.put((1, "shellies/plug/relay/0/energy"), 20, now=100.25)
+
+        self.assertEqual(0.5, self.coalescer.getTimeout(now=100))
+        self.assertEqual(0, self.coalescer.getTimeout(now=101))
+
+    def test_setWindow_makes_held_messages_due(self):
+        """Test that the messages held under the old window are due once the window changes."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.assertTrue(self.coalescer.setWindow(10))
+        self.coalescer.put((1, "shellies/plug/relay/0/energy"), 20, now=100)
+
+        self.assertEqual(0, self.coalescer.getTimeout(now=100))
+        self.assertListEqual([((1, "shellies/plug/relay/0/power"), 10)], self.coalescer.flush(now=100))
+        self.assertListEqual([((1, "shellies/plug/relay/0/energy"), 20)], self.coalescer.flush(now=110))
+
+    def test_setWindow_unchanged(self):
+        """Test that setting the same window keeps the deadlines of the held messages."""
+        self.coalescer.put((1, "shellies/plug/relay/0/power"), 10, now=100)
+        self.assertFalse(self.coalescer.setWindow(0.5))
+        self.assertListEqual([], self.coalescer.flush(now=100))
@@ -0,0 +1,126 @@
+# coding=utf-8
+import unittest
+import threading
+
+from Core.TieredQueue import TieredQueue
+
+
+class Test_TieredQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = TieredQueue()
+
+    def test_empty(self):
+        """Test that a new queue does not contain any items."""
+        self.assertEqual(0, self.queue.qsize())
+        self.assertListEqual([], self.queue.drain())
+
+    def test_get_keeps_order_within_tier(self):
+        """Test that items in the same tier are taken in the order they were queued."""
+        for i in range(3):
+            self.queue.put(i)
+
+        self.assertListEqual([0, 1, 2], [self.queue.get() for _ in range(3)])
+
+    def test_get_critical_first(self):
+        """Test that critical items are taken before bulk items that were queued earlier."""
+        self.queue.put("power")
+        self.queue.put("relay", True)
+        self.queue.put("energy")
+        self.queue.put("input", True)
+
+        self.assertListEqual(["relay", "input", "power", "energy"], [self.queue.get() for _ in range(4)])
+
+    def test_drain_critical_first(self):
+        """Test that draining returns the critical items followed by the bulk items."""
+        self.queue.put("power")
+        self.queue.put("relay", True)
+        self.queue.put("energy")
+
+        self.assertListEqual(["relay", "power", "energy"], self.queue.drain())
+        self.assertEqual(0, self.queue.qsize())
+
+    def test_get_keeps_order_per_key(self):
+        """Test that a critical item does not skip ahead of the bulk items queued under its key."""
+        self.queue.put("power-1", key=1)
+        self.queue.put("power-2", key=2)
+        self.queue.put("relay-1", True, key=1)
+        self.queue.put("energy-1", key=1)
+
+        self.assertListEqual(["power-1", "relay-1", "power-2", "energy-1"], [self.queue.get() for _ in range(4)])
+
+    def test_drain_keeps_order_per_key(self):
+        """Test that draining keeps interleaved critical and bulk items of a key in order."""
+        self.queue.put("power-1", key=1)
+        self.queue.put("input-2", True, key=2)
+        self.queue.put("relay-1", True, key=1)
+        self.queue.put("power-2", key=2)
+        self.queue.put("energy-1", key=1)
+        self.queue.put("input-1", True, key=1)
+
+        self.assertListEqual(["input-2", "power-1", "relay-1", "energy-1", "input-1", "power-2"], self.queue.drain())
+
+    def test_offer_drop_keeps_order_per_key(self):
+        """Test that the bulk items of a key that are left after a drop are kept in order."""
+        queue = TieredQueue(3)
+        queue.offer("power-1", key=1)
+        queue.offer("power-2", key=2)
+        queue.offer("energy-1", key=1)
+        queue.offer("relay-1", True, key=1)
+
+        self.assertListEqual(["energy-1", "relay-1", "power-2"], queue.drain())
+        self.assertEqual((1, 0), queue.getDropped())
+
+    def test_qsize(self):
+        """Test that both tiers are counted."""
+        self.assertEqual(1, self.queue.put("power"))
+        self.assertEqual(2, self.queue.put("relay", True))
+        self.assertEqual(2, self.queue.qsize())
+
+    def test_put_wakes_get(self):
+        """Test that a blocked get returns once an item is queued."""
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.queue.get()))
+        thread.start()
+        self.queue.put("relay", True)
+        thread.join(1)
+
+        self.assertFalse(thread.is_alive())
+        self.assertListEqual(["relay"], results)
+
+    def test_offer_without_capacity(self):
+        """Test that a queue without a capacity keeps every offered item."""
+        for i in range(100):
+            self.queue.offer(i)
+        self.assertEqual(100, self.queue.qsize())
+        self.assertEqual((0, 0), self.queue.getDropped())
+
+    def test_offer_drops_oldest_bulk_item(self):
+        """Test that a full queue drops its oldest bulk item to make room."""
+        queue = TieredQueue(3)
+        queue.offer("power-1")
+        queue.offer("relay", True)
+        queue.offer("power-2")
+        self.assertEqual(3, queue.offer("power-3"))
+        self.assertEqual(3, queue.offer("input", True))
+
+        self.assertListEqual(["relay", "input", "power-3"], queue.drain())
+        self.assertEqual((2, 0), queue.getDropped())
+
+    def test_offer_drops_new_item_when_full_of_critical_items(self):
+        """Test that a new item is dropped when the full queue only holds critical items."""
+        queue = TieredQueue(2)
+        queue.offer("relay-1", True)
+        queue.offer("relay-2", True)
+        queue.offer("relay-3", True)
+        queue.offer("power")
+
+        self.assertListEqual(["relay-1", "relay-2"], queue.drain())
+        self.assertEqual((1, 1), queue.getDropped())
+
+    def test_put_ignores_capacity(self):
+        """Test that put always queues the item."""
+        queue = TieredQueue(1)
+        queue.put("power")
+        queue.put(None)
+        self.assertListEqual(["power", None], queue.drain())
@@ -0,0 +1,66 @@
+# coding=utf-8
+import unittest
+
+from mocking.IndigoTrigger import IndigoTrigger
+from Core.TriggerIndex import TriggerIndex
+
+
+class Test_TriggerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TriggerIndex()
+
+    def test_empty(self):
+        """Test that a new index does not contain any triggers."""
+        self.assertEqual(0, len(self.index))
+        self.assertListEqual([], self.index.get("input-event-s", 1))
+
+    def test_get_by_device(self):
+        """Test that only the triggers of the event and device are returned."""
+        trigger = IndigoTrigger("input-event-s", {'device-id': "1"}, id=10)
+        self.index.add(trigger)
+        self.index.add(IndigoTrigger("input-event-l", {'device-id': "1"}, id=11))
+        self.index.add(IndigoTrigger("input-event-s", {'device-id': "2"}, id=12))
+
+        self.assertListEqual([trigger], self.index.get("input-event-s", 1))
+        self.assertEqual(3, len(self.index))
+
+    def test_get_without_device(self):
+        """Test getting the triggers that are not tied to a device."""
+        trigger = IndigoTrigger("low-battery-any", {}, id=10)
+        self.index.add(trigger)
+
+        self.assertListEqual([trigger], self.index.get("low-battery-any"))
+        self.assertListEqual([], self.index.get("low-battery-any", 1))
+
+    def test_any_trigger_ignores_device_id(self):
+        """Test that an "-any" trigger with a leftover device id is not tied to the device."""
+        trigger = IndigoTrigger("abnormal-temperature-status-any", {'device-id': "1"}, id=10)
+        self.index.add(trigger)
+
+        self.assertListEqual([trigger], self.index.get("abnormal-temperature-status-any"))
+        self.assertListEqual([], self.index.get("abnormal-temperature-status-any", 1))
+
+    def test_invalid_device_id(self):
+        """Test that a trigger with an invalid device id is not tied to a device."""
+        trigger = IndigoTrigger("overpower-device", {'device-id': ""}, id=10)
+        self.index.add(trigger)
+        self.assertListEqual([trigger], self.index.get("overpower-device"))
+
+    def test_add_replaces_trigger(self):
+        """Test that adding an updated trigger moves it to its new key."""
+        self.index.add(IndigoTrigger("input-event-s", {'device-id': "1"}, id=10))
+        trigger = IndigoTrigger("input-event-l", {'device-id': "2"}, id=10)
+        self.index.add(trigger)
+
+        self.assertListEqual([], self.index.get("input-event-s", 1))
+        self.assertListEqual([trigger], self.index.get("input-event-l", 2))
+        self.assertEqual(1, len(self.index))
+
+    def test_remove(self):
+        """Test removing a trigger."""
+        self.index.add(IndigoTrigger("input-event-s", {'device-id': "1"}, id=10))
+
+        self.assertTrue(self.index.remove(10))
+        self.assertListEqual([], self.index.get("input-event-s", 1))
+        self.assertFalse(self.index.remove(10))
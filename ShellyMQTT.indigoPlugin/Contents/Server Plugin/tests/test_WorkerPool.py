@@ -0,0 +1,122 @@
+# coding=utf-8
+import unittest
+import logging
+import threading
+import time
+
+from Core.WorkerPool import WorkerPool
+
+
+class Test_WorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        logging.getLogger('Plugin.ShellyMQTT').addHandler(logging.NullHandler())
+        self.pool = WorkerPool(4)
+
+    def tearDown(self):
+        self.pool.stop()
+
+    def test_getSize(self):
+        """Test the number of workers in the pool."""
+        self.assertEqual(4, self.pool.getSize())
+
+    def test_getShard_is_stable(self):
+        """Test that a key is always handled by the same shard."""
+        self.assertEqual(self.pool.getShard(123456), self.pool.getShard(123456))
+        self.assertTrue(0 <= self.pool.getShard(123456) < 4)
+
+    def test_submit_keeps_order_per_key(self):
+        """Test that work for the same key is handled in the order it was submitted."""
+        results = {1: [], 2: [], 3: []}
+        for i in range(100):
+            for key in results.keys():
+                self.pool.submit(key, False, results[key].append, i)
+        self.pool.stop()
+
+        for key in results.keys():
+            self.assertListEqual(range(100), results[key])
+
+    def test_slow_key_does_not_block_other_shards(self):
+        """Test that work for a key on another shard is handled while a shard is busy."""
+        blocked = threading.Event()
+        handled = threading.Event()
+        slowKey = 0
+        fastKey = 1
+        self.assertNotEqual(self.pool.getShard(slowKey), self.pool.getShard(fastKey))
+
+        self.pool.submit(slowKey, False, blocked.wait, 5)
+        self.pool.submit(fastKey, False, handled.set)
+        self.assertTrue(handled.wait(1))
+        blocked.set()
+
+    def test_critical_work_is_handled_first(self):
+        """Test that critical work skips ahead of the bulk work of other keys waiting on the same shard."""
+        blocked = threading.Event()
+        results = []
+        self.assertEqual(self.pool.getShard(1), self.pool.getShard(5))
+        self.pool.submit(1, False, blocked.wait, 5)
+        self.pool.submit(1, False, results.append, "bulk")
+        self.pool.submit(5, True, results.append, "critical")
+        blocked.set()
+        self.pool.stop()
+
+        self.assertListEqual(["critical", "bulk"], results)
+
+    def test_critical_work_keeps_order_per_key(self):
+        """Test that critical work does not skip ahead of bulk work for the same key."""
+        blocked = threading.Event()
+        results = []
+        self.pool.submit(1, False, blocked.wait, 5)
+        self.pool.submit(1, False, results.append, "power")
+        self.pool.submit(1, True, results.append, "relay")
+        self.pool.submit(1, False, results.append, "energy")
+        self.pool.submit(1, True, results.append, "input")
+        blocked.set()
+        self.pool.stop()
+
+        self.assertListEqual(["power", "relay", "energy", "input"], results)
+
+    def test_exception_does_not_stop_worker(self):
+        """Test that a failing handler does not stop the worker thread."""
+        handled = threading.Event()
+
+        def fail():
+            raise ValueError("failed")
+
+        self.pool.submit(1, False, fail)
+        self.pool.submit(1, False, handled.set)
+        self.assertTrue(handled.wait(1))
+
+    def test_getStatistics(self):
+        """Test the counters of each shard."""
+        for _ in range(3):
+            self.pool.submit(1, False, lambda: None)
+        self.pool.stop()
+
+        statistics = self.pool.getStatistics()
+        self.assertEqual(4, len(statistics))
+        shard = statistics[self.pool.getShard(1)]
+        self.assertEqual(3, shard['processed'])
+        self.assertEqual(0, shard['depth'])
+        self.assertTrue(1 <= shard['max-depth'] <= 3)
+        self.assertEqual(3, sum(s['processed'] for s in statistics))
+        self.assertEqual(0, shard['dropped'])
+
+    def test_full_shard_drops_bulk_work(self):
+        """Test that a full shard drops bulk work and stops once the queued work is handled."""
+        self.pool.stop()
+        self.pool = WorkerPool(1, capacity=2)
+        blocked = threading.Event()
+        results = []
+        self.pool.submit(1, False, blocked.wait, 5)
+        while self.pool.getStatistics()[0]['depth'] > 0:
+            time.sleep(0.001)
+
+        self.pool.submit(1, False, results.append, "power-1")
+        self.pool.submit(1, False, results.append, "power-2")
+        self.pool.submit(1, True, results.append, "relay")
+        blocked.set()
+        self.pool.stop()
+
+        self.assertListEqual(["power-2", "relay"], results)
+        self.assertEqual((1, 0), self.pool.getDropped())
@@ -0,0 +1,210 @@
+# coding=utf-8
+import unittest
+from mock import patch
+import sys
+import logging
+
+from mocking.IndigoDevice import IndigoDevice
+from mocking.IndigoServer import Indigo
+
+indigo = Indigo()
+sys.modules['indigo'] = indigo
+from plugin import Plugin
+from Devices.Relays.Shelly_1 import Shelly_1
+
+
+def copyDevice(device):
+    copy = IndigoDevice(id=device.id, name=device.name)
+    copy.deviceTypeId = device.deviceTypeId
+    copy.pluginProps = dict(device.pluginProps)
+    copy.states = dict(device.states)
+    return copy
+
+
+class Test_Plugin(unittest.TestCase):
+
+    def setUp(self):
+        indigo.__init__()
+        # Devices.Shelly keeps the indigo mock of the first test module that imported it
+        patcher = patch('Devices.Shelly.indigo', indigo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        logging.getLogger('Plugin').addHandler(logging.NullHandler())
+        self.plugin = Plugin("com.example.shellymqtt", "ShellyMQTT", "1.0.0", {})
+        indigo.activePlugin = self.plugin
+
+        self.device = IndigoDevice(id=123456, name="New Device")
+        self.device.deviceTypeId = "shelly-1"
+        self.device.pluginProps.update({'broker-id': "12345", 'address': "shellies/shelly1-test", 'message-type': "shellies"})
+        indigo.devices[self.device.id] = self.device
+        self.shelly = Shelly_1(self.device)
+        self.plugin.shellyDevices[self.device.id] = self.shelly
+
+    def test_deviceUpdated_state_change_does_not_refresh(self):
+        """Test that a device update that only changed states does not refresh the device."""
+        newDev = copyDevice(self.device)
+        newDev.states['onOffState'] = True
+
+        with patch.object(IndigoDevice, 'refreshFromServer') as refreshFromServer:
+            self.plugin.deviceUpdated(self.device, newDev)
+
+        refreshFromServer.assert_not_called()
+        self.assertEqual(0, self.plugin.messageStatistics['refreshes'])
+        self.assertEqual(1, self.plugin.messageStatistics['refreshes-avoided'])
+
+    def test_deviceUpdated_props_change_refreshes(self):
+        """Test that a device update that changed the plugin props refreshes the device."""
+        newDev = copyDevice(self.device)
+        newDev.pluginProps['int-temp-units'] = "F"
+
+        with patch.object(IndigoDevice, 'refreshFromServer') as refreshFromServer:
+            self.plugin.deviceUpdated(self.device, newDev)
+
+        refreshFromServer.assert_called_once()
+        self.assertEqual(1, self.plugin.messageStatistics['refreshes'])
+        self.assertEqual(0, self.plugin.messageStatistics['refreshes-avoided'])
+
+    def test_deviceUpdated_state_change_keeps_config(self):
+        """Test that the derived config, topic mapping and critical topics survive a state update."""
+        config = self.shelly.getConfig()
+        self.shelly.getTopicHandler("shellies/shelly1-test/relay/0")
+        self.shelly.isCriticalTopic("shellies/shelly1-test/relay/0")
+        newDev = copyDevice(self.device)
+        newDev.states['onOffState'] = True
+
+        self.plugin.deviceUpdated(self.device, newDev)
+
+        self.assertIs(config, self.shelly.config)
+        self.assertIsNotNone(self.shelly.topicHandlers)
+        self.assertIsNotNone(self.shelly.criticalTopics)
+
+    def test_deviceUpdated_props_change_resets_config(self):
+        """Test that the derived config is rebuilt after the plugin props changed."""
+        self.shelly.getConfig()
+        newDev = copyDevice(self.device)
+        newDev.pluginProps['int-temp-units'] = "F"
+
+        self.plugin.deviceUpdated(self.device, newDev)
+
+        self.assertIsNone(self.shelly.config)
+
+    def queueMessages(self, *messages):
+        """Queues messages on the broker of the device and notifies the plugin of them."""
+        queued = [{'topic_parts': topic.split('/'), 'payload': payload, 'message_type': "shellies"} for topic, payload in messages]
+        self.plugin.mqttPlugin.executeAction = lambda action, deviceId=None, props={}, waitUntilDone=False: queued.pop(0) if queued else None
+        self.plugin.messageQueue.put({'brokerID': "12345", 'message_type': "shellies"})
+        return queued
+
+    def test_processMessages_keeps_order_per_device(self):
+        """Test that interleaved critical and bulk messages for a device are handled in the order they arrived."""
+        self.plugin.addDeviceSubscriptions(self.shelly)
+        self.queueMessages(
+            ("shellies/shelly1-test/online", "true"),
+            ("shellies/shelly1-test/relay/0", "on"),
+            ("shellies/shelly1-test/ext_temperatures", "{}"),
+            ("shellies/shelly1-test/input_event/0", '{"event": "S", "event_cnt": 1}'),
+            ("shellies/shelly1-test/online", "false")
+        )
+
+        with patch.object(self.shelly, 'handleMessage') as handleMessage:
+            self.plugin.processMessages()
+
+        self.assertListEqual([
+            "shellies/shelly1-test/online",
+            "shellies/shelly1-test/relay/0",
+            "shellies/shelly1-test/ext_temperatures",
+            "shellies/shelly1-test/input_event/0",
+            "shellies/shelly1-test/online"
+        ], [call[0][0] for call in handleMessage.call_args_list])
+
+    def test_processMessages_limits_fetches_per_pass(self):
+        """Test that a pass stops fetching at the queue capacity and leaves the rest for the next pass."""
+        self.plugin.addDeviceSubscriptions(self.shelly)
+        self.plugin.messageQueueCapacity = 3
+        queued = self.queueMessages(*[("shellies/shelly1-test/online", "true")] * 5)
+
+        with patch.object(self.shelly, 'handleMessage') as handleMessage:
+            self.plugin.processMessages()
+            self.assertEqual(3, handleMessage.call_count)
+            self.assertEqual(2, len(queued))
+            self.assertEqual(3, self.plugin.messageStatistics['fetches'])
+            self.assertEqual(1, self.plugin.messageStatistics['deferred-fetches'])
+            self.assertEqual(1, self.plugin.messageQueue.getStatistics()['pending'])
+
+            self.plugin.processMessages()
+            self.assertEqual(5, handleMessage.call_count)
+            self.assertEqual(0, self.plugin.messageQueue.getStatistics()['pending'])
+
+    def test_processMessages_holds_only_telemetry(self):
+        """Test that readings are coalesced while changes such as online are never held."""
+        self.plugin.addDeviceSubscriptions(self.shelly)
+        self.plugin.telemetryCoalescer.window = 10
+        self.queueMessages(
+            ("shellies/shelly1-test/online", "false"),
+            ("shellies/shelly1-test/ext_temperatures", "{}"),
+            ("shellies/shelly1-test/online", "true"),
+            ("shellies/shelly1-test/input_event/0", '{"event": "S", "event_cnt": 1}'),
+            ("shellies/shelly1-test/online", "false")
+        )
+
+        with patch.object(self.shelly, 'handleMessage') as handleMessage:
+            self.plugin.processMessages()
+
+        self.assertListEqual([
+            ("shellies/shelly1-test/online", "false"),
+            ("shellies/shelly1-test/online", "true"),
+            ("shellies/shelly1-test/input_event/0", '{"event": "S", "event_cnt": 1}'),
+            ("shellies/shelly1-test/online", "false")
+        ], [call[0][:2] for call in handleMessage.call_args_list])
+        self.assertEqual(1, self.plugin.telemetryCoalescer.getStatistics()['pending'])
+
+    def test_closedPrefsConfigUi_releases_held_telemetry(self):
+        """Test that telemetry held under the old window is handled by the next pass once the window changes."""
+        self.plugin.addDeviceSubscriptions(self.shelly)
+        self.plugin.telemetryCoalescer.window = 10
+        self.queueMessages(("shellies/shelly1-test/ext_temperatures", "{}"))
+        with patch.object(self.shelly, 'handleMessage') as handleMessage:
+            self.plugin.processMessages()
+            handleMessage.assert_not_called()
+
+            self.plugin.closedPrefsConfigUi({'telemetry-window': "5000"}, False)
+            self.assertEqual(0, self.plugin.getWaitTimeout())
+            self.plugin.processMessages()
+
+        handleMessage.assert_called_once()
+        self.assertEqual(5, self.plugin.telemetryCoalescer.window)
+
+    def startAddonWithoutHost(self):
+        """Starts an addon device whose host has not started."""
+        addon = IndigoDevice(id=234567, name="New Addon")
+        addon.deviceTypeId = "shelly-addon-ds1820"
+        addon.pluginProps.update({'host-id': "345678", 'probe-number': "0"})
+        addon.pluginProps[self.plugin.deviceMigrator.versionProp] = self.plugin.deviceMigrator.getCurrentVersion()
+        indigo.devices[addon.id] = addon
+        with patch('Devices.Addons.Shelly_Addon.indigo', indigo):
+            self.assertFalse(self.plugin.deviceStartComm(addon))
+        return addon
+
+    def test_deviceStartComm_addon_waits_for_host(self):
+        """Test that an addon started before its host is indexed so that the host can start it."""
+        addon = self.startAddonWithoutHost()
+
+        self.assertIn(addon.id, self.plugin.dependents)
+        self.assertSetEqual({addon.id}, self.plugin.hostAddons[345678])
+
+    def test_deviceStartComm_addon_without_host_is_not_indexed(self):
+        """Test that an addon that still has no host on its second start is removed from the index of its host."""
+        addon = self.startAddonWithoutHost()
+        with patch('Devices.Addons.Shelly_Addon.indigo', indigo):
+            self.assertFalse(self.plugin.deviceStartComm(addon))
+
+        self.assertNotIn(addon.id, self.plugin.dependents)
+        self.assertNotIn(345678, self.plugin.hostAddons)
+
+    def test_deviceStopComm_waiting_addon_is_not_indexed(self):
+        """Test that stopping an addon that waits for its host removes it from the index of its host."""
+        addon = self.startAddonWithoutHost()
+        self.plugin.deviceStopComm(addon)
+
+        self.assertNotIn(addon.id, self.plugin.dependents)
+        self.assertNotIn(345678, self.plugin.hostAddons)